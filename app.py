@@ -11,24 +11,33 @@ To deploy to Streamlit Cloud: Push this repo to GitHub and connect it via Stream
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
 from pathlib import Path
 import sys
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent / "utils"))
 
-from data_loader import load_all_data
-from pages import (
-    executive_overview,
-    campaign_analytics,
-    customer_insights,
-    product_performance,
-    geographic_analysis,
-    attribution_funnel,
-    ml_model_evaluation
-)
+# Time the imports below (pandas and numpy included) when startup profiling
+# is on (NOVAMART_PROFILE_STARTUP)
+import startup_profile
+startup_profile.install()
+
+import pandas as pd
+import numpy as np
+
+# Copy-on-write: datasets are handed to pages read-only, and derived frames
+# (column selections, assign, sorts) share unchanged columns instead of
+# copying them
+pd.set_option("mode.copy_on_write", True)
+
+from cache_warmer import start_cache_warmer
+from data_loader import DatasetLoadError, get_data_paths
+from data_store import get_data_store
+from dimension_catalog import get_catalog
+from figure_cache import get_figure_cache
+from filter_context import FilterContext
+from pages import PAGES, load_page
+import section_metrics
 
 # =============================================================================
 # PAGE CONFIG
@@ -57,26 +66,21 @@ st.markdown("""
 # =============================================================================
 # SIDEBAR NAVIGATION
 # =============================================================================
-def render_sidebar():
-    """Create sidebar navigation and return selected page"""
+def render_sidebar(data):
+    """Create sidebar navigation; return the selected page and global filters"""
     with st.sidebar:
         st.title("📊 NovaMart Analytics")
         st.markdown("---")
         
         page = st.radio(
             "Navigate to:",
-            [
-                "🏠 Executive Overview",
-                "📈 Campaign Analytics",
-                "👥 Customer Insights",
-                "📦 Product Performance",
-                "🗺️ Geographic Analysis",
-                "🎯 Attribution & Funnel",
-                "🤖 ML Model Evaluation"
-            ],
+            list(PAGES),
             index=0
         )
         
+        st.markdown("---")
+        filters = render_global_filters(data)
+        
         st.markdown("---")
         st.markdown("""
         **About This Dashboard**
@@ -98,7 +102,80 @@ def render_sidebar():
         st.markdown("---")
         st.caption("Masters of AI in Business\nData Visualization Assignment")
     
-    return page
+    return page, filters
+
+def render_global_filters(data):
+    """Sidebar widgets for the filters applied to every page"""
+    st.markdown("**🔎 Global Filters**")
+    try:
+        campaign_catalog = get_catalog(data['campaigns'])
+        customer_catalog = get_catalog(data['customers'])
+    except DatasetLoadError as e:
+        st.caption(f"Filters unavailable: {e}")
+        return FilterContext()
+    
+    start = end = None
+    date_range = campaign_catalog.date_range('date')
+    if date_range:
+        first, last = (d.date() for d in date_range)
+        selected = st.date_input(
+            "Date range",
+            value=(first, last),
+            min_value=first,
+            max_value=last,
+            key="filter_dates"
+        )
+        # A range is only complete once both ends have been picked
+        if isinstance(selected, (list, tuple)) and len(selected) == 2 and tuple(selected) != (first, last):
+            start, end = selected
+    
+    regions = st.multiselect("Region", campaign_catalog.options('region'), key="filter_regions", placeholder="All regions")
+    channels = st.multiselect("Channel", campaign_catalog.options('channel'), key="filter_channels", placeholder="All channels")
+    segments = st.multiselect("Customer Segment", customer_catalog.options('customer_segment'), key="filter_segments", placeholder="All segments")
+    
+    return FilterContext(start, end, regions, channels, segments)
+
+# =============================================================================
+# PAGE ROUTING
+# =============================================================================
+def render_page(page, data):
+    """Render the selected page (its module is imported on first navigation)"""
+    load_page(page).render(data)
+
+def render_dataset_usage(data, page):
+    """Show which datasets the current page loaded"""
+    with st.sidebar:
+        with st.expander("🗂️ Datasets used on this page"):
+            used = data.used_by(page)
+            st.caption(", ".join(used) if used else "None")
+
+def render_section_timings(page):
+    """Debug panel: this run's section timings and p95 over recent runs"""
+    if not section_metrics.enabled():
+        return
+    with st.sidebar:
+        with st.expander("⏱️ Section timings"):
+            runs = section_metrics.last_run()
+            if runs:
+                st.caption("This run (ms)")
+                st.dataframe(
+                    pd.DataFrame(runs)[['section', 'aggregation_ms', 'figure_ms', 'chart_ms', 'total_ms', 'rows', 'payload_bytes']],
+                    hide_index=True
+                )
+            recent = section_metrics.summary(page)
+            if recent:
+                st.caption("Recent runs, slowest p95 first (ms)")
+                st.dataframe(
+                    pd.DataFrame(recent)[['section', 'runs', 'p50_ms', 'p95_ms', 'max_ms', 'payload_kb']],
+                    hide_index=True
+                )
+            figures = get_figure_cache()
+            if figures is not None:
+                stats = figures.stats()
+                st.caption(
+                    f"Figure cache: {stats['hits']:,} hits, {stats['misses']:,} misses, "
+                    f"{stats['entries']} figures ({stats['bytes'] / 2**20:.1f} MB)"
+                )
 
 # =============================================================================
 # MAIN APPLICATION
@@ -106,38 +183,34 @@ def render_sidebar():
 def main():
     """Main application logic"""
     
-    # Load data with caching
-    data = load_all_data()
+    # Datasets are loaded lazily, the first time a page accesses them
+    data = get_data_store(usage=st.session_state.setdefault("dataset_usage", {}))
     
     if data is None:
         st.error("❌ Failed to load data. Please check the data files.")
-        st.info("Ensure all CSV files are in the `data/` folder relative to this script.")
+        st.info("Ensure all CSV files are in one of these folders:\n" +
+                "\n".join([f"- {p}" for p in get_data_paths()]))
         return
     
-    # Render sidebar and get selected page
-    page = render_sidebar()
-    
-    # Route to appropriate page
-    if page == "🏠 Executive Overview":
-        executive_overview.render(data)
+    st.info(f"📁 Data loaded from: {data.data_path}")
     
-    elif page == "📈 Campaign Analytics":
-        campaign_analytics.render(data)
+    # Warm every page's caches in the background (once per process)
+    start_cache_warmer(data.data_path)
     
-    elif page == "👥 Customer Insights":
-        customer_insights.render(data)
+    # Render sidebar and get selected page; the global filters are applied
+    # once per dataset and shared by every page via data.filtered(...)
+    page, data.filters = render_sidebar(data)
     
-    elif page == "📦 Product Performance":
-        product_performance.render(data)
-    
-    elif page == "🗺️ Geographic Analysis":
-        geographic_analysis.render(data)
-    
-    elif page == "🎯 Attribution & Funnel":
-        attribution_funnel.render(data)
+    # Route to appropriate page
+    with data.track(page), startup_profile.page(page), section_metrics.page(page):
+        try:
+            render_page(page, data)
+        except DatasetLoadError as e:
+            st.error(f"❌ Could not load dataset '{e.key}' from {e.path.name}: {e.cause}")
     
-    elif page == "🤖 ML Model Evaluation":
-        ml_model_evaluation.render(data)
+    render_dataset_usage(data, page)
+    render_section_timings(page)
+    startup_profile.write_report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+"""
+Cache Key Microbenchmark
+========================
+Measures the per-rerun overhead of a cache *hit* for campaign preprocessing:
+
+- before: `@st.cache_data` taking the full DataFrame, so Streamlit hashes
+  every row (and unpickles a copy of the result) on each rerun
+- after:  the version-token keyed functions in data_loader, where the lookup
+  key is a short string and the cached frame is shared
+
+Usage:
+    python benchmarks/bench_cache_keys.py [--rows 10000000] [--repeats 5]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import streamlit as st  # noqa: E402
+
+from data_loader import get_summary_stats, preprocess_campaign_data  # noqa: E402
+from versioning import register_version  # noqa: E402
+
+
+def make_campaigns(rows, seed=42):
+    """Synthetic campaign frame with the same columns/dtypes as the real one"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2019-01-01", "2024-12-31", freq="D")
+    channels = ['Facebook', 'Google Ads', 'Referral', 'Organic Search',
+                'Email', 'LinkedIn', 'Instagram', 'Direct']
+    regions = ['East', 'North', 'South', 'West', 'Central']
+    spend = rng.gamma(2.0, 5000.0, rows)
+    revenue = spend * rng.gamma(2.0, 1.5, rows)
+    return pd.DataFrame({
+        'date': dates[rng.integers(0, len(dates), rows)],
+        'channel': pd.Categorical.from_codes(rng.integers(0, len(channels), rows), channels),
+        'region': pd.Categorical.from_codes(rng.integers(0, len(regions), rows), regions),
+        'impressions': rng.integers(5_000, 1_000_000, rows, dtype=np.int32),
+        'clicks': rng.integers(100, 50_000, rows, dtype=np.int32),
+        'conversions': rng.integers(1, 5_000, rows, dtype=np.int16),
+        'spend': spend,
+        'revenue': revenue,
+        'roas': (revenue / spend).astype('float32'),
+    })
+
+
+@st.cache_data(show_spinner=False)
+def baseline_preprocess(campaigns):
+    """The pre-version-token implementation: keyed by hashing the frame"""
+    df = campaigns.copy()
+    df['year'] = df['date'].dt.year
+    df['month'] = df['date'].dt.month
+    df['quarter'] = df['date'].dt.quarter
+    df['week'] = df['date'].dt.isocalendar().week
+    df['dayofweek'] = df['date'].dt.day_name()
+    df['month_name'] = df['date'].dt.strftime('%B')
+    return df
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} synthetic campaign rows...")
+    campaigns = make_campaigns(args.rows)
+    register_version(campaigns, "bench-campaigns@v1")
+
+    # Populate both caches, then time the hits (what every rerun pays)
+    for label, fn in [
+        ("before: cache_data(frame)", lambda: baseline_preprocess(campaigns)),
+        ("after:  version token    ", lambda: preprocess_campaign_data(campaigns)),
+        ("after:  summary stats    ", lambda: get_summary_stats(campaigns)),
+    ]:
+        start = time.perf_counter()
+        fn()
+        first = time.perf_counter() - start
+        hit = best_of(fn, args.repeats)
+        print(f"{label}  first call {first * 1000:10.1f} ms   cache hit {hit * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Figure Cache Benchmark
+======================
+Renders every page through Streamlit's AppTest harness with the figure cache
+(utils/figure_cache.py) on and off, rerunning each page several times with
+unchanged widgets, and reports the per-page median of the time spent
+building and sending figures on the reruns, from the section metrics log
+(utils/section_metrics.py). The first render of each page is excluded: it
+builds every figure in both modes.
+
+Each mode runs in a fresh interpreter, since the cache size is read from the
+environment at import. Background cache warming is switched off.
+
+Usage:
+    python benchmarks/bench_figure_cache.py [--reruns 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_app(reruns, timeout):
+    """Child process: visit every page, then rerun it `reruns` times"""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, str(ROOT / "utils"))
+    from pages import PAGES
+
+    app = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout)
+    app.run()
+    for label in PAGES:
+        app.sidebar.radio[0].set_value(label).run()
+        for _ in range(reruns):
+            app.run()
+
+
+def page_timings(log_path, reruns):
+    """Median per page of (figure + chart ms summed over its sections) across reruns"""
+    runs = defaultdict(lambda: defaultdict(float))  # (page, run number) -> section -> ms
+    seen = defaultdict(int)
+    for line in log_path.read_text(encoding="utf-8").splitlines():
+        record = json.loads(line)
+        key = (record['page'], record['section'])
+        number = seen[key]
+        seen[key] += 1
+        runs[record['page']][number] += (record['figure_ms'] or 0) + (record['chart_ms'] or 0)
+    result = {}
+    for page, per_run in runs.items():
+        # Run 0 is the initial default-page render or the navigation: skip it
+        later = [ms for number, ms in per_run.items() if number > 0][-reruns:]
+        if later:
+            result[page] = statistics.median(later)
+    return result
+
+
+def measure(cache_mb, reruns, timeout):
+    with tempfile.TemporaryDirectory() as folder:
+        log_path = Path(folder) / "sections.jsonl"
+        env = dict(
+            os.environ,
+            NOVAMART_FIGURE_CACHE_MB=str(cache_mb),
+            NOVAMART_SECTION_METRICS="1",
+            NOVAMART_SECTION_METRICS_LOG=str(log_path),
+            NOVAMART_WARM_CACHE="0",
+        )
+        subprocess.run(
+            [sys.executable, __file__, "--child", "--reruns", str(reruns), "--timeout", str(timeout)],
+            env=env, check=True, stderr=subprocess.DEVNULL,
+        )
+        return page_timings(log_path, reruns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_app(args.reruns, args.timeout)
+        return
+
+    uncached = measure(0, args.reruns, args.timeout)
+    cached = measure(64, args.reruns, args.timeout)
+    print("Figure build + send per rerun (median ms)")
+    print(f"{'page':<26}{'no cache':>10}{'cache':>10}")
+    for page in uncached:
+        print(f"{page:<26}{uncached[page]:>10.1f}{cached.get(page, float('nan')):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
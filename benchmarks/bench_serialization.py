@@ -0,0 +1,117 @@
+"""
+Cache Serialisation Benchmark
+=============================
+Measures what it costs to move typical query results in and out of the
+shared cache backends (see utils/cache_backend.py):
+
+- codec:    encode/decode time and payload size of the pickle-free encoding
+            (Parquet / npz / JSON), with pickle as a reference point
+- backends: put + get round trip through the in-process, disk and Redis
+            backends (a local Redis stand-in unless --redis-url is given)
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 1000000] [--repeats 5] [--redis-url redis://host:6379/0]
+"""
+
+import argparse
+import logging
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+from bench_cache_keys import make_campaigns  # noqa: E402
+from cache_backend import MemoryBackend, RedisBackend, decode_value, encode_value  # noqa: E402
+from disk_cache import DiskCache  # noqa: E402
+from resp_standin import StandInClient, StandInServer  # noqa: E402
+
+
+def make_results(rows):
+    """Representative cached values, from a KPI row up to a filtered frame"""
+    campaigns = make_campaigns(rows)
+    by_channel = campaigns.groupby('channel', observed=True)[['spend', 'revenue', 'conversions']].sum().reset_index()
+    daily = campaigns.groupby('date')['conversions'].sum()
+    scores = np.random.default_rng(0).random(20_000)
+    roc = (np.sort(scores), np.sort(scores)[::-1], np.linspace(0, 1, 20_000), 0.87)
+    return {
+        'kpi total (1 row)': campaigns[['spend', 'revenue']].sum().to_frame().T,
+        'by channel (8 rows)': by_channel,
+        'daily series': daily,
+        'roc curve (tuple)': roc,
+        f'filtered frame ({rows // 10:,} rows)': campaigns.iloc[: rows // 10].reset_index(drop=True),
+    }
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_codec(results, repeats):
+    print(f"{'value':<28}{'encode ms':>11}{'decode ms':>11}{'bytes':>12}"
+          f"{'pickle enc':>12}{'pickle dec':>12}{'pickle bytes':>14}")
+    for name, value in results.items():
+        kind, payload = encode_value(value)
+        pickled = pickle.dumps(value, protocol=5)
+        print(f"{name:<28}"
+              f"{best_of(repeats, lambda: encode_value(value)) * 1e3:>11.2f}"
+              f"{best_of(repeats, lambda: decode_value(kind, payload)) * 1e3:>11.2f}"
+              f"{len(payload):>12,}"
+              f"{best_of(repeats, lambda: pickle.dumps(value, protocol=5)) * 1e3:>12.2f}"
+              f"{best_of(repeats, lambda: pickle.loads(pickled)) * 1e3:>12.2f}"
+              f"{len(pickled):>14,}")
+
+
+def bench_backends(results, repeats, backends):
+    header = "".join(f"{name + ' ms':>14}" for name in backends)
+    print(f"{'value (put + get)':<28}{header}")
+    for name, value in results.items():
+        row = f"{name:<28}"
+        for backend in backends.values():
+            def round_trip():
+                backend.put(('bench', name), value)
+                found, _ = backend.get(('bench', name))
+                assert found
+            row += f"{best_of(repeats, round_trip) * 1e3:>14.2f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--redis-url", default=None, help="Real Redis server (default: local stand-in)")
+    args = parser.parse_args()
+
+    results = make_results(args.rows)
+    print("Pickle-free codec vs pickle")
+    bench_codec(results, args.repeats)
+
+    if args.redis_url:
+        redis_backend = RedisBackend(args.redis_url)
+    else:
+        server = StandInServer().start()
+        redis_backend = RedisBackend(client=StandInClient(port=server.port))
+    with tempfile.TemporaryDirectory() as folder:
+        backends = {
+            'memory': MemoryBackend(4 * 1024 ** 3),
+            'disk': DiskCache(folder, 4 * 1024 ** 3, 3600),
+            'redis': redis_backend,
+        }
+        print()
+        print("Backend round trip")
+        bench_backends(results, args.repeats, backends)
+
+
+if __name__ == "__main__":
+    main()
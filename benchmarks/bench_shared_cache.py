@@ -0,0 +1,110 @@
+"""
+Shared Cache Replica Check
+==========================
+Starts N dashboard "replicas" as separate processes, all pointed at one
+networked cache backend (a local Redis stand-in unless --redis-url is given),
+and runs the same set of page aggregations in each of them.
+
+The first replica computes every result; the others start afterwards and
+must be served entirely from the shared backend. Prints per-replica compute
+counts and timings, and exits non-zero if any later replica had to compute.
+
+Usage:
+    python benchmarks/bench_shared_cache.py [--replicas 4] [--rows 2000000] [--redis-url redis://host:6379/0]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+from bench_cache_keys import make_campaigns  # noqa: E402
+from resp_standin import StandInClient, StandInServer  # noqa: E402
+
+# (group-by columns, measures) of the aggregations every replica runs
+QUERIES = [
+    (['channel'], ['spend', 'revenue', 'conversions']),
+    (['region'], ['spend', 'revenue']),
+    (['channel', 'region'], ['clicks', 'impressions']),
+    (['date'], ['conversions']),
+]
+
+
+def run_replica(replica, rows, redis_url, port, results):
+    """One replica process: build its data, then answer QUERIES via the cache"""
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    from cache_backend import RedisBackend
+    from query_cache import QueryCache, query_key
+    from versioning import register_version
+
+    campaigns = register_version(make_campaigns(rows), "bench-campaigns")
+    client = None if redis_url else StandInClient(port=port)
+    cache = QueryCache(512 * 1024 * 1024, backend=RedisBackend(redis_url, client=client))
+
+    computed = 0
+    start = time.perf_counter()
+    for by, measures in QUERIES:
+        def compute(by=by, measures=measures):
+            nonlocal computed
+            computed += 1
+            return campaigns.groupby(by, observed=True)[measures].sum().reset_index()
+        cache.get_or_compute(query_key("bench-campaigns", 'aggregate', by, measures, agg='sum'), compute)
+    results[replica] = (computed, time.perf_counter() - start, cache.backend.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--redis-url", default=None, help="Real Redis server (default: local stand-in)")
+    args = parser.parse_args()
+
+    port = None
+    if args.redis_url is None:
+        server = StandInServer().start()
+        port = server.port
+    else:
+        import redis
+        redis.Redis.from_url(args.redis_url).flushdb()
+
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.dict()
+
+        def launch(replicas):
+            processes = [
+                context.Process(target=run_replica, args=(replica, args.rows, args.redis_url, port, results))
+                for replica in replicas
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                if process.exitcode:
+                    sys.exit(f"replica process failed with exit code {process.exitcode}")
+
+        launch([0])
+        launch(range(1, args.replicas))
+        results = dict(results)
+
+    if port is not None:
+        print(f"Shared entries on the stand-in: {StandInClient(port=port).dbsize()}")
+    print(f"{'replica':<9}{'computed':>10}{'seconds':>10}  backend stats")
+    for replica in sorted(results):
+        computed, seconds, stats = results[replica]
+        print(f"{replica:<9}{computed:>10}{seconds:>10.3f}  {stats}")
+
+    recomputed = sum(results[replica][0] for replica in results if replica > 0)
+    if recomputed:
+        print(f"FAILED: later replicas recomputed {recomputed} result(s)")
+        sys.exit(1)
+    print(f"OK: {len(QUERIES)} aggregations computed once, served to {args.replicas} replicas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Shared Frame Memory Benchmark
+=============================
+Starts N worker processes that each load the same campaign-shaped dataset,
+either as a private copy (read from Parquet, as before) or memory-mapped from
+one published Arrow IPC file (utils/shared_frames.py), and reports the memory
+the dataset adds per host. The shared file is published once before the
+workers start, as the first server process would.
+
+Memory is measured as PSS (proportional set size, Linux only): pages shared
+by several processes are split between them, so the sum over the workers is
+the physical memory actually used. The /dev/shm file itself is counted once.
+
+Usage:
+    python benchmarks/bench_shared_frames.py [--rows 5000000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "utils"))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+from bench_cache_keys import make_campaigns  # noqa: E402
+
+
+def pss_bytes():
+    """Proportional set size of this process"""
+    with open("/proc/self/smaps_rollup") as handle:
+        for line in handle:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("no Pss line in smaps_rollup")
+
+
+def worker(mode, parquet_path, name, barrier, results, index):
+    import pandas as pd
+    from shared_frames import load_shared_frame
+
+    before = pss_bytes()
+    if mode == "private":
+        frame = pd.read_parquet(parquet_path)
+    else:
+        frame, _ = load_shared_frame(name, lambda: (pd.read_parquet(parquet_path), {}))
+    # Touch every column so all pages are resident
+    frame.select_dtypes("number").sum()
+    frame['channel'].cat.codes.sum()
+    barrier.wait()  # every worker has its frame: shared pages are now split N ways
+    results[index] = pss_bytes() - before
+    barrier.wait()  # stay alive until all have measured
+
+
+def run(mode, workers, parquet_path, name):
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.dict()
+        barrier = context.Barrier(workers)
+        processes = [
+            context.Process(target=worker, args=(mode, parquet_path, name, barrier, results, i))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return sum(results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    import pandas as pd
+    import shared_frames
+
+    with tempfile.TemporaryDirectory() as folder:
+        parquet_path = Path(folder) / "campaigns.parquet"
+        frame = make_campaigns(args.rows)
+        frame.to_parquet(parquet_path)
+        print(f"Dataset: {args.rows:,} rows, {frame.memory_usage(deep=True).sum() / 2**20:.0f} MB in memory")
+        del frame
+
+        name = shared_frames.frame_name("bench", "campaigns", args.rows)
+        published = shared_frames.shared_frames_dir() / f"{name}.arrow"
+        # Publish once up front, as the first server process would
+        shared_frames.load_shared_frame(name, lambda: (pd.read_parquet(parquet_path), {}))
+        print(f"{'workers':<9}{'private MB':>12}{'shared MB':>12}")
+        try:
+            for workers in args.workers:
+                private = run("private", workers, parquet_path, name)
+                shared = run("shared", workers, parquet_path, name)
+                print(f"{workers:<9}{private / 2**20:>12.0f}{shared / 2**20:>12.0f}")
+        finally:
+            for path in (published, published.with_suffix(".json")):
+                path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
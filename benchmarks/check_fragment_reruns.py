@@ -0,0 +1,161 @@
+"""
+Fragment Rerun Check
+====================
+Starts the dashboard with `streamlit run`, connects over its websocket the
+way a browser does, and changes one section widget twice: once as a whole
+script rerun (what every widget did before sections became fragments) and
+once as the fragment rerun the browser now sends (utils/fragments.py).
+
+For both it reports which page sections ran (from the section metrics log,
+utils/section_metrics.py), how many elements and bytes the server sent and
+how long the rerun took. Exits non-zero if the fragment rerun ran any
+section other than the one the widget belongs to.
+
+Background cache warming is switched off so it does not compete with the
+measured reruns.
+
+Usage:
+    python benchmarks/check_fragment_reruns.py [--label "Aggregation Level"] [--value Weekly] [--port 8599]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def wait_healthy(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"server on port {port} did not become healthy")
+
+
+async def rerun(connection, widget_states=None, fragment_id=""):
+    """
+    Request a script (or fragment) run and read messages until it finishes.
+
+    Returns:
+        dict: seconds, bytes received, elements sent and the selectbox
+        elements seen, as {label: (widget id, fragment id)}
+    """
+    message = BackMsg()
+    message.rerun_script.query_string = ""
+    message.rerun_script.page_script_hash = ""
+    message.rerun_script.fragment_id = fragment_id
+    for state in widget_states or ():
+        message.rerun_script.widget_states.widgets.append(state)
+
+    start = time.perf_counter()
+    await connection.send(message.SerializeToString())
+    received, elements, selectboxes = 0, 0, {}
+    while True:
+        raw = await connection.recv()
+        received += len(raw)
+        forward = ForwardMsg()
+        forward.ParseFromString(raw)
+        kind = forward.WhichOneof('type')
+        if kind == 'delta':
+            elements += 1
+            element = forward.delta.new_element
+            if element.WhichOneof('type') == 'selectbox':
+                selectboxes[element.selectbox.label] = (element.selectbox.id, forward.delta.fragment_id)
+        elif kind == 'script_finished':
+            return {
+                'seconds': time.perf_counter() - start,
+                'bytes': received,
+                'elements': elements,
+                'selectboxes': selectboxes,
+            }
+
+
+def sections_since(log_path, offset):
+    """Section names logged after byte `offset`, and the new offset"""
+    with open(log_path, encoding="utf-8") as handle:
+        handle.seek(offset)
+        names = [json.loads(line)['section'] for line in handle if line.strip()]
+        return names, handle.tell()
+
+
+async def measure(port, log_path, label, value):
+    async with connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as connection:
+        first = await rerun(connection)
+        if label not in first['selectboxes']:
+            sys.exit(f"no selectbox labelled {label!r} on the default page: {sorted(first['selectboxes'])}")
+        widget_id, fragment_id = first['selectboxes'][label]
+        if not fragment_id:
+            sys.exit(f"selectbox {label!r} is not inside a fragment")
+        _, offset = sections_since(log_path, 0)
+
+        state = WidgetState(id=widget_id, string_value=value)
+
+        results = {}
+        for mode, fragment in (("full rerun", ""), ("fragment rerun", fragment_id)):
+            result = await rerun(connection, [state], fragment)
+            result['sections'], offset = sections_since(log_path, offset)
+            results[mode] = result
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--label", default="Aggregation Level", help="Selectbox on the default page to change")
+    parser.add_argument("--value", default="Weekly")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        log_path = Path(folder) / "sections.jsonl"
+        log_path.touch()
+        env = dict(
+            os.environ,
+            NOVAMART_SECTION_METRICS="1",
+            NOVAMART_SECTION_METRICS_LOG=str(log_path),
+            NOVAMART_WARM_CACHE="0",
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(ROOT / "app.py"),
+             "--server.headless", "true", "--server.port", str(args.port),
+             "--browser.gatherUsageStats", "false"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_healthy(args.port, args.timeout)
+            results = asyncio.run(asyncio.wait_for(measure(args.port, log_path, args.label, args.value), args.timeout))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'':<16}{'seconds':>9}{'elements':>10}{'KB':>9}  sections")
+    for mode, result in results.items():
+        print(f"{mode:<16}{result['seconds']:>9.3f}{result['elements']:>10}"
+              f"{result['bytes'] / 1024:>9.1f}  {', '.join(result['sections'])}")
+
+    fragment_sections = results["fragment rerun"]['sections']
+    if len(fragment_sections) != 1:
+        print(f"FAILED: the fragment rerun ran {len(fragment_sections)} sections")
+        sys.exit(1)
+    print(f"OK: changing {args.label!r} reran only '{fragment_sections[0]}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Startup Budget Check
+====================
+Cold-starts the dashboard in a fresh interpreter with the startup profiler
+on (utils/startup_profile.py), renders every page once through Streamlit's
+AppTest harness, and compares the profiler's JSON report with a time budget.
+Exits non-zero when any budget is exceeded, so a slow new dependency or
+page module is caught before deploy.
+
+Budget file keys (seconds; see benchmarks/startup_budget.json):
+    imports_total_seconds        all timed imports together
+    module_cumulative_seconds    any single module, including what it imports
+    datasets_total_seconds       all dataset loads together
+    time_to_first_chart_seconds  process start -> first chart on screen
+    page_first_chart_seconds     page render start -> its first chart, per
+                                 sidebar label ("default" for the others)
+
+Background cache warming is switched off for the run so it does not compete
+with the measured requests.
+
+Usage:
+    python benchmarks/check_startup_budget.py [--budget benchmarks/startup_budget.json] [--report startup.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_app(report_path, timeout):
+    """Child process: render every page once, the report is written by app.py"""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, str(ROOT / "utils"))
+    from pages import PAGES
+
+    app = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout)
+    app.run()
+    for label in list(PAGES)[1:]:
+        app.sidebar.radio[0].set_value(label).run()
+
+
+def check(report, budget):
+    """List of (what, seconds, limit) for every exceeded budget"""
+    failures = []
+
+    def over(what, seconds, limit):
+        if limit is not None and seconds is not None and seconds > limit:
+            failures.append((what, seconds, limit))
+
+    over("imports (total)", report['imports']['total_seconds'], budget.get('imports_total_seconds'))
+    for module in report['imports']['modules']:
+        over(f"import {module['name']}", module['cumulative'], budget.get('module_cumulative_seconds'))
+    over("datasets (total)", report['datasets']['total_seconds'], budget.get('datasets_total_seconds'))
+    over("time to first chart", report['time_to_first_chart_seconds'], budget.get('time_to_first_chart_seconds'))
+    page_budget = budget.get('page_first_chart_seconds', {})
+    for page, seconds in report['page_first_chart_seconds'].items():
+        over(f"first chart: {page}", seconds, page_budget.get(page, page_budget.get('default')))
+    return failures
+
+
+def summarize(report):
+    imports = report['imports']
+    print(f"Imports: {imports['total_seconds']:.2f}s over {imports['module_count']} modules; slowest:")
+    for module in imports['modules'][:10]:
+        print(f"  {module['name']:<40}{module['cumulative']:>8.3f}s  (self {module['self']:.3f}s)")
+    datasets = report['datasets']
+    print(f"Datasets: {datasets['total_seconds']:.2f}s")
+    for key, seconds in sorted(datasets['seconds'].items(), key=lambda item: -item[1]):
+        print(f"  {key:<40}{seconds:>8.3f}s")
+    first = report['time_to_first_chart_seconds']
+    print(f"Time to first chart: {first:.2f}s" if first is not None else "Time to first chart: no chart rendered")
+    for page, seconds in report['page_first_chart_seconds'].items():
+        print(f"  {page:<40}{seconds:>8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", default=str(Path(__file__).resolve().parent / "startup_budget.json"))
+    parser.add_argument("--report", default=None, help="Where to keep the JSON report (default: temporary)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_app(args.report, args.timeout)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        report_path = Path(args.report or Path(folder) / "startup_profile.json")
+        env = dict(
+            os.environ,
+            NOVAMART_PROFILE_STARTUP="1",
+            NOVAMART_STARTUP_REPORT=str(report_path),
+            NOVAMART_WARM_CACHE="0",
+        )
+        child = subprocess.run(
+            [sys.executable, __file__, "--child", "--report", str(report_path), "--timeout", str(args.timeout)],
+            env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if child.returncode or not report_path.exists():
+            print(child.stderr[-4000:])
+            sys.exit(f"App run failed (exit code {child.returncode})")
+        report = json.loads(report_path.read_text())
+
+    summarize(report)
+    failures = check(report, json.loads(Path(args.budget).read_text()))
+    if failures:
+        print()
+        for what, seconds, limit in failures:
+            print(f"OVER BUDGET: {what}: {seconds:.2f}s > {limit:.2f}s")
+        sys.exit(1)
+    print()
+    print("OK: within startup budget")
+
+
+if __name__ == "__main__":
+    main()
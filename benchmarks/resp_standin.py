@@ -0,0 +1,175 @@
+"""
+Redis Stand-In
+==============
+Minimal in-memory server and client speaking the Redis protocol (RESP), so
+the shared cache backend can be exercised without a Redis installation.
+
+Only the commands RedisBackend uses are supported (GET, SET with EX, plus
+PING, DEL, DBSIZE and FLUSHDB for the benchmarks). Expiry is honoured on
+read. Not meant for production use.
+
+Usage:
+    python benchmarks/resp_standin.py [--port 6399]
+"""
+
+import argparse
+import socket
+import socketserver
+import threading
+import time
+
+
+def _read_line(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    return line[:-2]
+
+
+def _read_reply(stream):
+    """Parse one RESP value from a buffered socket stream"""
+    line = _read_line(stream)
+    prefix, body = line[:1], line[1:]
+    if prefix == b"+":
+        return body.decode()
+    if prefix == b"-":
+        raise RuntimeError(body.decode())
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        return [_read_reply(stream) for _ in range(int(body))]
+    raise RuntimeError(f"Unexpected RESP prefix {prefix!r}")
+
+
+def _encode_command(*args):
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            try:
+                command = _read_reply(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            name = command[0].upper()
+            with self.server.lock:
+                reply = self._execute(store, name, command[1:])
+            self.wfile.write(reply)
+
+    def _execute(self, store, name, args):
+        now = time.monotonic()
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"GET":
+            entry = store.get(args[0])
+            if entry is None or (entry[1] is not None and entry[1] <= now):
+                store.pop(args[0], None)
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+        if name == b"SET":
+            expires = None
+            if len(args) >= 4 and args[2].upper() == b"EX":
+                expires = now + int(args[3])
+            store[args[0]] = (args[1], expires)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            return b":%d\r\n" % sum(store.pop(key, None) is not None for key in args)
+        if name == b"DBSIZE":
+            return b":%d\r\n" % len(store)
+        if name == b"FLUSHDB":
+            store.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server keeping everything in one dict"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.store = {}
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """Serve on a daemon thread; returns self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+class StandInClient:
+    """
+    Blocking RESP client with the subset of the redis-py API RedisBackend
+    uses (`get`, `set(..., ex=)`), safe to share between threads.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, timeout=5):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._stream = self._sock.makefile("rb")
+        self._lock = threading.Lock()
+
+    def execute(self, *args):
+        with self._lock:
+            self._sock.sendall(_encode_command(*args))
+            return _read_reply(self._stream)
+
+    def get(self, name):
+        return self.execute("GET", name)
+
+    def set(self, name, value, ex=None):
+        if ex is None:
+            return self.execute("SET", name, value)
+        return self.execute("SET", name, value, "EX", ex)
+
+    def dbsize(self):
+        return self.execute("DBSIZE")
+
+    def flushdb(self):
+        return self.execute("FLUSHDB")
+
+    def close(self):
+        self._stream.close()
+        self._sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args()
+    server = StandInServer(args.host, args.port)
+    print(f"Redis stand-in listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ Utilities and helper modules for the dashboard.
 """
 
 from .data_loader import (
+    DatasetLoadError,
     load_all_data,
+    load_datasets,
     preprocess_campaign_data,
     preprocess_customer_data,
     get_summary_stats,
@@ -15,7 +17,9 @@ from .data_loader import (
 )
 
 __all__ = [
+    'DatasetLoadError',
     'load_all_data',
+    'load_datasets',
     'preprocess_campaign_data',
     'preprocess_customer_data',
     'get_summary_stats',
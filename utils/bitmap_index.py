@@ -0,0 +1,215 @@
+"""
+Bitmap Index
+============
+One packed bitset per value of each low-cardinality dimension (channel,
+region, segment, ...), stored as little-endian uint64 words.
+
+Widget filters become word-wise OR (values of one column) and AND (across
+columns) operations over n/64 words. On date-sorted frames the operations
+can be restricted to the words covering a date window, which keeps combining
+several selections under a millisecond even at tens of millions of rows.
+Rows are only materialised at the end, from the set bits of the combined
+selection.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from dimension_catalog import dimension_columns
+from range_index import predicate_mask
+from versioning import derive_version, version_of
+
+_WORD = np.dtype('<u8')
+
+
+def _pack(bits):
+    """Pack a boolean array into little-endian uint64 words"""
+    packed = np.packbits(bits, bitorder='little')
+    pad = -len(packed) % _WORD.itemsize
+    if pad:
+        packed = np.concatenate([packed, np.zeros(pad, dtype=np.uint8)])
+    return packed.view(_WORD)
+
+
+class Selection:
+    """
+    A set of row positions, held as a bitset.
+
+    A selection may cover only a window of the indexed rows: `words[0]` then
+    holds rows first_word * 64 onwards. Combine selections over the same
+    window with `&` and `|`; turn them into rows with `positions` or `take`.
+    """
+
+    def __init__(self, words, n_rows, first_word=0):
+        self.words = words
+        self.n_rows = n_rows
+        self.first_word = first_word
+
+    @classmethod
+    def empty(cls, n_rows, first_word=0, n_words=None):
+        n_words = (n_rows + 63) // 64 - first_word if n_words is None else n_words
+        return cls(np.zeros(n_words, dtype=_WORD), n_rows, first_word)
+
+    def __and__(self, other):
+        return Selection(self.words & other.words, self.n_rows, self.first_word)
+
+    def __or__(self, other):
+        return Selection(self.words | other.words, self.n_rows, self.first_word)
+
+    def __iand__(self, other):
+        np.bitwise_and(self.words, other.words, out=self.words)
+        return self
+
+    def count(self):
+        """Number of selected rows"""
+        if hasattr(np, 'bitwise_count'):
+            return int(np.bitwise_count(self.words).sum())
+        return int(np.unpackbits(self.words.view(np.uint8)).sum())
+
+    def positions(self, lo=0, hi=None):
+        """
+        Sorted positions of the selected rows within [lo, hi).
+
+        Only the words covering the range are scanned and only non-zero words
+        are unpacked, so the cost is O((hi - lo) / 64 + output).
+        """
+        hi = self.n_rows if hi is None else min(hi, self.n_rows)
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64)
+        first = max(lo >> 6, self.first_word)
+        words = self.words[first - self.first_word:((hi + 63) >> 6) - self.first_word]
+        nonzero = np.flatnonzero(words)
+        bits = np.unpackbits(words[nonzero].view(np.uint8), bitorder='little').reshape(-1, 64)
+        word_idx, bit_idx = np.nonzero(bits)
+        positions = (nonzero[word_idx] + first) * 64 + bit_idx
+        return positions[(positions >= lo) & (positions < hi)]
+
+    def take(self, frame, lo=0, hi=None):
+        """Rows of `frame` (the frame the index was built on) in the selection"""
+        return frame.iloc[self.positions(lo, hi)]
+
+
+class BitmapIndex:
+    """
+    Per-value bitsets for the low-cardinality dimensions of one frame.
+
+    Attributes:
+        n_rows: Number of rows in the indexed frame
+        columns: Indexed column names
+    """
+
+    def __init__(self, n_rows, bitmaps):
+        self.n_rows = n_rows
+        self._bitmaps = bitmaps
+
+    @classmethod
+    def from_frame(cls, frame, columns=None, max_cardinality=None):
+        """
+        Index a frame's dimension columns.
+
+        Args:
+            frame: DataFrame to index (row positions refer to this frame)
+            columns: Columns to index (defaults to its catalogued dimensions)
+            max_cardinality: Skip columns with more distinct values than this
+                (defaults to config.BITMAP_MAX_CARDINALITY)
+        """
+        max_cardinality = max_cardinality or config.BITMAP_MAX_CARDINALITY
+        bitmaps = {}
+        for col in columns if columns is not None else dimension_columns(frame):
+            codes, uniques = pd.factorize(frame[col])
+            if len(uniques) > max_cardinality:
+                continue
+            bitmaps[col] = {value: _pack(codes == code) for code, value in enumerate(uniques.tolist())}
+        return cls(len(frame), bitmaps)
+
+    @property
+    def columns(self):
+        return list(self._bitmaps)
+
+    def __contains__(self, column):
+        return column in self._bitmaps
+
+    def _window(self, lo, hi):
+        """Word range [first, last) covering rows [lo, hi)"""
+        hi = self.n_rows if hi is None else min(hi, self.n_rows)
+        return lo >> 6, (max(hi, lo) + 63) >> 6
+
+    def equals(self, column, value, lo=0, hi=None):
+        """Rows where column == value (restricted to the rows [lo, hi))"""
+        return self.isin(column, [value], lo, hi)
+
+    def isin(self, column, values, lo=0, hi=None):
+        """
+        Rows where column is any of `values` - the OR of the value bitsets,
+        computed only over the words covering rows [lo, hi).
+        """
+        first, last = self._window(lo, hi)
+        bitmaps = self._bitmaps[column]
+        present = [bitmaps[v] for v in values if v in bitmaps]
+        if not present:
+            return Selection.empty(self.n_rows, first, last - first)
+        words = present[0][first:last].copy()
+        for bitmap in present[1:]:
+            np.bitwise_or(words, bitmap[first:last], out=words)
+        return Selection(words, self.n_rows, first)
+
+    def select(self, filters, lo=0, hi=None):
+        """
+        Split filters into a bitset selection and the predicates left over.
+
+        Args:
+            filters: dict of column -> value or list of values; None values
+                and empty lists are ignored
+            lo, hi: Optional row window the selection is restricted to
+
+        Returns:
+            tuple: (Selection or None if no indexed filter applies,
+            dict of filters on columns that are not indexed)
+        """
+        selection, remaining = None, {}
+        for col, value in (filters or {}).items():
+            if value is None:
+                continue
+            is_list = isinstance(value, (list, tuple, set, frozenset))
+            if is_list and not value:
+                continue
+            if col not in self._bitmaps:
+                remaining[col] = value
+                continue
+            part = self.isin(col, value if is_list else [value], lo, hi)
+            if selection is None:
+                selection = part
+            else:
+                selection &= part
+        return selection, remaining
+
+
+def select_rows(frame, index, filters, lo=0, hi=None):
+    """
+    Rows of frame[lo:hi] matching `filters`.
+
+    Indexed columns are resolved through the bitmap index; any other
+    predicate is evaluated only over the rows already selected. Without
+    applicable filters the positional slice itself is returned (no copy).
+    """
+    selection, remaining = index.select(filters, lo, hi)
+    rows = frame.iloc[lo:hi] if selection is None else selection.take(frame, lo, hi)
+    mask = predicate_mask(rows, remaining)
+    return rows if mask is None else rows[mask]
+
+
+@st.cache_resource(show_spinner=False, max_entries=config.DERIVED_CACHE_SIZE)
+def _build_index(version, _frame):
+    return BitmapIndex.from_frame(_frame)
+
+
+def get_bitmap_index(frame):
+    """Bitmap index for a frame, built once per dataset version"""
+    return _build_index(derive_version(version_of(frame), "bitmaps"), frame)
+
+
+def filter_rows(frame, filters):
+    """Rows of a versioned frame matching `filters`, via its bitmap index"""
+    return select_rows(frame, get_bitmap_index(frame), filters)
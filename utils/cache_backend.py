@@ -0,0 +1,339 @@
+"""
+Result Cache Backends
+=====================
+Storage interface behind the query cache (query_cache.py), with an
+in-process implementation and a networked key-value implementation that lets
+several dashboard replicas share computed aggregates and parsed datasets.
+
+- MemoryBackend: thread-safe LRU with a byte budget; the first tier of every
+  query cache, private to one process
+- DiskCache (disk_cache.py): local folder that survives restarts
+- RedisBackend: Redis (or any server speaking its protocol), shared by every
+  replica pointed at it
+
+Values leave the process without pickle: DataFrames and Series as Parquet,
+NumPy arrays (and tuples of arrays and scalars, e.g. ROC curves) as `.npz`
+payloads loaded with allow_pickle=False, and small plain values as JSON.
+Entry names are a hash of the query key plus the code version, so results
+computed by a different build are never served.
+"""
+
+import abc
+import hashlib
+import io
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_SOURCE_ROOT = Path(__file__).resolve().parent
+_UNNAMED = "__value__"
+_code_version = None
+
+
+def code_version():
+    """
+    Identifier of the running code, folded into every shared entry name.
+
+    NOVAMART_CODE_VERSION (e.g. the deployed commit) wins; otherwise a hash
+    of the dashboard's Python sources is used.
+    """
+    global _code_version
+    if _code_version is None:
+        if config.CODE_VERSION:
+            _code_version = config.CODE_VERSION
+        else:
+            digest = hashlib.blake2b(digest_size=8)
+            for path in sorted(_SOURCE_ROOT.rglob("*.py")):
+                digest.update(path.relative_to(_SOURCE_ROOT).as_posix().encode())
+                digest.update(path.read_bytes())
+            _code_version = digest.hexdigest()
+    return _code_version
+
+
+def entry_name(key):
+    """Stable hex name of a cache key for the current code version"""
+    return hashlib.blake2b(f"{code_version()}|{key!r}".encode(), digest_size=16).hexdigest()
+
+
+# =============================================================================
+# SERIALISATION
+# =============================================================================
+def encode_value(value):
+    """
+    Serialise a result without pickle.
+
+    Returns:
+        tuple: (kind, payload bytes), or None when the value has no
+        pickle-free encoding (it is then only cached in memory)
+    """
+    buffer = io.BytesIO()
+    if isinstance(value, pd.DataFrame):
+        if not all(isinstance(col, str) for col in value.columns):
+            return None
+        value.to_parquet(buffer)
+        return "frame", buffer.getvalue()
+    if isinstance(value, pd.Series):
+        name = value.name if isinstance(value.name, str) else _UNNAMED
+        value.to_frame(name=name).to_parquet(buffer)
+        return "series", buffer.getvalue()
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return None
+        np.savez(buffer, value)
+        return "array", buffer.getvalue()
+    if isinstance(value, tuple) and all(isinstance(item, (np.ndarray, np.generic, int, float)) for item in value):
+        arrays = [np.asarray(item) for item in value]
+        if any(array.dtype == object for array in arrays):
+            return None
+        np.savez(buffer, *arrays)
+        return "tuple", buffer.getvalue()
+    try:
+        return "json", json.dumps(value).encode()
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_value(kind, payload):
+    """Inverse of encode_value"""
+    if kind == "frame":
+        return pd.read_parquet(io.BytesIO(payload))
+    if kind == "series":
+        series = pd.read_parquet(io.BytesIO(payload)).iloc[:, 0]
+        return series.rename(None) if series.name == _UNNAMED else series
+    if kind in ("array", "tuple"):
+        with np.load(io.BytesIO(payload), allow_pickle=False) as npz:
+            arrays = [npz[f"arr_{i}"] for i in range(len(npz.files))]
+        if kind == "array":
+            return arrays[0]
+        return tuple(array[()] if array.ndim == 0 else array for array in arrays)
+    if kind == "json":
+        return json.loads(payload)
+    raise ValueError(f"Unknown cache entry kind: {kind!r}")
+
+
+def result_size(value):
+    """Approximate in-memory size of a cached result in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+class CacheBackend(abc.ABC):
+    """
+    Key -> result store used by the query cache.
+
+    Implementations must be safe to call from several threads, and must
+    treat storage failures as misses (a broken cache only costs speed).
+
+    Attributes:
+        name: Short backend name used in stats and logs
+        remote: True when the store is shared with other hosts, so that
+            caching parsed datasets in it saves work for other replicas
+    """
+
+    name = "backend"
+    remote = False
+
+    @abc.abstractmethod
+    def get(self, key):
+        """
+        Look up a key.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+
+    @abc.abstractmethod
+    def put(self, key, value):
+        """Store a result (values the backend cannot store are skipped)"""
+
+    def stats(self):
+        """Counters for monitoring"""
+        return {'backend': self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Thread-safe in-process LRU with a byte budget.
+
+    Values are stored as-is (not copied), so they must be treated as
+    read-only by everyone who receives them.
+
+    Attributes:
+        max_bytes: Memory budget; results larger than this are not cached
+        hits, misses, evictions: Running counters
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Look up a key, marking it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def peek(self, key):
+        """Like get, without touching the counters or the LRU order"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return (False, None) if entry is None else (True, entry[0])
+
+    def put(self, key, value):
+        """Store a result, evicting least recently used entries to fit"""
+        size = result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class RedisBackend(CacheBackend):
+    """
+    Networked key-value backend speaking the Redis protocol.
+
+    Each entry is one string value - the encoding kind, a newline, then the
+    payload - written with an expiry, so the server's own eviction policy
+    (e.g. `maxmemory-policy allkeys-lru`) bounds its size. When the server
+    is unreachable, lookups are skipped for `retry_seconds` instead of
+    paying a connection timeout on every query.
+
+    Attributes:
+        ttl_seconds: Expiry of every entry
+        prefix: Key prefix, so several dashboards can share one server
+        hits, misses, errors: Running counters
+    """
+
+    name = "redis"
+    remote = True
+
+    def __init__(self, url=None, ttl_seconds=None, prefix=None, client=None, retry_seconds=30):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("The redis package is required for the redis cache backend")
+            client = redis.Redis.from_url(url or config.REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+        self.client = client
+        self.ttl_seconds = int(ttl_seconds if ttl_seconds is not None else config.REDIS_TTL_HOURS * 3600)
+        self.prefix = config.REDIS_KEY_PREFIX if prefix is None else prefix
+        self.retry_seconds = retry_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._down_until = 0.0
+
+    def _available(self):
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, action, error):
+        self.errors += 1
+        if self._available():
+            logger.warning("Redis cache %s failed, bypassing it for %ds: %s", action, self.retry_seconds, error)
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def get(self, key):
+        if not self._available():
+            self.misses += 1
+            return False, None
+        try:
+            blob = self.client.get(self.prefix + entry_name(key))
+        except Exception as e:  # connection errors (redis.RedisError)
+            self._failed("read", e)
+            self.misses += 1
+            return False, None
+        if blob is None:
+            self.misses += 1
+            return False, None
+        try:
+            kind, _, payload = bytes(blob).partition(b"\n")
+            value = decode_value(kind.decode(), payload)
+        except Exception as e:  # written by an incompatible build, or truncated
+            logger.warning("Discarding unreadable shared cache entry: %s", e)
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        if not self._available():
+            return
+        try:
+            encoded = encode_value(value)
+        except Exception as e:  # e.g. a column type Parquet cannot store
+            logger.warning("Could not serialise cache entry: %s", e)
+            return
+        if encoded is None:
+            return
+        kind, payload = encoded
+        try:
+            self.client.set(self.prefix + entry_name(key), kind.encode() + b"\n" + payload, ex=self.ttl_seconds)
+        except Exception as e:  # connection errors, or a value over the server's limit
+            self._failed("write", e)
+
+    def stats(self):
+        return {'backend': self.name, 'hits': self.hits, 'misses': self.misses, 'errors': self.errors}
@@ -0,0 +1,131 @@
+"""
+Cache Warmer
+============
+Background thread that fills the shared caches before users arrive.
+
+At startup, and again whenever a source file in the data folder changes, the
+warmer loads every dataset (parse/snapshot, schema, catalog) and then calls
+each page module's `warm(data)` hook, which precomputes the aggregations the
+page shows in its default widget state. Pages are warmed in the order given
+by config.WARM_PAGES with at most config.WARM_WORKERS running at once, so the
+first real request of every page is served from warm caches.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+
+import config
+from data_loader import DatasetLoadError, data_fingerprint
+from data_store import DataStore
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Warms the dataset and aggregation caches for one data folder.
+
+    Attributes:
+        data_path: Folder containing the source CSV files
+        pages: Page module names, in warming order
+        runs: Number of completed warming passes
+        last_timings: Seconds spent per step ('datasets' and each page) in
+            the most recent pass
+        last_errors: Error message per step that failed in the most recent pass
+    """
+
+    def __init__(self, data_path, pages=None, max_workers=None, poll_seconds=None):
+        self.data_path = Path(data_path)
+        self.pages = list(pages if pages is not None else config.WARM_PAGES)
+        self.max_workers = max(1, max_workers or config.WARM_WORKERS)
+        self.poll_seconds = config.WARM_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.runs = 0
+        self.last_timings = {}
+        self.last_errors = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start warming (and watching the data folder) on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="novamart-cache-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        fingerprint = None
+        while not self._stop.is_set():
+            current = data_fingerprint(self.data_path)
+            if current != fingerprint:
+                fingerprint = current
+                try:
+                    self.warm()
+                except Exception:  # never let the warmer thread die silently
+                    logger.exception("Cache warming failed")
+            if self.poll_seconds <= 0:
+                break
+            self._stop.wait(self.poll_seconds)
+
+    def warm(self):
+        """Run one warming pass: load all datasets, then warm every page"""
+        started = time.perf_counter()
+        timings, errors = {}, {}
+        data = DataStore(self.data_path)
+
+        step_start = time.perf_counter()
+        for key, error in data.prefetch().items():
+            errors[key] = str(error)
+        timings['datasets'] = time.perf_counter() - step_start
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="novamart-warm") as pool:
+            # The pool starts tasks in submission order, so WARM_PAGES is the priority
+            futures = {name: pool.submit(_warm_page, name, data) for name in self.pages}
+            for name, future in futures.items():
+                try:
+                    timings[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+                    logger.warning("Could not warm page %s: %s", name, e)
+
+        self.last_timings, self.last_errors = timings, errors
+        self.runs += 1
+        logger.info("Cache warm-up #%d finished in %.2fs", self.runs, time.perf_counter() - started)
+
+
+def _warm_page(name, data):
+    """Call a page module's warm() hook; returns the seconds it took"""
+    started = time.perf_counter()
+    module = importlib.import_module(f"pages.{name}")
+    warm = getattr(module, 'warm', None)
+    if warm is not None:
+        try:
+            warm(data)
+        except DatasetLoadError as e:
+            raise RuntimeError(f"dataset '{e.key}' unavailable: {e.cause}") from e
+    return time.perf_counter() - started
+
+
+@st.cache_resource(show_spinner=False)
+def _start_warmer(data_path):
+    return CacheWarmer(data_path).start()
+
+
+def start_cache_warmer(data_path):
+    """
+    Start the process-wide cache warmer for a data folder (once per process).
+
+    Returns:
+        CacheWarmer, or None when warming is disabled (NOVAMART_WARM_CACHE=0)
+    """
+    if not config.WARM_ENABLED:
+        return None
+    return _start_warmer(str(data_path))
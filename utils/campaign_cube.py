@@ -0,0 +1,193 @@
+"""
+Campaign OLAP Cube
+==================
+Pre-aggregated campaign measures at date x channel x region x campaign_type
+grain. Every campaign chart is answered from this cube, so page latency
+depends on the number of dimension cells rather than the number of raw rows.
+
+The cube's base table holds additive measures only (sums and row counts), so
+it can be rolled up to week, month, quarter or year and sliced on any
+dimension or calendar attribute without touching the raw campaign rows.
+Ratio metrics (ROAS, CTR, CPA, ...) are derived after the roll-up from the
+summed components, using the definitions in metrics.py. Roll-ups of a
+versioned cube are served from the shared query cache (query_cache.py).
+
+The base table is sorted by date, so date ranges (including a `year` filter)
+are located by binary search; dimension filters are resolved through a
+bitmap index over the base cells.
+"""
+
+import pandas as pd
+import streamlit as st
+
+import config
+from bitmap_index import BitmapIndex, select_rows
+from date_dimension import build_calendar
+from metrics import METRICS, add_metrics, required_components
+from query_cache import cached_query, query_key
+from single_flight import flight_group
+from range_index import DateRangeIndex, year_bounds
+from versioning import derive_version, version_of
+
+# Dimensions kept at base grain (in addition to `date`)
+CUBE_DIMENSIONS = ['channel', 'region', 'campaign_type']
+
+# Additive measures summed from the raw rows
+SUM_MEASURES = ['impressions', 'clicks', 'conversions', 'spend', 'revenue']
+
+# Number of raw campaign rows behind each cell (also additive)
+COUNT_MEASURE = 'rows'
+
+# Calendar attributes carried on the base table for slicing and grouping
+CALENDAR_ATTRIBUTES = ['year', 'quarter', 'month', 'week']
+
+# Roll-up grain -> calendar column holding the period start
+GRAINS = {
+    'day': 'date',
+    'week': 'week_start',
+    'month': 'month_start',
+    'quarter': 'quarter_start',
+    'year': 'year_start',
+}
+
+
+class CampaignCube:
+    """
+    Additive campaign measures at date x dimension grain.
+
+    Attributes:
+        base: DataFrame with one row per (date, dimensions...) cell, sorted by
+            date, holding the additive measures and calendar attributes
+        dimensions: Dimension columns present at base grain
+        measures: Additive measure columns available for roll-ups
+        calendar: Calendar dimension table for the cube's dates
+        version: Version token of the cube (None disables query caching)
+    """
+
+    def __init__(self, base, dimensions, measures, calendar, version=None):
+        self.base = base
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.calendar = calendar
+        self.version = version
+        self.dates = DateRangeIndex(base)
+        self.bitmaps = BitmapIndex.from_frame(base, columns=self.dimensions)
+
+    @classmethod
+    def from_campaigns(cls, campaigns, dimensions=None, version=None):
+        """Aggregate raw campaign rows into a cube"""
+        dimensions = [d for d in (dimensions or CUBE_DIMENSIONS) if d in campaigns.columns]
+        sum_measures = [m for m in SUM_MEASURES if m in campaigns.columns]
+        keys = ['date'] + dimensions
+
+        grouped = campaigns.groupby(keys, observed=True, sort=True)
+        base = grouped[sum_measures].sum()
+        base[COUNT_MEASURE] = grouped.size()
+        measures = sum_measures + [COUNT_MEASURE]
+        base = base.reset_index()
+
+        calendar = build_calendar(base['date'])
+        base = base.join(calendar[CALENDAR_ATTRIBUTES + list(GRAINS.values())[1:]], on='date')
+        return cls(base, dimensions, measures, calendar, version)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def slice(self, filters=None, start=None, end=None):
+        """
+        Restrict the base table to cells matching `filters`.
+
+        The date window (`start`/`end`, narrowed further by a single `year`
+        filter) is found by binary search and returned without copying when
+        nothing else is filtered; dimension filters are combined as bitsets
+        and only the selected cells inside the window are materialised.
+
+        Args:
+            filters: dict of column -> value or list of values; None values
+                and empty lists mean "no filter" for that column
+            start, end: Optional inclusive date bounds
+
+        Returns:
+            pd.DataFrame: Matching base cells
+        """
+        filters = dict(filters or {})
+        year = filters.get('year')
+        if year is not None and not isinstance(year, (list, tuple, set, frozenset)):
+            del filters['year']
+            year_start, year_end = year_bounds(year)
+            start = year_start if start is None else max(pd.Timestamp(start), year_start)
+            end = year_end if end is None else min(pd.Timestamp(end), year_end)
+        lo, hi = self.dates.bounds(start, end)
+        return select_rows(self.base, self.bitmaps, filters, lo, hi)
+
+    def supports(self, measure):
+        """True if a measure or registered metric can be served by the cube"""
+        return all(col in self.measures for col in required_components([measure]))
+
+    def rollup(self, by=(), grain=None, measures=None, filters=None, start=None, end=None):
+        """
+        Aggregate the cube.
+
+        Args:
+            by: Dimension or calendar attribute columns to group by
+            grain: Optional time grain ('day', 'week', 'month', 'quarter',
+                'year'); adds a `date` column holding each period's start
+            measures: Additive measures and/or registered metric keys to
+                return (defaults to all additive measures)
+            filters: Slice applied before aggregating (see `slice`)
+            start, end: Optional inclusive date bounds (see `slice`)
+
+        Returns:
+            pd.DataFrame: One row per group, sorted by the group keys
+            (shared through the query cache - do not modify in place)
+        """
+        measures = list(measures or self.measures)
+        return self._cached(
+            query_key(self.version, 'rollup', by, measures, filters, grain=grain, start=start, end=end),
+            lambda: self._rollup(list(by), grain, measures, filters, start, end),
+        )
+
+    def _rollup(self, by, grain, measures, filters, start, end):
+        components = required_components(measures)
+        cells = self.slice(filters, start, end)
+        keys = []
+        if grain is not None:
+            keys.append(GRAINS[grain])
+        keys.extend(by)
+
+        if not keys:
+            sums = cells[components].sum().to_frame().T
+        else:
+            sums = cells.groupby(keys, observed=True, sort=True)[components].sum().reset_index()
+            if grain is not None and GRAINS[grain] != 'date':
+                sums = sums.rename(columns={GRAINS[grain]: 'date'})
+                keys[0] = 'date'
+        return add_metrics(sums, measures)[keys + measures]
+
+    def total(self, measures=None, filters=None, start=None, end=None):
+        """Grand totals of measures/metrics over an optional slice, as a Series"""
+        measures = list(measures or self.measures)
+
+        def compute():
+            sums = self.slice(filters, start, end)[required_components(measures)].sum()
+            return pd.Series({m: METRICS[m].compute(sums) if m in METRICS else sums[m] for m in measures})
+
+        return self._cached(query_key(self.version, 'total', (), measures, filters, start=start, end=end), compute)
+
+    def _cached(self, key, compute):
+        return compute() if self.version is None else cached_query(key, compute)
+
+    def values(self, column):
+        """Sorted distinct values of a dimension or calendar attribute"""
+        return sorted(self.base[column].unique().tolist())
+
+
+@st.cache_resource(show_spinner=False, max_entries=config.DERIVED_CACHE_SIZE)
+def _build_cube(version, _campaigns):
+    return CampaignCube.from_campaigns(_campaigns, version=version)
+
+
+def get_campaign_cube(campaigns):
+    """Campaign cube for a campaign frame, built once per dataset version"""
+    version = derive_version(version_of(campaigns), "cube")
+    return flight_group('preprocess').do(version, lambda: _build_cube(version, campaigns))
@@ -0,0 +1,24 @@
+"""
+Chart Rendering
+===============
+Single entry point pages use to display Plotly figures, so cross-cutting
+concerns (the startup profiler, per-section metrics) hook in at one place.
+"""
+
+import time
+
+import streamlit as st
+
+import section_metrics
+import startup_profile
+
+
+def plotly_chart(fig, **kwargs):
+    """Display a Plotly figure (same arguments as st.plotly_chart)"""
+    # Sized up front so the serialisation for measuring is not charged to the chart
+    payload_bytes = len(fig.to_json()) if section_metrics.enabled() else 0
+    start = time.perf_counter()
+    result = st.plotly_chart(fig, **kwargs)
+    section_metrics.current_section().chart_sent(time.perf_counter() - start, payload_bytes)
+    startup_profile.chart_rendered()
+    return result
@@ -0,0 +1,157 @@
+"""
+Runtime Configuration
+=====================
+Central place for tunable settings. Every value can be overridden with an
+environment variable so deployments can adjust behaviour without code changes.
+"""
+
+import os
+from pathlib import Path
+
+
+def _env_path(name, default):
+    """Read a path from the environment, falling back to a default"""
+    value = os.environ.get(name)
+    return Path(value) if value else default
+
+
+def _env_int(name, default):
+    """Read an integer from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_list(name, default):
+    """Read a comma-separated list from the environment"""
+    value = os.environ.get(name)
+    if not value:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _env_bool(name, default):
+    """Read a boolean flag from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# =============================================================================
+# SNAPSHOT CACHE
+# =============================================================================
+# Parsed datasets are persisted as Parquet snapshots so CSV parsing is paid
+# once per data change. Leave SNAPSHOT_DIR unset to keep snapshots in a
+# `.snapshots/` folder next to the CSV files.
+SNAPSHOTS_ENABLED = _env_bool("NOVAMART_SNAPSHOTS", True)
+SNAPSHOT_DIR = _env_path("NOVAMART_SNAPSHOT_DIR", None)
+SNAPSHOT_COMPRESSION = os.environ.get("NOVAMART_SNAPSHOT_COMPRESSION", "zstd")
+
+# =============================================================================
+# SHARED DATASET FRAMES
+# =============================================================================
+# Typed datasets are published once per host as uncompressed Arrow IPC files
+# and memory-mapped read-only by every server process. Leave SHARED_FRAMES_DIR
+# unset to use /dev/shm (or the temp folder where there is none).
+SHARED_FRAMES_ENABLED = _env_bool("NOVAMART_SHARED_FRAMES", True)
+SHARED_FRAMES_DIR = _env_path("NOVAMART_SHARED_FRAMES_DIR", None)
+
+# =============================================================================
+# INGESTION
+# =============================================================================
+# Upper bound on the number of files parsed concurrently
+LOAD_WORKERS = _env_int("NOVAMART_LOAD_WORKERS", min(8, (os.cpu_count() or 1) + 4))
+
+# =============================================================================
+# FILTER INDEXES
+# =============================================================================
+# Columns with at most this many distinct values get one bitmap per value;
+# higher-cardinality columns are filtered with a regular mask instead
+BITMAP_MAX_CARDINALITY = _env_int("NOVAMART_BITMAP_MAX_CARDINALITY", 64)
+
+# String (non-categorical) columns with at most this many distinct values are
+# catalogued as dimensions, see dimension_catalog.py
+CATALOG_MAX_CARDINALITY = _env_int("NOVAMART_CATALOG_MAX_CARDINALITY", 64)
+
+# Number of filtered dataset views kept in memory for the global filters
+FILTERED_VIEW_CACHE_SIZE = _env_int("NOVAMART_FILTERED_VIEW_CACHE_SIZE", 32)
+
+# Number of structures of each kind derived per dataset version (campaign
+# cube, prefix sums, date and bitmap indexes, dimension catalog) kept in
+# memory: every cached filtered view plus the unfiltered datasets
+DERIVED_CACHE_SIZE = _env_int("NOVAMART_DERIVED_CACHE_SIZE", FILTERED_VIEW_CACHE_SIZE + 16)
+
+# =============================================================================
+# QUERY CACHE
+# =============================================================================
+# Memory budget (MB) for cached aggregation results shared by all sessions
+QUERY_CACHE_MAX_MB = _env_int("NOVAMART_QUERY_CACHE_MB", 256)
+
+# =============================================================================
+# FIGURE CACHE
+# =============================================================================
+# Memory budget (MB) for serialised chart figures shared by all sessions
+# (figure_cache.py); 0 disables the figure cache
+FIGURE_CACHE_MAX_MB = _env_int("NOVAMART_FIGURE_CACHE_MB", 64)
+
+# =============================================================================
+# CACHE WARMING
+# =============================================================================
+# A background thread loads every dataset and precomputes each page's
+# default-view aggregations at startup and whenever the data files change.
+WARM_ENABLED = _env_bool("NOVAMART_WARM_CACHE", True)
+# Pages are warmed in this order (module names under utils/pages)
+WARM_PAGES = _env_list("NOVAMART_WARM_PAGES", [
+    "executive_overview",
+    "campaign_analytics",
+    "customer_insights",
+    "product_performance",
+    "geographic_analysis",
+    "attribution_funnel",
+    "ml_model_evaluation",
+])
+# Maximum number of pages warmed concurrently
+WARM_WORKERS = _env_int("NOVAMART_WARM_WORKERS", 2)
+# How often (seconds) the data folder is checked for changes; 0 disables
+WARM_POLL_SECONDS = _env_int("NOVAMART_WARM_POLL_SECONDS", 30)
+
+# =============================================================================
+# SHARED RESULT CACHE
+# =============================================================================
+# Backend behind the in-memory query cache: "disk" (local folder, below),
+# "redis" (networked store shared by every replica) or "memory" (none)
+CACHE_BACKEND = os.environ.get("NOVAMART_CACHE_BACKEND", "disk").strip().lower()
+REDIS_URL = os.environ.get("NOVAMART_REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.environ.get("NOVAMART_REDIS_PREFIX", "novamart:")
+REDIS_TTL_HOURS = _env_int("NOVAMART_REDIS_TTL_HOURS", 24 * 7)
+# With a networked backend, parsed datasets are shared too, so only the
+# first replica parses each CSV
+SHARE_DATASETS = _env_bool("NOVAMART_SHARE_DATASETS", True)
+
+# With the disk backend, aggregation results are persisted on local disk so
+# they survive restarts and redeploys. Shared entries are tied to the code
+# version: set NOVAMART_CODE_VERSION (e.g. the deployed commit) or a hash of
+# the sources is used.
+DISK_CACHE_ENABLED = _env_bool("NOVAMART_DISK_CACHE", True)
+DISK_CACHE_DIR = _env_path("NOVAMART_DISK_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache" / "queries")
+DISK_CACHE_MAX_MB = _env_int("NOVAMART_DISK_CACHE_MB", 1024)
+DISK_CACHE_TTL_HOURS = _env_int("NOVAMART_DISK_CACHE_TTL_HOURS", 24 * 7)
+CODE_VERSION = os.environ.get("NOVAMART_CODE_VERSION", "")
+
+# =============================================================================
+# STARTUP PROFILING
+# =============================================================================
+# Record import, dataset load and time-to-first-chart timings and write them
+# as JSON after every script run (checked by benchmarks/check_startup_budget.py)
+PROFILE_STARTUP = _env_bool("NOVAMART_PROFILE_STARTUP", False)
+STARTUP_REPORT_PATH = _env_path("NOVAMART_STARTUP_REPORT", Path(__file__).resolve().parent.parent / ".cache" / "startup_profile.json")
+
+# =============================================================================
+# SECTION METRICS
+# =============================================================================
+# Per-section render timings (aggregation, figure build, chart send, payload
+# size, rows), appended to a JSONL log and shown in a sidebar debug panel
+SECTION_METRICS = _env_bool("NOVAMART_SECTION_METRICS", False)
+SECTION_METRICS_LOG = _env_path("NOVAMART_SECTION_METRICS_LOG", Path(__file__).resolve().parent.parent / ".cache" / "section_metrics.jsonl")
+# Section runs kept in memory for the debug panel's percentiles
+SECTION_METRICS_HISTORY = _env_int("NOVAMART_SECTION_METRICS_HISTORY", 5000)
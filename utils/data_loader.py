@@ -2,15 +2,237 @@
 Data Loading Utilities with Caching
 ===================================
 Handles loading and preprocessing of all datasets with Streamlit caching.
+Parsed datasets are persisted as columnar snapshots (see snapshot.py) and
+shared read-only between the server processes of a host (see shared_frames.py).
 """
 
 import streamlit as st
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+import config
+import startup_profile
+from date_dimension import add_calendar_columns, build_calendar, has_calendar_columns
+from dimension_catalog import get_catalog
+from metrics import compute_metric
+from query_cache import get_cache_backend
+from schema import DATE_FORMAT, apply_schema, read_dtypes, schema_signature
+from single_flight import flight_group
+from shared_frames import frame_name, load_shared_frame, shared_frames_enabled
+from snapshot import file_sha256, load_snapshot, snapshot_dir_for
+from versioning import derive_version, make_version, register_version, version_of
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# DATASET REGISTRY
+# =============================================================================
+# Dataset key -> (CSV file name, extra pd.read_csv keyword arguments)
+DATASET_FILES = {
+    'campaigns': ("campaign_performance.csv", {}),
+    'customers': ("customer_data.csv", {}),
+    'products': ("product_sales.csv", {}),
+    'leads': ("lead_scoring_results.csv", {}),
+    'feature_importance': ("feature_importance.csv", {}),
+    'learning_curve': ("learning_curve.csv", {}),
+    'geographic': ("geographic_data.csv", {}),
+    'attribution': ("channel_attribution.csv", {}),
+    'funnel': ("funnel_data.csv", {}),
+    'journey': ("customer_journey.csv", {}),
+    'correlation': ("correlation_matrix.csv", {'index_col': 0}),
+}
+
+def get_data_paths():
+    """Candidate data folders, in the order they are searched"""
+    return [
+        Path(__file__).parent.parent / "data",
+        Path("data"),
+        Path(__file__).parent.parent / "NovaMart_Marketing_Analytics_Dataset" / "marketing_dataset",
+        Path("NovaMart_Marketing_Analytics_Dataset") / "marketing_dataset",
+        Path("marketing_dataset"),
+    ]
+
+
+def find_data_path():
+    """Return the first existing data folder, or None if none is found"""
+    for path in get_data_paths():
+        if path.exists():
+            return path
+    return None
+
+
+def dataset_stamp(data_path, key):
+    """(size, mtime_ns) of a dataset's source file, or None if it is missing"""
+    try:
+        stat = (Path(data_path) / DATASET_FILES[key][0]).stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def data_fingerprint(data_path):
+    """Stamps of every registered source file; changes when any file does"""
+    return tuple(dataset_stamp(data_path, key) for key in DATASET_FILES)
+
+
+def read_dataset_csv(csv_path, read_kwargs=None, key=None):
+    """
+    Parse one CSV file into a typed DataFrame.
+    
+    The dataset's schema (see schema.py) is applied while parsing, so
+    categoricals, downcast integers and float32 metrics are what gets
+    snapshotted. A `date` column is always converted with the known source
+    format so the (slow) format inference never runs.
+    """
+    df = pd.read_csv(csv_path, dtype=read_dtypes(key) or None, **(read_kwargs or {}))
+    df = apply_schema(df, key)
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT, errors='coerce')
+    return df
+
+
+class DatasetLoadError(Exception):
+    """Raised when a single dataset cannot be loaded"""
+    
+    def __init__(self, key, path, cause):
+        self.key = key
+        self.path = Path(path)
+        self.cause = cause
+        super().__init__(f"{key} ({self.path.name}): {cause}")
+
+
+def load_dataset(data_path, key):
+    """
+    Load a single dataset through the snapshot cache.
+    
+    Args:
+        data_path: Folder containing the source CSV files
+        key: Dataset key from DATASET_FILES
+    
+    The dataset's dimension catalog (see dimension_catalog.py) is built
+    here too, so filter widgets never scan the rows themselves. Concurrent
+    loads of the same file share one parse (see single_flight.py).
+    
+    Returns:
+        pd.DataFrame: The parsed dataset, registered with its version token
+    
+    Raises:
+        DatasetLoadError: If the file is missing or cannot be parsed
+    """
+    return flight_group('load').do((str(Path(data_path)), key), lambda: _load_dataset(data_path, key))
+
+
+def _load_dataset(data_path, key):
+    start = time.perf_counter()
+    file_name, read_kwargs = DATASET_FILES[key]
+    csv_path = Path(data_path) / file_name
+    build_key = f"{sorted(read_kwargs.items())!r}|{schema_signature(key)}"
+
+    def load():
+        return load_snapshot(
+            csv_path,
+            lambda path: _build_dataset(path, read_kwargs, key, build_key),
+            snapshot_dir_for(data_path),
+            build_key=build_key,
+        )
+
+    try:
+        if shared_frames_enabled():
+            # Processes on this host map one published copy (see shared_frames.py)
+            name = frame_name(Path(data_path).resolve(), key, dataset_stamp(data_path, key), build_key)
+            df, manifest = load_shared_frame(name, load)
+        else:
+            df, manifest = load()
+    except Exception as e:
+        raise DatasetLoadError(key, csv_path, e) from e
+    register_version(df, make_version(key, manifest))
+    get_catalog(df)
+    startup_profile.record_dataset(key, time.perf_counter() - start)
+    return df
+
+
+def _build_dataset(csv_path, read_kwargs, key, build_key):
+    """
+    Parse a dataset, or fetch the frame another replica already parsed.
+
+    Only used with a networked cache backend (see cache_backend.py); the
+    shared entry is keyed on the file's content hash, so replicas agree on
+    it regardless of file timestamps.
+    """
+    backend = get_cache_backend()
+    if backend is None or not backend.remote or not config.SHARE_DATASETS:
+        return read_dataset_csv(csv_path, read_kwargs, key)
+    shared_key = ('dataset', key, file_sha256(csv_path), build_key)
+    found, df = backend.get(shared_key)
+    if not found:
+        df = read_dataset_csv(csv_path, read_kwargs, key)
+        backend.put(shared_key, df)
+    return df
+
+
+class LoadResult:
+    """Outcome of loading several datasets: frames, per-file errors and timings"""
+    
+    def __init__(self):
+        self.data = {}
+        self.errors = {}
+        self.timings = {}
+    
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def _timed_load(data_path, key):
+    start = time.perf_counter()
+    try:
+        return load_dataset(data_path, key), None, time.perf_counter() - start
+    except DatasetLoadError as e:
+        return None, e, time.perf_counter() - start
+
+
+def load_datasets(data_path, keys=None, max_workers=None):
+    """
+    Load several datasets concurrently on a bounded thread pool.
+    
+    CSV parsing and Parquet decoding release the GIL, so wall-clock time
+    approaches that of the slowest file rather than the sum of all files.
+    A failing file is reported on its own and does not affect the others.
+    
+    Args:
+        data_path: Folder containing the source CSV files
+        keys: Dataset keys to load (defaults to every registered dataset)
+        max_workers: Pool size (defaults to config.LOAD_WORKERS)
+    
+    Returns:
+        LoadResult: Loaded frames, DatasetLoadError per failed key and
+        load time in seconds per key
+    """
+    keys = list(keys) if keys is not None else list(DATASET_FILES)
+    workers = max(1, min(max_workers or config.LOAD_WORKERS, len(keys) or 1))
+    result = LoadResult()
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="novamart-load") as pool:
+        futures = {key: pool.submit(_timed_load, data_path, key) for key in keys}
+        for key, future in futures.items():
+            df, error, elapsed = future.result()
+            result.timings[key] = elapsed
+            if error is not None:
+                result.errors[key] = error
+                logger.error("Failed to load %s in %.3fs: %s", key, elapsed, error.cause)
+            else:
+                result.data[key] = df
+                logger.info("Loaded %s (%d rows) in %.3fs", key, len(df), elapsed)
+    
+    return result
+
+
 # =============================================================================
 # DATA LOADING WITH CACHING
 # =============================================================================
@@ -19,86 +241,50 @@ def load_all_data():
     """
     Load all required datasets with caching.
     
+    Datasets are read from Parquet snapshots when the source CSVs are
+    unchanged, and parsed (then snapshotted) otherwise.
+    
+    Files are loaded in parallel; a file that fails is reported on its own
+    and left out of the result instead of aborting the whole load.
+    
     Returns:
-        dict: Dictionary containing all loaded dataframes, or None if loading fails
+        dict: Dictionary containing all loaded dataframes, or None if the
+        data folder cannot be found
     """
-    data = {}
-    
     # Try to find data folder - it could be in 'data/' or relative to this script
-    data_paths = [
-        Path(__file__).parent.parent / "data",
-        Path("data"),
-        Path(__file__).parent.parent / "NovaMart_Marketing_Analytics_Dataset" / "marketing_dataset",
-        Path("NovaMart_Marketing_Analytics_Dataset") / "marketing_dataset",
-        Path("marketing_dataset"),
-    ]
-    
-    data_path = None
-    for path in data_paths:
-        if path.exists():
-            data_path = path
-            st.info(f"📁 Data loaded from: {path}")
-            break
+    data_path = find_data_path()
     
     if data_path is None:
         st.error("❌ Data folder not found!")
         st.info("Please ensure your data folder is in one of these locations:\n" +
-                "\n".join([f"- {p}" for p in data_paths]))
+                "\n".join([f"- {p}" for p in get_data_paths()]))
         return None
     
-    try:
-        # Campaign data - parse date column
-        data['campaigns'] = pd.read_csv(
-            data_path / "campaign_performance.csv",
-            parse_dates=['date'] if 'date' in pd.read_csv(data_path / "campaign_performance.csv", nrows=0).columns else False
-        )
-        
-        # Customer data
-        data['customers'] = pd.read_csv(data_path / "customer_data.csv")
-        
-        # Product sales data
-        data['products'] = pd.read_csv(data_path / "product_sales.csv")
-        
-        # Lead scoring results
-        data['leads'] = pd.read_csv(data_path / "lead_scoring_results.csv")
-        
-        # Feature importance
-        data['feature_importance'] = pd.read_csv(data_path / "feature_importance.csv")
-        
-        # Learning curve
-        data['learning_curve'] = pd.read_csv(data_path / "learning_curve.csv")
-        
-        # Geographic data
-        data['geographic'] = pd.read_csv(data_path / "geographic_data.csv")
-        
-        # Attribution model
-        data['attribution'] = pd.read_csv(data_path / "channel_attribution.csv")
-        
-        # Funnel data
-        data['funnel'] = pd.read_csv(data_path / "funnel_data.csv")
-        
-        # Customer journey
-        data['journey'] = pd.read_csv(data_path / "customer_journey.csv")
-        
-        # Correlation matrix
-        data['correlation'] = pd.read_csv(data_path / "correlation_matrix.csv", index_col=0)
-        
-        return data
-    
-    except FileNotFoundError as e:
-        st.error(f"❌ Data file not found: {e}")
-        return None
-    except Exception as e:
-        st.error(f"❌ Error loading data: {e}")
-        return None
+    st.info(f"📁 Data loaded from: {data_path}")
+    
+    result = load_datasets(data_path)
+    
+    for key, error in result.errors.items():
+        if isinstance(error.cause, FileNotFoundError):
+            st.error(f"❌ Data file not found: {error.path.name} (dataset '{key}')")
+        else:
+            st.error(f"❌ Error loading {error.path.name} (dataset '{key}'): {error.cause}")
+    
+    return result.data
 
 # =============================================================================
 # DATA PREPROCESSING UTILITIES
 # =============================================================================
-@st.cache_data
-def preprocess_campaign_data(campaigns):
-    """Preprocess campaign data for analysis"""
-    df = campaigns.copy()
+# Cached functions are keyed by the dataset version token (see versioning.py).
+# The frame itself is passed as an underscore argument, which Streamlit does
+# not hash, so a cache lookup is O(1) regardless of the frame size. Results
+# are shared read-only across sessions via st.cache_resource - callers must
+# not mutate them in place.
+
+@st.cache_resource(show_spinner=False)
+def _preprocess_campaign_data(version, _campaigns):
+    # Shallow: new columns are added to this frame only (copy-on-write)
+    df = _campaigns.copy(deep=False)
     
     # Ensure date column is datetime (dates are in DD/MM/YYYY format)
     if 'date' in df.columns and df['date'].dtype != 'datetime64[ns]':
@@ -106,58 +292,81 @@ def preprocess_campaign_data(campaigns):
     
     # Add time-based features
     if 'date' in df.columns:
-        df['year'] = df['date'].dt.year
-        df['month'] = df['date'].dt.month
-        df['quarter'] = df['date'].dt.quarter
-        df['week'] = df['date'].dt.isocalendar().week
-        df['dayofweek'] = df['date'].dt.day_name()
-        df['month_name'] = df['date'].dt.strftime('%B')
+        add_calendar_columns(df)
     
-    return df
+    return register_version(df, derive_version(version, "preprocessed"))
+
+def preprocess_campaign_data(campaigns):
+    """
+    Preprocess campaign data for analysis.
+    
+    Frames loaded through the schema registry already carry the calendar
+    columns (added once at ingest) and are returned as-is, without a copy.
+    """
+    if has_calendar_columns(campaigns):
+        return campaigns
+    version = version_of(campaigns)
+    return flight_group('preprocess').do(
+        ('campaigns', version), lambda: _preprocess_campaign_data(version, campaigns)
+    )
+
+@st.cache_resource(show_spinner=False)
+def _get_calendar(version, _campaigns):
+    return build_calendar(_campaigns['date'])
+
+def get_calendar(campaigns):
+    """
+    Calendar dimension table for the dates in a campaign frame.
+    
+    Indexed by `date`; join aggregated frames against it for week_start,
+    month_start, ISO week, month and other calendar attributes.
+    """
+    return _get_calendar(version_of(campaigns), campaigns)
+
+@st.cache_resource(show_spinner=False)
+def _preprocess_customer_data(version, _customers):
+    # Handle missing values (fillna returns a new frame)
+    df = _customers.fillna(_customers.mean(numeric_only=True))
+    
+    return register_version(df, derive_version(version, "preprocessed"))
 
-@st.cache_data
 def preprocess_customer_data(customers):
     """Preprocess customer data for analysis"""
-    df = customers.copy()
-    
-    # Handle missing values
-    df = df.fillna(df.mean(numeric_only=True))
+    version = version_of(customers)
+    return flight_group('preprocess').do(
+        ('customers', version), lambda: _preprocess_customer_data(version, customers)
+    )
+
+@st.cache_data(show_spinner=False)
+def _get_summary_stats(version, _campaigns):
+    campaigns = preprocess_campaign_data(_campaigns)
+    sums = {col: campaigns[col].sum() for col in ('revenue', 'conversions', 'spend') if col in campaigns.columns}
     
-    return df
+    return {
+        'total_revenue': sums.get('revenue', 0),
+        'total_conversions': sums.get('conversions', 0),
+        # Blended ROAS (Σrevenue / Σspend), see metrics.py
+        'avg_roas': compute_metric(sums, 'roas') if {'revenue', 'spend'} <= sums.keys() else 0,
+        'total_spend': sums.get('spend', 0),
+    }
 
-@st.cache_data
 def get_summary_stats(campaigns):
     """Calculate summary statistics"""
     if campaigns is None:
         return {}
-    
-    campaigns = preprocess_campaign_data(campaigns)
-    
-    return {
-        'total_revenue': campaigns['revenue'].sum() if 'revenue' in campaigns.columns else 0,
-        'total_conversions': campaigns['conversions'].sum() if 'conversions' in campaigns.columns else 0,
-        'avg_roas': campaigns['roas'].mean() if 'roas' in campaigns.columns else 0,
-        'total_spend': campaigns['spend'].sum() if 'spend' in campaigns.columns else 0,
-    }
+    return _get_summary_stats(version_of(campaigns), campaigns)
 
 # =============================================================================
 # UTILITY FUNCTIONS
 # =============================================================================
 def get_channel_options(campaigns):
     """Get list of available channels"""
-    if 'channel' in campaigns.columns:
-        return sorted(campaigns['channel'].unique().tolist())
-    return []
+    return get_catalog(campaigns).options('channel')
 
 def get_region_options(campaigns):
     """Get list of available regions"""
-    if 'region' in campaigns.columns:
-        return sorted(campaigns['region'].unique().tolist())
-    return []
+    return get_catalog(campaigns).options('region')
 
 def get_year_options(campaigns):
     """Get list of available years"""
-    campaigns = preprocess_campaign_data(campaigns)
-    if 'year' in campaigns.columns:
-        return sorted(campaigns['year'].unique().tolist())
-    return []
+    return get_catalog(preprocess_campaign_data(campaigns)).options('year')
@@ -0,0 +1,147 @@
+"""
+Lazy Dataset Store
+==================
+Mapping-compatible replacement for the eager dictionary returned by
+`load_all_data`. Each dataset is loaded, typed and cached the first time a
+page asks for it, so a page only pays for the data it actually renders.
+"""
+
+import logging
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+import config
+from data_loader import DATASET_FILES, DatasetLoadError, dataset_stamp, find_data_path, load_dataset
+from filter_context import FilterContext, apply_filter_context
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2 * len(DATASET_FILES))
+def _load_shared(data_path, key, stamp):
+    """
+    Load one dataset once per process and share it across sessions.
+
+    `stamp` (the source file's size and mtime) is part of the cache key, so
+    replacing a CSV is picked up without restarting the app.
+    """
+    return load_dataset(Path(data_path), key)
+
+
+class DataStore(Mapping):
+    """
+    Read-only mapping of dataset key -> DataFrame with lazy loading.
+
+    Behaves like the dictionary pages used to receive (`data['campaigns']`,
+    `'leads' in data`, `data.get('funnel')`), but nothing is read from disk
+    until a key is accessed. Accesses are recorded per page so the dashboard
+    can report which datasets each page really uses.
+
+    `filters` holds the global FilterContext chosen in the sidebar; pages read
+    `data.filtered(key)` to get the dataset with those filters applied.
+    """
+
+    def __init__(self, data_path, usage=None, filters=None):
+        self.data_path = Path(data_path)
+        self._usage = usage if usage is not None else {}
+        self._page = None
+        self.filters = filters if filters is not None else FilterContext()
+
+    # -------------------------------------------------------------------------
+    # Mapping interface
+    # -------------------------------------------------------------------------
+    def __getitem__(self, key):
+        if key not in DATASET_FILES:
+            raise KeyError(key)
+        if self._page is not None:
+            self._usage.setdefault(self._page, set()).add(key)
+        return _load_shared(str(self.data_path), key, dataset_stamp(self.data_path, key))
+
+    def __iter__(self):
+        return iter(DATASET_FILES)
+
+    def __len__(self):
+        return len(DATASET_FILES)
+
+    def __contains__(self, key):
+        # Membership must not trigger a load
+        return key in DATASET_FILES
+
+    # -------------------------------------------------------------------------
+    # Global filters
+    # -------------------------------------------------------------------------
+    def filtered(self, key):
+        """
+        Dataset `key` with the global filters applied.
+
+        The filtered view is computed once per selection and shared by every
+        page and section; treat it as read-only.
+        """
+        return apply_filter_context(self[key], key, self.filters)
+
+    # -------------------------------------------------------------------------
+    # Bulk loading
+    # -------------------------------------------------------------------------
+    def prefetch(self, keys=None, max_workers=None):
+        """
+        Load several datasets into the shared cache concurrently.
+
+        Returns:
+            dict: DatasetLoadError per key that failed (empty on success)
+        """
+        keys = list(keys) if keys is not None else list(DATASET_FILES)
+        workers = max(1, min(max_workers or config.LOAD_WORKERS, len(keys) or 1))
+        errors = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="novamart-prefetch") as pool:
+            futures = {
+                key: pool.submit(_load_shared, str(self.data_path), key, dataset_stamp(self.data_path, key))
+                for key in keys
+            }
+            for key, future in futures.items():
+                try:
+                    future.result()
+                except DatasetLoadError as e:
+                    errors[key] = e
+        return errors
+
+    # -------------------------------------------------------------------------
+    # Usage tracking
+    # -------------------------------------------------------------------------
+    @contextmanager
+    def track(self, page):
+        """Attribute dataset accesses inside the block to `page`"""
+        previous, self._page = self._page, page
+        try:
+            yield self
+        finally:
+            self._page = previous
+            logger.debug("Page %s used datasets: %s", page, self.used_by(page))
+
+    def used_by(self, page):
+        """Sorted list of dataset keys accessed while rendering `page`"""
+        return sorted(self._usage.get(page, ()))
+
+    def usage(self):
+        """Dictionary of page -> sorted dataset keys it has accessed"""
+        return {page: sorted(keys) for page, keys in self._usage.items()}
+
+
+def get_data_store(usage=None):
+    """
+    Create a DataStore over the first data folder found.
+
+    Args:
+        usage: Optional dict to record page -> datasets accesses into
+            (e.g. a `st.session_state` entry so usage survives reruns)
+
+    Returns:
+        DataStore, or None if no data folder exists
+    """
+    data_path = find_data_path()
+    if data_path is None:
+        return None
+    return DataStore(data_path, usage=usage)
@@ -0,0 +1,75 @@
+"""
+Calendar Dimension
+==================
+Derived calendar attributes (year, quarter, ISO week, month name, ...) built
+once at ingest time instead of on every page rerun.
+
+Attributes are computed on the *distinct* dates of a frame - a few hundred
+values even for tens of millions of rows - and broadcast back through the
+date codes, so the expensive string formatting never runs per row.
+"""
+
+import pandas as pd
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+
+# Columns added to fact tables by add_calendar_columns
+CALENDAR_COLUMNS = ['year', 'month', 'quarter', 'week', 'dayofweek', 'month_name']
+
+
+def build_calendar(dates):
+    """
+    Build a calendar dimension table for a set of dates.
+
+    Args:
+        dates: Array-like of datetimes (duplicates and NaT are dropped)
+
+    Returns:
+        pd.DataFrame: One row per distinct date, indexed by `date`, with
+        compact integer and categorical calendar attributes plus
+        `week_start` / `month_start` / `quarter_start` / `year_start`
+        timestamps for roll-ups
+    """
+    index = pd.DatetimeIndex(pd.unique(pd.Series(dates).dropna())).sort_values()
+    index.name = 'date'
+    iso = index.isocalendar()
+    return pd.DataFrame({
+        'year': index.year.astype('int16'),
+        'month': index.month.astype('int8'),
+        'quarter': index.quarter.astype('int8'),
+        'week': iso['week'].to_numpy().astype('int8'),
+        'dayofweek': pd.Categorical.from_codes(index.dayofweek, DAY_NAMES, ordered=True),
+        'month_name': pd.Categorical.from_codes(index.month - 1, MONTH_NAMES, ordered=True),
+        'week_start': index - pd.to_timedelta(index.dayofweek, unit='D'),
+        'month_start': index.to_period('M').to_timestamp(),
+        'quarter_start': index.to_period('Q').to_timestamp(),
+        'year_start': index.to_period('Y').to_timestamp(),
+    }, index=index)
+
+
+def add_calendar_columns(df, date_col='date'):
+    """
+    Add calendar attributes to a fact table (in place).
+
+    Rows with a missing date get NaN attributes (which upcasts the integer
+    columns to float, as pandas' own `.dt` accessors would).
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining
+    """
+    codes, uniques = pd.factorize(df[date_col], sort=True)
+    calendar = build_calendar(uniques)
+    has_missing = bool((codes < 0).any())
+
+    for col in CALENDAR_COLUMNS:
+        df[col] = calendar[col].array.take(codes, allow_fill=has_missing)
+    return df
+
+
+def has_calendar_columns(df):
+    """True if a frame already carries the ingest-time calendar columns"""
+    return all(col in df.columns for col in CALENDAR_COLUMNS)
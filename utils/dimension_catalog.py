@@ -0,0 +1,142 @@
+"""
+Dimension Catalog
+=================
+Distinct values, cardinalities and value counts of the categorical columns of
+a dataset (plus the span of its date columns), computed once when the dataset
+is loaded. Datasets without a schema (schema.py) keep their labels as string
+columns; those are catalogued too when they have at most
+config.CATALOG_MAX_CARDINALITY distinct values.
+
+Filter widgets take their options from the catalog instead of scanning the
+fact rows on every rerun. Categorical columns are counted on their integer
+codes with a single bincount, so building a catalog stays cheap even for very
+large frames, and the result is cached per dataset version.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from versioning import derive_version, version_of
+
+# Integer columns treated as dimensions alongside categorical columns
+INTEGER_DIMENSIONS = ['year', 'quarter', 'month', 'week', 'dayofweek']
+
+
+class Dimension:
+    """
+    Distinct values of one column and how many rows hold each of them.
+
+    Attributes:
+        name: Column name
+        values: Sorted distinct (non-null) values present in the data
+        counts: dict of value -> number of rows
+        missing: Number of rows with a null value
+    """
+
+    def __init__(self, name, values, counts, missing=0):
+        self.name = name
+        self.values = values
+        self.counts = counts
+        self.missing = missing
+
+    @classmethod
+    def from_series(cls, series):
+        """Count the values of a column (categoricals are counted on their codes)"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            present = codes[codes >= 0]
+            totals = np.bincount(present, minlength=len(series.cat.categories))
+            observed = np.flatnonzero(totals)
+            counts = dict(zip(series.cat.categories[observed].tolist(), totals[observed].tolist()))
+            missing = int(len(codes) - len(present))
+        else:
+            value_counts = series.value_counts(dropna=True, sort=False)
+            counts = dict(zip(value_counts.index.tolist(), value_counts.tolist()))
+            missing = int(series.isna().sum())
+        return cls(series.name, sorted(counts), counts, missing)
+
+    @property
+    def cardinality(self):
+        return len(self.values)
+
+    def value_counts(self):
+        """Row counts per value as a Series, most frequent first"""
+        return pd.Series(self.counts, name='count', dtype='int64').sort_values(ascending=False)
+
+
+class DimensionCatalog(Mapping):
+    """Read-only mapping of column name -> Dimension for one dataset"""
+
+    def __init__(self, dimensions, date_ranges=None):
+        self._dimensions = dict(dimensions)
+        self._date_ranges = dict(date_ranges or {})
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Catalog every categorical (string and integer calendar) column of a frame"""
+        dimensions = {col: Dimension.from_series(frame[col]) for col in dimension_columns(frame)}
+        date_ranges = {
+            col: (frame[col].min(), frame[col].max())
+            for col in frame.columns
+            if pd.api.types.is_datetime64_any_dtype(frame[col]) and frame[col].notna().any()
+        }
+        return cls(dimensions, date_ranges)
+
+    def __getitem__(self, column):
+        return self._dimensions[column]
+
+    def __iter__(self):
+        return iter(self._dimensions)
+
+    def __len__(self):
+        return len(self._dimensions)
+
+    def options(self, column):
+        """Sorted distinct values of a column, or [] if it is not catalogued"""
+        dimension = self._dimensions.get(column)
+        return list(dimension.values) if dimension is not None else []
+
+    def cardinality(self, column):
+        """Number of distinct values of a column (0 if not catalogued)"""
+        dimension = self._dimensions.get(column)
+        return dimension.cardinality if dimension is not None else 0
+
+    def date_range(self, column):
+        """(first, last) timestamps of a date column, or None"""
+        return self._date_ranges.get(column)
+
+
+def _is_dimension(series, max_cardinality):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return True
+    if series.name in INTEGER_DIMENSIONS and pd.api.types.is_integer_dtype(series):
+        return True
+    # Low-cardinality labels of datasets loaded without a schema
+    return pd.api.types.is_string_dtype(series) and series.nunique(dropna=True) <= max_cardinality
+
+
+def dimension_columns(frame, max_cardinality=None):
+    """
+    Columns of a frame that are catalogued as dimensions.
+
+    Args:
+        frame: DataFrame to inspect
+        max_cardinality: Largest number of distinct values a string column
+            may have (defaults to config.CATALOG_MAX_CARDINALITY)
+    """
+    max_cardinality = max_cardinality or config.CATALOG_MAX_CARDINALITY
+    return [col for col in frame.columns if _is_dimension(frame[col], max_cardinality)]
+
+
+@st.cache_resource(show_spinner=False, max_entries=config.DERIVED_CACHE_SIZE)
+def _build_catalog(version, _frame):
+    return DimensionCatalog.from_frame(_frame)
+
+
+def get_catalog(frame):
+    """Dimension catalog for a frame, built once per dataset version"""
+    return _build_catalog(derive_version(version_of(frame), "catalog"), frame)
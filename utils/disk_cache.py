@@ -0,0 +1,169 @@
+"""
+Persistent Result Cache
+=======================
+Local-disk backend of the query cache (see cache_backend.py), so computed
+aggregates survive restarts and redeploys.
+
+Each entry is a payload file holding the pickle-free encoding of the result
+(Parquet, `.npz` or JSON) and a JSON sidecar with its kind and creation time.
+Entries expire after a TTL, and the folder is kept under a size budget by
+evicting the least recently used entries first (file modification time is
+bumped on every read).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import config
+from cache_backend import CacheBackend, decode_value, encode_value, entry_name
+from snapshot import PARQUET_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+_PAYLOAD_SUFFIX = ".bin"
+
+
+class DiskCache(CacheBackend):
+    """
+    Size-bounded, TTL-limited on-disk key -> result store.
+
+    Attributes:
+        directory: Folder holding the entries
+        max_bytes: Size budget for all entries
+        ttl_seconds: Entries older than this are treated as missing
+        hits, misses, evictions: Running counters
+    """
+
+    name = "disk"
+
+    def __init__(self, directory, max_bytes, ttl_seconds):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._bytes = None  # running estimate of the folder size; None = unknown
+
+    def _entry_size(self, base):
+        return sum(
+            base.with_suffix(suffix).stat().st_size
+            for suffix in (".json", _PAYLOAD_SUFFIX)
+            if base.with_suffix(suffix).exists()
+        )
+
+    def _entry_path(self, key):
+        return self.directory / entry_name(key)
+
+    def get(self, key):
+        """
+        Read an entry.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        path = self._entry_path(key)
+        meta_path = path.with_suffix(".json")
+        try:
+            meta = json.loads(meta_path.read_text())
+            if time.time() - meta["created"] > self.ttl_seconds:
+                self._remove(path)
+                raise FileNotFoundError(meta_path)
+            value = decode_value(meta["kind"], path.with_suffix(_PAYLOAD_SUFFIX).read_bytes())
+            os.utime(meta_path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        except Exception as e:  # corrupt or partially written entry
+            logger.warning("Discarding unreadable cache entry %s: %s", path.name, e)
+            self._remove(path)
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        """Write an entry (values that cannot be stored without pickle are skipped)"""
+        path = self._entry_path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            encoded = encode_value(value)
+            if encoded is None:
+                return
+            kind, payload = encoded
+            payload_tmp = tmp_path.with_suffix(_PAYLOAD_SUFFIX)
+            payload_tmp.write_bytes(payload)
+            os.replace(payload_tmp, path.with_suffix(_PAYLOAD_SUFFIX))
+            # The sidecar is written last: an entry only counts once it exists
+            meta_tmp = tmp_path.with_suffix(".json")
+            meta_tmp.write_text(json.dumps({"kind": kind, "created": time.time()}))
+            os.replace(meta_tmp, path.with_suffix(".json"))
+            size = self._entry_size(path)
+        except Exception as e:  # a read-only or full disk only costs the cache
+            logger.warning("Could not persist cache entry %s: %s", path.name, e)
+            return
+        with self._lock:
+            if self._bytes is not None:
+                self._bytes += size
+            over_budget = self._bytes is None or self._bytes > self.max_bytes
+        if over_budget:
+            self._enforce_budget()
+
+    def _remove(self, path):
+        for suffix in (".json", _PAYLOAD_SUFFIX):
+            try:
+                os.remove(path.with_suffix(suffix))
+            except FileNotFoundError:
+                pass
+
+    def _enforce_budget(self):
+        """
+        Delete least recently used entries until the folder fits the budget.
+
+        Scans the folder (other processes may share it), so it only runs when
+        the running size estimate says the budget is exceeded.
+        """
+        with self._lock:
+            entries, total = [], 0
+            for meta_path in self.directory.glob("*.json"):
+                if meta_path.name.count(".") > 1:
+                    continue  # in-progress writes
+                base = meta_path.with_suffix("")
+                try:
+                    size = self._entry_size(base)
+                    entries.append((meta_path.stat().st_mtime, size, base))
+                except FileNotFoundError:  # removed by another process
+                    continue
+                total += size
+            for _, size, base in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(base)
+                self.evictions += 1
+                total -= size
+            self._bytes = total
+
+    def stats(self):
+        return {'backend': self.name, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+def get_disk_cache():
+    """
+    The persistent result cache configured in config.py.
+
+    Returns:
+        DiskCache, or None when disabled or Parquet support is missing
+    """
+    if not (config.DISK_CACHE_ENABLED and PARQUET_AVAILABLE):
+        return None
+    return DiskCache(
+        config.DISK_CACHE_DIR,
+        config.DISK_CACHE_MAX_MB * 1024 * 1024,
+        config.DISK_CACHE_TTL_HOURS * 3600,
+    )
@@ -0,0 +1,133 @@
+"""
+Figure Cache
+============
+Process-wide LRU cache of serialised Plotly figures, shared by every session.
+
+Building a figure (`px.*` / `go.Figure`, layout updates, validation) costs far
+more than the cached aggregation behind it, and used to be repeated on every
+rerun. Each chart's figure is now built by a function of its inputs and
+stored as its JSON spec, keyed by page section, the section's normalised
+widget state and the version of the data behind it:
+
+    fig = cached_figure(
+        "Revenue Trend Over Time",                # section
+        {'grain': grain, 'channels': channels},   # widget state
+        cube.version,                             # data version
+        _trend_figure, trend_df, x_title          # builder and its arguments
+    )
+
+On a hit the figure is rebuilt from the spec without re-validating it (the
+spec came from a validated figure), which is several times cheaper than
+building it. The cache is bounded by config.FIGURE_CACHE_MAX_MB; least
+recently used specs are evicted first, and 0 disables it. Concurrent misses
+on the same key are coalesced into one build (single_flight.py).
+
+The state must hold everything the figure depends on besides the data
+version - every widget value and derived option passed to the builder.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from cache_backend import MemoryBackend
+from single_flight import flight_group
+
+
+def _normalise(value):
+    """Hashable form of a widget value (sequence order is kept: it can change the figure)"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(name), _normalise(item)) for name, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_normalise(item) for item in value), key=repr))
+    if isinstance(value, (list, tuple, pd.Index, np.ndarray)):
+        return tuple(_normalise(item) for item in value)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def figure_key(section, state, version):
+    """Canonical cache key of a section's figure"""
+    return ('figure', section, _normalise(state), _normalise(version))
+
+
+class FigureCache:
+    """
+    Figure specs (JSON strings) in a byte-bounded LRU.
+
+    Attributes:
+        memory: MemoryBackend holding the specs
+    """
+
+    def __init__(self, max_bytes):
+        self.memory = MemoryBackend(max_bytes)
+        self._flight = flight_group('figure')
+
+    def get_or_build(self, key, build):
+        """
+        Return the figure for `key`, building and storing its spec on a miss.
+
+        Every caller gets its own Figure object, so it may be modified freely.
+        """
+        import plotly.graph_objects as go
+
+        hit, spec = self.memory.get(key)
+        if hit:
+            return go.Figure(json.loads(spec), _validate=False)
+
+        built = None
+
+        def build_and_store():
+            nonlocal built
+            # Another thread may have stored the spec since our lookup
+            found, result = self.memory.peek(key)
+            if found:
+                return result
+            built = build()
+            result = built.to_json()
+            self.memory.put(key, result)
+            return result
+
+        spec = self._flight.do(key, build_and_store)
+        # Only the thread that built the figure gets that object back; threads
+        # that waited on its build get their own copy from the spec
+        return built if built is not None else go.Figure(json.loads(spec), _validate=False)
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self):
+        """Counters and current size, for monitoring"""
+        return self.memory.stats()
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    """The process-wide figure cache (None when disabled)"""
+    if config.FIGURE_CACHE_MAX_MB <= 0:
+        return None
+    return FigureCache(config.FIGURE_CACHE_MAX_MB * 1024 * 1024)
+
+
+def cached_figure(section, state, version, build, *args, **kwargs):
+    """
+    Figure of a page section, from the cache or built by
+    `build(*args, **kwargs)` on a miss.
+
+    Args:
+        section: Page section the figure belongs to
+        state: Widget values (and derived options) the figure depends on
+        version: Version token(s) of the data behind the figure, e.g.
+            `cube.version` or `version_of(frame)`
+        build: Function returning the Plotly figure
+    """
+    cache = get_figure_cache()
+    if cache is None:
+        return build(*args, **kwargs)
+    return cache.get_or_build(figure_key(section, state, version), lambda: build(*args, **kwargs))
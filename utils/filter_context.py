@@ -0,0 +1,114 @@
+"""
+Global Filter Context
+=====================
+Dashboard-wide filters chosen once in the sidebar (date range, region,
+channel, customer segment) and applied to every page.
+
+Each dataset is filtered at most once per distinct filter selection: the
+filtered view is cached per (dataset version, the part of the context that
+applies to that dataset), so every page and chart of a rerun - and later
+reruns with the same selection - share one filtering pass. Filtered views
+carry a derived version token, so downstream caches (cube, catalog, summary
+statistics) are keyed on the filtered data.
+"""
+
+import hashlib
+
+import pandas as pd
+import streamlit as st
+
+import config
+from bitmap_index import get_bitmap_index, select_rows
+from range_index import get_date_index
+from versioning import derive_version, register_version, version_of
+
+# Dataset -> filter dimension -> column the filter applies to. Datasets (and
+# dimensions) missing here are not affected by the global filters.
+FILTER_COLUMNS = {
+    'campaigns': {'date': 'date', 'region': 'region', 'channel': 'channel'},
+    'customers': {'region': 'region', 'segment': 'customer_segment'},
+    'products': {'region': 'region'},
+    'geographic': {'region': 'region'},
+    'attribution': {'channel': 'channel'},
+}
+
+
+class FilterContext:
+    """
+    The global filter selection.
+
+    Empty value lists mean "no filter" for that dimension, and a missing
+    date bound leaves the range open on that side.
+    """
+
+    def __init__(self, start=None, end=None, regions=(), channels=(), segments=()):
+        self.start = pd.Timestamp(start) if start is not None else None
+        self.end = pd.Timestamp(end) if end is not None else None
+        self.regions = tuple(sorted(regions))
+        self.channels = tuple(sorted(channels))
+        self.segments = tuple(sorted(segments))
+
+    @property
+    def is_active(self):
+        return any((self.start, self.end, self.regions, self.channels, self.segments))
+
+    def values(self, dimension):
+        """Selected values of a filter dimension"""
+        return {'region': self.regions, 'channel': self.channels, 'segment': self.segments}[dimension]
+
+    def for_dataset(self, dataset_key):
+        """
+        The part of the context that applies to one dataset.
+
+        Returns:
+            tuple: (date column or None, start, end, dict of column -> values),
+            normalised so it can be used as a cache key
+        """
+        columns = FILTER_COLUMNS.get(dataset_key, {})
+        date_col = columns.get('date')
+        start, end = (self.start, self.end) if date_col else (None, None)
+        filters = {
+            columns[dim]: list(self.values(dim))
+            for dim in ('region', 'channel', 'segment')
+            if dim in columns and self.values(dim)
+        }
+        return (date_col if start is not None or end is not None else None), start, end, filters
+
+    def __eq__(self, other):
+        return isinstance(other, FilterContext) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        return (self.start, self.end, self.regions, self.channels, self.segments)
+
+    def __repr__(self):
+        return f"FilterContext(start={self.start}, end={self.end}, regions={self.regions}, channels={self.channels}, segments={self.segments})"
+
+
+@st.cache_resource(show_spinner=False, max_entries=config.FILTERED_VIEW_CACHE_SIZE)
+def _filtered_view(version, selection, _frame):
+    date_col, start, end, filters = selection
+    lo, hi = get_date_index(_frame, date_col).bounds(start, end) if date_col else (0, len(_frame))
+    view = select_rows(_frame, get_bitmap_index(_frame), dict(filters), lo, hi)
+    digest = hashlib.blake2b(repr(selection).encode(), digest_size=8).hexdigest()
+    return register_version(view, derive_version(version, f"filtered-{digest}"))
+
+
+def apply_filter_context(frame, dataset_key, context):
+    """
+    A dataset filtered by the global context (cached per selection).
+
+    Returns the frame itself when no part of the context applies to it.
+    """
+    if context is None or not context.is_active:
+        return frame
+    date_col, start, end, filters = context.for_dataset(dataset_key)
+    filters = {col: values for col, values in filters.items() if col in frame.columns}
+    if date_col not in frame.columns:
+        date_col, start, end = None, None, None
+    if date_col is None and not filters:
+        return frame
+    selection = (date_col, start, end, tuple((col, tuple(values)) for col, values in sorted(filters.items())))
+    return _filtered_view(version_of(frame), selection, frame)
@@ -0,0 +1,51 @@
+"""
+Page Section Fragments
+======================
+Runs a page section that has its own controls as a Streamlit fragment
+(`st.fragment`): changing one of its widgets reruns only that section's
+function and resends only its elements, instead of rerunning the whole
+script - dataset lookup, preprocessing and every other section of the page.
+
+A section function takes its inputs as arguments (the frames, cubes and
+catalogs the page prepared on the full run), so a fragment rerun starts from
+them rather than recomputing them, and its aggregations go through the shared
+query cache as before. A fragment must not compute anything the rest of the
+page depends on: its reruns do not rerun the page around it.
+
+    @section_fragment("Revenue Trend Over Time")
+    def _revenue_trend(sec, cube, catalog):
+        ...                               # widgets, aggregation, chart
+
+    _revenue_trend(cube, catalog)         # in render(); `sec` is supplied
+
+Global filters and page navigation live in the sidebar, outside every
+fragment, so changing them still reruns the whole script.
+"""
+
+import functools
+
+import streamlit as st
+
+import section_metrics
+
+
+def section_fragment(name):
+    """
+    Decorator running `fn(sec, *args, **kwargs)` as a fragment, timed as
+    section `name` (see section_metrics.section); callers omit `sec`.
+    """
+    def decorate(fn):
+        def run(page, *args, **kwargs):
+            # Fragment reruns happen outside app.py's page context
+            with section_metrics.page(page, new_run=False), section_metrics.section(name) as sec:
+                fn(sec, *args, **kwargs)
+
+        # Streamlit derives the fragment id from the function's name
+        functools.update_wrapper(run, fn, assigned=('__module__', '__name__', '__qualname__'), updated=())
+        run = st.fragment(run)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run(section_metrics.current_page(), *args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,117 @@
+"""
+Metric Definition Registry
+==========================
+Every KPI the dashboard reports, defined as an expression over additive
+components. Ratio metrics (ROAS, CTR, CPA, ...) are always computed as
+Σnumerator / Σdenominator on already-summed data - never as the average of
+per-row ratios - so they can be served from pre-aggregated sums (the campaign
+cube, cached query results) at any grain and still roll up correctly.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Metric:
+    """
+    A KPI defined over additive components.
+
+    A metric without a denominator is itself additive (a plain sum).
+    """
+
+    def __init__(self, key, label, numerator, denominator=None, scale=1.0, fmt="{:,.0f}"):
+        self.key = key
+        self.label = label
+        self.numerator = numerator
+        self.denominator = denominator
+        self.scale = scale
+        self.fmt = fmt
+
+    @property
+    def is_additive(self):
+        return self.denominator is None
+
+    @property
+    def components(self):
+        """Additive columns this metric is computed from"""
+        if self.is_additive:
+            return [self.numerator]
+        return [self.numerator, self.denominator]
+
+    def compute(self, sums):
+        """
+        Evaluate the metric on summed components.
+
+        Args:
+            sums: DataFrame, Series or dict holding the component sums
+
+        Returns:
+            Scalar or Series (NaN where the denominator is zero)
+        """
+        numerator = sums[self.numerator]
+        if self.is_additive:
+            return numerator
+        denominator = sums[self.denominator]
+        if isinstance(denominator, pd.Series):
+            return numerator / denominator.replace(0, np.nan) * self.scale
+        return numerator / denominator * self.scale if denominator else np.nan
+
+    def format(self, value):
+        """Format a value for display"""
+        if value is None or pd.isna(value):
+            return "-"
+        return self.fmt.format(value)
+
+
+METRICS = {
+    # Additive measures
+    'impressions': Metric('impressions', "Impressions", 'impressions'),
+    'clicks': Metric('clicks', "Clicks", 'clicks'),
+    'conversions': Metric('conversions', "Conversions", 'conversions'),
+    'spend': Metric('spend', "Spend", 'spend', fmt="₹{:,.0f}"),
+    'revenue': Metric('revenue', "Revenue", 'revenue', fmt="₹{:,.0f}"),
+    'sales': Metric('sales', "Sales", 'sales', fmt="₹{:,.0f}"),
+    'profit': Metric('profit', "Profit", 'profit', fmt="₹{:,.0f}"),
+
+    # Ratio metrics - always Σnumerator / Σdenominator
+    'roas': Metric('roas', "ROAS", 'revenue', 'spend', fmt="{:.2f}x"),
+    'ctr': Metric('ctr', "CTR", 'clicks', 'impressions', scale=100, fmt="{:.2f}%"),
+    'conversion_rate': Metric('conversion_rate', "Conversion Rate", 'conversions', 'clicks', scale=100, fmt="{:.2f}%"),
+    'cpc': Metric('cpc', "CPC", 'spend', 'clicks', fmt="₹{:,.2f}"),
+    'cpa': Metric('cpa', "CPA", 'spend', 'conversions', fmt="₹{:,.2f}"),
+    'profit_margin': Metric('profit_margin', "Profit Margin", 'profit', 'sales', scale=100, fmt="{:.2f}%"),
+}
+
+
+def get_metric(key):
+    """Look up a metric definition by key"""
+    return METRICS[key]
+
+
+def required_components(keys):
+    """Additive columns needed to compute the given metrics, in order"""
+    components = []
+    for key in keys:
+        for col in METRICS[key].components if key in METRICS else [key]:
+            if col not in components:
+                components.append(col)
+    return components
+
+
+def add_metrics(sums, keys):
+    """
+    Compute metrics onto a frame of summed components (returns a new frame).
+
+    Keys that are not registered metrics, or that are already columns, are
+    left as they are.
+    """
+    result = sums.copy()
+    for key in keys:
+        if key in METRICS and not METRICS[key].is_additive:
+            result[key] = METRICS[key].compute(result)
+    return result
+
+
+def compute_metric(sums, key):
+    """Evaluate a single metric on summed components (Series, dict or frame)"""
+    return METRICS[key].compute(sums)
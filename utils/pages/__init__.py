@@ -2,22 +2,36 @@
 Pages Package
 =============
 Contains all page modules for the Streamlit dashboard.
+
+Page modules are imported on first navigation rather than at startup
+(`load_page`), and keep heavy third-party imports (Plotly, scikit-learn)
+inside the functions that use them, so a cold worker only pays for the
+page it is about to show.
 """
 
-from . import executive_overview
-from . import campaign_analytics
-from . import customer_insights
-from . import product_performance
-from . import geographic_analysis
-from . import attribution_funnel
-from . import ml_model_evaluation
-
-__all__ = [
-    'executive_overview',
-    'campaign_analytics',
-    'customer_insights',
-    'product_performance',
-    'geographic_analysis',
-    'attribution_funnel',
-    'ml_model_evaluation'
-]
+import importlib
+
+# Sidebar label -> page module name, in navigation order
+PAGES = {
+    "🏠 Executive Overview": 'executive_overview',
+    "📈 Campaign Analytics": 'campaign_analytics',
+    "👥 Customer Insights": 'customer_insights',
+    "📦 Product Performance": 'product_performance',
+    "🗺️ Geographic Analysis": 'geographic_analysis',
+    "🎯 Attribution & Funnel": 'attribution_funnel',
+    "🤖 ML Model Evaluation": 'ml_model_evaluation',
+}
+
+__all__ = list(PAGES.values())
+
+
+def load_page(label):
+    """Page module for a sidebar label, imported on first use"""
+    return importlib.import_module(f"{__name__}.{PAGES[label]}")
+
+
+def __getattr__(name):
+    # `from pages import executive_overview` keeps working, lazily
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,29 +7,71 @@ Detailed campaign performance analysis with temporal and comparison charts.
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
+from charts import plotly_chart
 from data_loader import preprocess_campaign_data
+from campaign_cube import get_campaign_cube
+from dimension_catalog import get_catalog
+from figure_cache import cached_figure
+from fragments import section_fragment
 
-def render(data):
-    """Render Campaign Analytics page"""
-    st.title("📈 Campaign Analytics")
-    st.markdown("Deep dive into campaign performance across channels and regions")
-    
-    campaigns = preprocess_campaign_data(data['campaigns'])
+def _regional(cube, year):
+    return cube.rollup(by=['quarter', 'region'], measures=['revenue'], filters={'year': year})
+
+def _type_contribution(cube):
+    return cube.rollup(by=['campaign_type'], grain='month', measures=['spend'])
+
+def _daily_conversions(cube, region):
+    return cube.rollup(by=['channel'], grain='day', measures=['conversions'], filters={'region': region})
+
+def _heatmap(cube, year, metric_col):
+    return cube.rollup(by=['month', 'week'], measures=[metric_col], filters={'year': year})
+
+def warm(data):
+    """Precompute the page's default-view aggregations (see cache_warmer.py)"""
+    campaigns = preprocess_campaign_data(data.filtered('campaigns'))
+    if campaigns.empty:
+        return
+    cube = get_campaign_cube(campaigns)
+    years = get_catalog(campaigns).options('year')
+    if years and 'region' in cube.dimensions:
+        _regional(cube, years[0])
+    if 'campaign_type' in cube.dimensions:
+        _type_contribution(cube)
+    if 'channel' in cube.dimensions:
+        _daily_conversions(cube, None)
+    if years:
+        _heatmap(cube, years[0], 'revenue')
+
+# =============================================================================
+# SECTION 1: GROUPED BAR CHART - Regional Performance by Quarter
+# =============================================================================
+def _regional_figure(regional_data, year):
+    import plotly.express as px
     
-    # =============================================================================
-    # SECTION 1: GROUPED BAR CHART - Regional Performance by Quarter
-    # =============================================================================
+    fig = px.bar(
+        regional_data,
+        x='quarter',
+        y='revenue',
+        color='region',
+        barmode='group',
+        title=f"Regional Revenue by Quarter ({year})",
+        labels={'revenue': 'Revenue (₹)', 'quarter': 'Quarter'},
+        height=450
+    )
+    fig.update_layout(hovermode='x unified')
+    return fig
+
+@section_fragment("Regional Performance by Quarter")
+def _regional_performance(sec, catalog, cube):
     st.subheader("📊 Regional Performance by Quarter")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        if 'year' in campaigns.columns:
+        if 'year' in catalog:
             year = st.selectbox(
                 "Select Year",
-                sorted(campaigns['year'].unique()),
+                catalog.options('year'),
                 key="year_regional"
             )
         else:
@@ -38,33 +80,59 @@ def render(data):
     with col2:
         st.info("💡 Compare revenue across regions by quarter")
     
-    if year and 'region' in campaigns.columns and 'quarter' in campaigns.columns:
-        regional_data = campaigns[campaigns['year'] == year].groupby(['quarter', 'region'])['revenue'].sum().reset_index()
-        
-        fig = px.bar(
-            regional_data,
-            x='quarter',
-            y='revenue',
-            color='region',
-            barmode='group',
-            title=f"Regional Revenue by Quarter ({year})",
-            labels={'revenue': 'Revenue (₹)', 'quarter': 'Quarter'},
-            height=450
+    if year and 'region' in cube.dimensions:
+        regional_data = _regional(cube, year)
+    
+        sec.mark('aggregation', rows=len(regional_data))
+        fig = cached_figure(
+            "Regional Performance by Quarter",
+            {'year': year},
+            cube.version,
+            _regional_figure, regional_data, year
         )
-        fig.update_layout(hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
-        
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
+    
         # Key insight
-        top_region = regional_data.groupby('region')['revenue'].sum().idxmax()
+        top_region = regional_data.groupby('region', observed=True)['revenue'].sum().idxmax()
         st.success(f"✅ **{top_region}** region showed the strongest performance in {year}")
     else:
         st.warning("⚠️ Required time-based columns not found in data")
+
+# =============================================================================
+# SECTION 2: STACKED BAR CHART - Campaign Type Contribution
+# =============================================================================
+def _campaign_type_figure(campaign_type_data, campaign_col, stacked_view):
+    import plotly.express as px
     
-    st.markdown("---")
+    if stacked_view == "100% Stacked":
+        fig = px.bar(
+            campaign_type_data,
+            x='date',
+            y='percentage',
+            color=campaign_col,
+            title="Campaign Type Contribution (100% Stacked)",
+            labels={'percentage': 'Percentage (%)', 'date': 'Month'},
+            barmode='stack',
+            height=450
+        )
+    else:
+        fig = px.bar(
+            campaign_type_data,
+            x='date',
+            y='spend',
+            color=campaign_col,
+            title="Campaign Type Contribution (Absolute)",
+            labels={'spend': 'Spend (₹)', 'date': 'Month'},
+            barmode='stack',
+            height=450
+        )
     
-    # =============================================================================
-    # SECTION 2: STACKED BAR CHART - Campaign Type Contribution
-    # =============================================================================
+    fig.update_layout(hovermode='x unified')
+    return fig
+
+@section_fragment("Campaign Type Contribution")
+def _campaign_types(sec, cube):
     st.subheader("📌 Campaign Type Contribution")
     
     col1, col2 = st.columns(2)
@@ -79,63 +147,59 @@ def render(data):
     with col2:
         st.info("💡 See how different campaign types contribute to spend")
     
-    if 'campaign_type' in campaigns.columns or 'campaign_name' in campaigns.columns:
-        campaign_col = 'campaign_type' if 'campaign_type' in campaigns.columns else 'campaign_name'
-        
-        # Group by month and campaign type
-        campaigns['year_month'] = campaigns['date'].dt.to_period('M')
-        campaign_type_data = campaigns.groupby(['year_month', campaign_col])['spend'].sum().reset_index()
-        campaign_type_data['date'] = campaign_type_data['year_month'].dt.to_timestamp()
-        
+    if 'campaign_type' in cube.dimensions:
+        campaign_col = 'campaign_type'
+    
+        # Monthly spend by campaign type
+        campaign_type_data = _type_contribution(cube)
+    
         if stacked_view == "100% Stacked":
             # Convert to percentage
-            campaign_type_data = campaign_type_data.copy()
-            totals = campaign_type_data.groupby('date')['spend'].sum()
-            campaign_type_data['percentage'] = campaign_type_data.apply(
-                lambda row: (row['spend'] / totals[row['date']] * 100), axis=1
-            )
-            
-            fig = px.bar(
-                campaign_type_data,
-                x='date',
-                y='percentage',
-                color=campaign_col,
-                title="Campaign Type Contribution (100% Stacked)",
-                labels={'percentage': 'Percentage (%)', 'date': 'Month'},
-                barmode='stack',
-                height=450
-            )
-        else:
-            fig = px.bar(
-                campaign_type_data,
-                x='date',
-                y='spend',
-                color=campaign_col,
-                title="Campaign Type Contribution (Absolute)",
-                labels={'spend': 'Spend (₹)', 'date': 'Month'},
-                barmode='stack',
-                height=450
-            )
-        
-        fig.update_layout(hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
+            totals = campaign_type_data.groupby('date')['spend'].transform('sum')
+            campaign_type_data = campaign_type_data.assign(percentage=campaign_type_data['spend'] / totals * 100)
+    
+        sec.mark('aggregation', rows=len(campaign_type_data))
+        fig = cached_figure(
+            "Campaign Type Contribution",
+            {'stacked_view': stacked_view},
+            cube.version,
+            _campaign_type_figure, campaign_type_data, campaign_col, stacked_view
+        )
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Campaign type column not found in data")
+
+# =============================================================================
+# SECTION 3: CUMULATIVE CONVERSIONS AREA CHART
+# =============================================================================
+def _cumulative_figure(area_data, region):
+    import plotly.express as px
     
-    st.markdown("---")
+    fig = px.area(
+        area_data,
+        x='date',
+        y='cumulative_conversions',
+        color='channel',
+        title=f"Cumulative Conversions by Channel{f' - {region}' if region != 'All' else ''}",
+        labels={'cumulative_conversions': 'Cumulative Conversions', 'date': 'Date'},
+        height=450
+    )
     
-    # =============================================================================
-    # SECTION 3: CUMULATIVE CONVERSIONS AREA CHART
-    # =============================================================================
+    fig.update_layout(hovermode='x unified')
+    return fig
+
+@section_fragment("Cumulative Conversions by Channel")
+def _cumulative_conversions(sec, catalog, cube):
     st.subheader("📊 Cumulative Conversions by Channel")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        if 'region' in campaigns.columns:
+        if 'region' in catalog:
             region = st.selectbox(
                 "Filter by Region",
-                ["All"] + sorted(campaigns['region'].unique().tolist()),
+                ["All"] + catalog.options('region'),
                 key="region_cumulative"
             )
         else:
@@ -144,45 +208,58 @@ def render(data):
     with col2:
         st.info("💡 See cumulative conversion trends by channel")
     
-    if 'channel' in campaigns.columns:
-        area_data = campaigns.copy()
-        
-        if region != "All":
-            area_data = area_data[area_data['region'] == region]
-        
-        # Calculate cumulative conversions
-        area_data = area_data.sort_values('date')
-        area_data['cumulative_conversions'] = area_data.groupby('channel')['conversions'].cumsum()
-        
-        fig = px.area(
-            area_data,
-            x='date',
-            y='cumulative_conversions',
-            color='channel',
-            title=f"Cumulative Conversions by Channel{f' - {region}' if region != 'All' else ''}",
-            labels={'cumulative_conversions': 'Cumulative Conversions', 'date': 'Date'},
-            height=450
+    if 'channel' in cube.dimensions:
+        # Daily conversions per channel, accumulated over time
+        area_data = _daily_conversions(cube, region if region != "All" else None)
+        area_data = area_data.assign(
+            cumulative_conversions=area_data.groupby('channel', observed=True)['conversions'].cumsum()
         )
-        
-        fig.update_layout(hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
+    
+        sec.mark('aggregation', rows=len(area_data))
+        fig = cached_figure(
+            "Cumulative Conversions by Channel",
+            {'region': region},
+            cube.version,
+            _cumulative_figure, area_data, region
+        )
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Channel column not found in data")
+
+# =============================================================================
+# SECTION 4: CALENDAR HEATMAP
+# =============================================================================
+def _heatmap_figure(pivot_data, metric_heatmap, year_heatmap):
+    import plotly.graph_objects as go
     
-    st.markdown("---")
+    fig = go.Figure(data=go.Heatmap(
+        z=pivot_data.values,
+        x=pivot_data.columns,
+        y=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'][:len(pivot_data)],
+        colorscale='YlOrRd',
+        hovertemplate='<b>Week %{x}</b><br>Month: %{y}<br>' + metric_heatmap + ': %{z:,.0f}<extra></extra>'
+    ))
     
-    # =============================================================================
-    # SECTION 4: CALENDAR HEATMAP
-    # =============================================================================
+    fig.update_layout(
+        title=f"Daily {metric_heatmap} Heatmap - {year_heatmap}",
+        xaxis_title="Week Number",
+        yaxis_title="Month",
+        height=400
+    )
+    return fig
+
+@section_fragment("Daily Performance Heatmap")
+def _daily_heatmap(sec, catalog, cube):
     st.subheader("📅 Daily Performance Heatmap")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        if 'year' in campaigns.columns:
+        if 'year' in catalog:
             year_heatmap = st.selectbox(
                 "Select Year",
-                sorted(campaigns['year'].unique()),
+                catalog.options('year'),
                 key="year_heatmap"
             )
         else:
@@ -196,22 +273,16 @@ def render(data):
         )
     
     if year_heatmap:
-        heatmap_data = campaigns[campaigns['year'] == year_heatmap].copy()
-        
         if metric_heatmap == "Revenue":
             metric_col = 'revenue'
         elif metric_heatmap == "Conversions":
             metric_col = 'conversions'
         else:
             metric_col = 'spend'
-        
+    
         # Prepare data for calendar heatmap
-        heatmap_daily = heatmap_data.groupby('date')[metric_col].sum().reset_index()
-        heatmap_daily['month'] = heatmap_daily['date'].dt.month
-        heatmap_daily['day'] = heatmap_daily['date'].dt.day
-        heatmap_daily['week'] = heatmap_daily['date'].dt.isocalendar().week
-        heatmap_daily['month_name'] = heatmap_daily['date'].dt.strftime('%B')
-        
+        heatmap_daily = _heatmap(cube, year_heatmap, metric_col)
+    
         # Create pivot for heatmap
         pivot_data = heatmap_daily.pivot_table(
             values=metric_col,
@@ -219,25 +290,44 @@ def render(data):
             columns='week',
             aggfunc='sum'
         )
-        
-        fig = go.Figure(data=go.Heatmap(
-            z=pivot_data.values,
-            x=pivot_data.columns,
-            y=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'][:len(pivot_data)],
-            colorscale='YlOrRd',
-            hovertemplate='<b>Week %{x}</b><br>Month: %{y}<br>' + metric_heatmap + ': %{z:,.0f}<extra></extra>'
-        ))
-        
-        fig.update_layout(
-            title=f"Daily {metric_heatmap} Heatmap - {year_heatmap}",
-            xaxis_title="Week Number",
-            yaxis_title="Month",
-            height=400
+    
+        sec.mark('aggregation', rows=len(heatmap_daily))
+        fig = cached_figure(
+            "Daily Performance Heatmap",
+            {'year': year_heatmap, 'metric': metric_heatmap},
+            cube.version,
+            _heatmap_figure, pivot_data, metric_heatmap, year_heatmap
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Year data not available")
+
+def render(data):
+    """Render Campaign Analytics page"""
+    st.title("📈 Campaign Analytics")
+    st.markdown("Deep dive into campaign performance across channels and regions")
+    
+    campaigns = preprocess_campaign_data(data.filtered('campaigns'))
+    if campaigns.empty:
+        st.warning("⚠️ No campaign data matches the global filters")
+        return
+    cube = get_campaign_cube(campaigns)
+    catalog = get_catalog(campaigns)
+    
+    _regional_performance(catalog, cube)
+    
+    st.markdown("---")
+    
+    _campaign_types(cube)
+    
+    st.markdown("---")
+    
+    _cumulative_conversions(catalog, cube)
+    
+    st.markdown("---")
+    
+    _daily_heatmap(catalog, cube)
     
     st.markdown("---")
     
@@ -7,20 +7,53 @@ Customer behavior analysis with distribution and relationship charts.
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from scipy import stats
+from charts import plotly_chart
+from bitmap_index import filter_rows, get_bitmap_index
+from dimension_catalog import get_catalog
+from figure_cache import cached_figure
+from fragments import section_fragment
+from section_metrics import section
+from versioning import version_of
 
-def render(data):
-    """Render Customer Insights page"""
-    st.title("👥 Customer Insights")
-    st.markdown("Understanding customer behavior, segments, and lifetime value")
-    
-    customers = data['customers'].copy()
-    
-    # =============================================================================
-    # SECTION 1: HISTOGRAM - Customer Age Distribution
-    # =============================================================================
+def warm(data):
+    """Load the page's data and filter indexes (see cache_warmer.py)"""
+    customers = data.filtered('customers')
+    get_catalog(customers)
+    get_bitmap_index(customers)
+
+# =============================================================================
+# SECTION 1: HISTOGRAM - Customer Age Distribution
+# =============================================================================
+def _age_figure(customers, show_segment, bin_size):
+    import plotly.express as px
+    
+    if show_segment and 'segment' in customers.columns:
+        fig = px.histogram(
+            customers,
+            x='age',
+            color='segment',
+            nbins=int(customers['age'].max() / bin_size),
+            title="Customer Age Distribution by Segment",
+            labels={'age': 'Age (years)', 'count': 'Number of Customers'},
+            barmode='overlay',
+            height=400
+        )
+    else:
+        fig = px.histogram(
+            customers,
+            x='age',
+            nbins=int(customers['age'].max() / bin_size),
+            title="Customer Age Distribution",
+            labels={'age': 'Age (years)', 'count': 'Number of Customers'},
+            height=400
+        )
+    
+    fig.update_traces(marker_line_width=0, opacity=0.7)
+    fig.update_layout(hovermode='x unified')
+    return fig
+
+@section_fragment("Customer Age Distribution")
+def _age_distribution(sec, customers):
     st.subheader("📊 Customer Age Distribution")
     
     col1, col2, col3 = st.columns(3)
@@ -38,38 +71,55 @@ def render(data):
         st.info("💡 Customer age skews toward 25-40 range")
     
     if 'age' in customers.columns:
-        if show_segment and 'segment' in customers.columns:
-            fig = px.histogram(
-                customers,
-                x='age',
-                color='segment',
-                nbins=int(customers['age'].max() / bin_size),
-                title="Customer Age Distribution by Segment",
-                labels={'age': 'Age (years)', 'count': 'Number of Customers'},
-                barmode='overlay',
-                height=400
-            )
-        else:
-            fig = px.histogram(
-                customers,
-                x='age',
-                nbins=int(customers['age'].max() / bin_size),
-                title="Customer Age Distribution",
-                labels={'age': 'Age (years)', 'count': 'Number of Customers'},
-                height=400
-            )
-        
-        fig.update_traces(marker_line_width=0, opacity=0.7)
-        fig.update_layout(hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
+        sec.mark('aggregation', rows=len(customers))
+        fig = cached_figure(
+            "Customer Age Distribution",
+            {'bin_size': bin_size, 'show_segment': show_segment},
+            version_of(customers),
+            _age_figure, customers, show_segment, bin_size
+        )
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Age data not available")
-    
-    st.markdown("---")
-    
-    # =============================================================================
-    # SECTION 2: BOX PLOT - Lifetime Value by Segment
-    # =============================================================================
+
+# =============================================================================
+# SECTION 2: BOX PLOT - Lifetime Value by Segment
+# =============================================================================
+def _ltv_figure(customers, ltv_col, show_points):
+    import plotly.graph_objects as go
+    
+    fig = go.Figure()
+    
+    for segment in get_catalog(customers).options('segment'):
+        segment_data = filter_rows(customers, {'segment': segment})[ltv_col]
+    
+        if show_points:
+            fig.add_trace(go.Box(
+                y=segment_data,
+                name=segment,
+                boxmean='sd',
+                points='all',
+                jitter=0.3,
+                pointpos=-1.8
+            ))
+        else:
+            fig.add_trace(go.Box(
+                y=segment_data,
+                name=segment,
+                boxmean='sd'
+            ))
+    
+    fig.update_layout(
+        title="Lifetime Value Distribution by Segment",
+        yaxis_title="Lifetime Value (₹)",
+        height=450,
+        hovermode='y unified'
+    )
+    return fig
+
+@section_fragment("Lifetime Value by Customer Segment")
+def _ltv_by_segment(sec, customers):
     st.subheader("💰 Lifetime Value by Customer Segment")
     
     col1, col2 = st.columns(2)
@@ -82,47 +132,57 @@ def render(data):
     
     if 'lifetime_value' in customers.columns or 'ltv' in customers.columns:
         ltv_col = 'lifetime_value' if 'lifetime_value' in customers.columns else 'ltv'
-        
+    
         if 'segment' in customers.columns:
-            fig = go.Figure()
-            
-            for segment in sorted(customers['segment'].unique()):
-                segment_data = customers[customers['segment'] == segment][ltv_col]
-                
-                if show_points:
-                    fig.add_trace(go.Box(
-                        y=segment_data,
-                        name=segment,
-                        boxmean='sd',
-                        points='all',
-                        jitter=0.3,
-                        pointpos=-1.8
-                    ))
-                else:
-                    fig.add_trace(go.Box(
-                        y=segment_data,
-                        name=segment,
-                        boxmean='sd'
-                    ))
-            
-            fig.update_layout(
-                title="Lifetime Value Distribution by Segment",
-                yaxis_title="Lifetime Value (₹)",
-                height=450,
-                hovermode='y unified'
+            sec.mark('aggregation', rows=len(customers))
+            fig = cached_figure(
+                "Lifetime Value by Customer Segment",
+                {'show_points': show_points},
+                version_of(customers),
+                _ltv_figure, customers, ltv_col, show_points
             )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            sec.mark('figure')
+            plotly_chart(fig, use_container_width=True)
         else:
             st.warning("⚠️ Segment column not found")
     else:
         st.warning("⚠️ Lifetime value data not available")
-    
-    st.markdown("---")
-    
-    # =============================================================================
-    # SECTION 3: VIOLIN PLOT - Satisfaction by NPS Category
-    # =============================================================================
+
+# =============================================================================
+# SECTION 3: VIOLIN PLOT - Satisfaction by NPS Category
+# =============================================================================
+def _satisfaction_figure(nps_data, sat_col, by_channel):
+    import plotly.express as px
+    
+    if by_channel:
+        fig = px.violin(
+            nps_data,
+            y=sat_col,
+            x='nps_category',
+            color='channel',
+            box=True,
+            points=False,
+            title="Satisfaction Distribution by NPS Category and Channel",
+            labels={sat_col: 'Satisfaction Score'},
+            height=450
+        )
+    else:
+        fig = px.violin(
+            nps_data,
+            y=sat_col,
+            x='nps_category',
+            box=True,
+            points=False,
+            title="Satisfaction Distribution by NPS Category",
+            labels={sat_col: 'Satisfaction Score'},
+            height=450
+        )
+    
+    fig.update_layout(hovermode='y unified')
+    return fig
+
+@section_fragment("Satisfaction Distribution by NPS Category")
+def _satisfaction_by_nps(sec, customers):
     st.subheader("😊 Satisfaction Distribution by NPS Category")
     
     col1, col2 = st.columns(2)
@@ -135,58 +195,74 @@ def render(data):
     
     if 'satisfaction' in customers.columns or 'nps' in customers.columns:
         sat_col = 'satisfaction' if 'satisfaction' in customers.columns else 'nps'
-        
-        # Create NPS categories
-        if 'nps_category' not in customers.columns:
-            if 'nps' in customers.columns:
-                customers['nps_category'] = pd.cut(
-                    customers['nps'],
-                    bins=[0, 6, 8, 10],
-                    labels=['Detractor', 'Passive', 'Promoter']
-                )
-            elif sat_col in customers.columns:
-                customers['nps_category'] = pd.cut(
-                    customers[sat_col],
-                    bins=[0, 3, 6, 10],
-                    labels=['Detractor', 'Passive', 'Promoter']
-                )
-            else:
-                customers['nps_category'] = 'Unknown'
-        
-        if split_by_channel and 'channel' in customers.columns:
-            fig = px.violin(
-                customers,
-                y=sat_col,
-                x='nps_category',
-                color='channel',
-                box=True,
-                points=False,
-                title="Satisfaction Distribution by NPS Category and Channel",
-                labels={sat_col: 'Satisfaction Score'},
-                height=450
+    
+        # NPS categories go into a small frame of their own; the shared
+        # customer frame is never modified
+        if 'nps_category' in customers.columns:
+            nps_category = customers['nps_category']
+        elif 'nps' in customers.columns:
+            nps_category = pd.cut(
+                customers['nps'],
+                bins=[0, 6, 8, 10],
+                labels=['Detractor', 'Passive', 'Promoter']
             )
-        else:
-            fig = px.violin(
-                customers,
-                y=sat_col,
-                x='nps_category',
-                box=True,
-                points=False,
-                title="Satisfaction Distribution by NPS Category",
-                labels={sat_col: 'Satisfaction Score'},
-                height=450
+        elif sat_col in customers.columns:
+            nps_category = pd.cut(
+                customers[sat_col],
+                bins=[0, 3, 6, 10],
+                labels=['Detractor', 'Passive', 'Promoter']
             )
-        
-        fig.update_layout(hovermode='y unified')
-        st.plotly_chart(fig, use_container_width=True)
+        else:
+            nps_category = 'Unknown'
+    
+        by_channel = split_by_channel and 'channel' in customers.columns
+        nps_data = customers[[sat_col, 'channel'] if by_channel else [sat_col]].assign(nps_category=nps_category)
+        sec.mark('aggregation', rows=len(nps_data))
+        fig = cached_figure(
+            "Satisfaction Distribution by NPS Category",
+            {'split_by_channel': by_channel},
+            version_of(customers),
+            _satisfaction_figure, nps_data, sat_col, by_channel
+        )
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Satisfaction data not available")
+
+# =============================================================================
+# SECTION 4: SCATTER PLOT - Income vs. LTV
+# =============================================================================
+def _income_figure(customers, income_col, ltv_col, show_trend):
+    import plotly.express as px
     
-    st.markdown("---")
-    
-    # =============================================================================
-    # SECTION 4: SCATTER PLOT - Income vs. LTV
-    # =============================================================================
+    if 'segment' in customers.columns:
+        fig = px.scatter(
+            customers,
+            x=income_col,
+            y=ltv_col,
+            color='segment',
+            title="Income vs. Lifetime Value by Segment",
+            labels={income_col: 'Annual Income (₹)', ltv_col: 'Lifetime Value (₹)'},
+            height=450,
+            hover_name='segment' if 'customer_id' not in customers.columns else None,
+            trendline='ols' if show_trend else None
+        )
+    else:
+        fig = px.scatter(
+            customers,
+            x=income_col,
+            y=ltv_col,
+            title="Income vs. Lifetime Value",
+            labels={income_col: 'Annual Income (₹)', ltv_col: 'Lifetime Value (₹)'},
+            height=450,
+            trendline='ols' if show_trend else None
+        )
+    
+    fig.update_layout(hovermode='closest')
+    return fig
+
+@section_fragment("Income vs. Lifetime Value Analysis")
+def _income_vs_ltv(sec, customers):
     st.subheader("💎 Income vs. Lifetime Value Analysis")
     
     col1, col2, col3 = st.columns(3)
@@ -205,82 +281,104 @@ def render(data):
     income_col = 'income' if 'income' in customers.columns else 'annual_income'
     
     if ltv_col in customers.columns and income_col in customers.columns:
-        if 'segment' in customers.columns:
-            fig = px.scatter(
-                customers,
-                x=income_col,
-                y=ltv_col,
-                color='segment',
-                title="Income vs. Lifetime Value by Segment",
-                labels={income_col: 'Annual Income (₹)', ltv_col: 'Lifetime Value (₹)'},
-                height=450,
-                hover_name='segment' if 'customer_id' not in customers.columns else None,
-                trendline='ols' if show_trend else None
-            )
-        else:
-            fig = px.scatter(
-                customers,
-                x=income_col,
-                y=ltv_col,
-                title="Income vs. Lifetime Value",
-                labels={income_col: 'Annual Income (₹)', ltv_col: 'Lifetime Value (₹)'},
-                height=450,
-                trendline='ols' if show_trend else None
-            )
-        
-        fig.update_layout(hovermode='closest')
-        st.plotly_chart(fig, use_container_width=True)
+        sec.mark('aggregation', rows=len(customers))
+        fig = cached_figure(
+            "Income vs. Lifetime Value Analysis",
+            {'show_trend': show_trend},
+            version_of(customers),
+            _income_figure, customers, income_col, ltv_col, show_trend
+        )
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Required columns not available")
+
+def _segmentation_figure(customers):
+    """Figure of section 5: segment hierarchy by region (pie without regions)"""
+    import plotly.express as px
+    
+    # Create hierarchy data
+    if 'region' in customers.columns:
+        hierarchy_data = customers.groupby(['region', 'segment'], observed=True).size().reset_index(name='count')
+    
+        fig = px.sunburst(
+            hierarchy_data,
+            labels='region',
+            parents='',
+            values='count',
+            color='segment',
+            title="Customer Segmentation by Region",
+            height=450
+        )
+    
+        # Better: create proper hierarchy
+        fig = px.sunburst(
+            customers.groupby(['region', 'segment'], observed=True).size().reset_index(name='count'),
+            ids=['region_' + x if x in customers['region'].unique() else x for x in customers['region'].unique()] + customers['segment'].unique().tolist(),
+            labels=customers['region'].unique().tolist() + customers['segment'].unique().tolist(),
+            parents=[''] * len(customers['region'].unique()) + customers['region'].unique().tolist(),
+            values=None,
+            title="Customer Segmentation Hierarchy"
+        )
+    else:
+        seg_counts = customers['segment'].value_counts().reset_index()
+        seg_counts.columns = ['segment', 'count']
+    
+        fig = px.pie(
+            seg_counts,
+            values='count',
+            names='segment',
+            title="Customer Distribution by Segment",
+            height=450
+        )
+    return fig
+
+def render(data):
+    """Render Customer Insights page"""
+    st.title("👥 Customer Insights")
+    st.markdown("Understanding customer behavior, segments, and lifetime value")
+    
+    customers = data.filtered('customers')
+    if customers.empty:
+        st.warning("⚠️ No customer data matches the global filters")
+        return
+    
+    _age_distribution(customers)
+    
+    st.markdown("---")
+    
+    _ltv_by_segment(customers)
+    
+    st.markdown("---")
+    
+    _satisfaction_by_nps(customers)
+    
+    st.markdown("---")
+    
+    _income_vs_ltv(customers)
     
     st.markdown("---")
     
     # =============================================================================
     # SECTION 5: SUNBURST - Customer Segmentation
     # =============================================================================
-    st.subheader("🔄 Customer Segmentation Breakdown")
-    
-    st.info("💡 Click on segments to zoom in")
-    
-    if 'segment' in customers.columns:
-        # Create hierarchy data
-        if 'region' in customers.columns:
-            hierarchy_data = customers.groupby(['region', 'segment']).size().reset_index(name='count')
-            
-            fig = px.sunburst(
-                hierarchy_data,
-                labels='region',
-                parents='',
-                values='count',
-                color='segment',
-                title="Customer Segmentation by Region",
-                height=450
-            )
-            
-            # Better: create proper hierarchy
-            fig = px.sunburst(
-                customers.groupby(['region', 'segment']).size().reset_index(name='count'),
-                ids=['region_' + x if x in customers['region'].unique() else x for x in customers['region'].unique()] + customers['segment'].unique().tolist(),
-                labels=customers['region'].unique().tolist() + customers['segment'].unique().tolist(),
-                parents=[''] * len(customers['region'].unique()) + customers['region'].unique().tolist(),
-                values=None,
-                title="Customer Segmentation Hierarchy"
+    with section("Customer Segmentation Breakdown") as sec:
+        st.subheader("🔄 Customer Segmentation Breakdown")
+        
+        st.info("💡 Click on segments to zoom in")
+        
+        if 'segment' in customers.columns:
+            sec.mark('aggregation', rows=len(customers))
+            fig = cached_figure(
+                "Customer Segmentation Breakdown",
+                {},
+                version_of(customers),
+                _segmentation_figure, customers
             )
+            sec.mark('figure')
+            plotly_chart(fig, use_container_width=True)
         else:
-            seg_counts = customers['segment'].value_counts().reset_index()
-            seg_counts.columns = ['segment', 'count']
-            
-            fig = px.pie(
-                seg_counts,
-                values='count',
-                names='segment',
-                title="Customer Distribution by Segment",
-                height=450
-            )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("⚠️ Segment data not available")
+            st.warning("⚠️ Segment data not available")
     
     st.markdown("---")
     
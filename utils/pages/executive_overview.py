@@ -6,61 +6,58 @@ Key performance metrics and high-level dashboard view.
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+from charts import plotly_chart
 from data_loader import preprocess_campaign_data, get_summary_stats
+from campaign_cube import get_campaign_cube
+from dimension_catalog import get_catalog
+from figure_cache import cached_figure
+from metrics import METRICS
+from fragments import section_fragment
+from section_metrics import section
+from time_index import get_time_index, percent_change
 
-def render(data):
-    """Render Executive Overview page"""
-    st.title("🏠 Executive Overview")
-    st.markdown("Key performance metrics and revenue trends at a glance")
-    
-    campaigns = preprocess_campaign_data(data['campaigns'])
-    
-    # =============================================================================
-    # KPI CARDS
-    # =============================================================================
-    st.subheader("📊 Key Performance Indicators")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_revenue = campaigns['revenue'].sum() if 'revenue' in campaigns.columns else 0
-        st.metric(
-            label="Total Revenue",
-            value=f"₹{total_revenue:,.0f}",
-            delta=f"+{campaigns['revenue'].iloc[-30:].sum() / campaigns['revenue'].sum() * 100:.1f}% (Last 30 days)"
-        )
-    
-    with col2:
-        total_conversions = campaigns['conversions'].sum() if 'conversions' in campaigns.columns else 0
-        st.metric(
-            label="Total Conversions",
-            value=f"{total_conversions:,.0f}",
-            delta=f"{campaigns['conversions'].mean():.0f} avg/day"
-        )
-    
-    with col3:
-        avg_roas = campaigns['roas'].mean() if 'roas' in campaigns.columns else 0
-        st.metric(
-            label="Avg ROAS",
-            value=f"{avg_roas:.2f}x",
-            delta="Return on Ad Spend"
-        )
-    
-    with col4:
-        total_spend = campaigns['spend'].sum() if 'spend' in campaigns.columns else 0
-        st.metric(
-            label="Total Ad Spend",
-            value=f"₹{total_spend:,.0f}",
-            delta=f"ROI: ₹{(total_revenue - total_spend):,.0f}"
-        )
-    
-    st.markdown("---")
+def _trend(cube, grain, channels):
+    """Revenue rolled up to a time grain, optionally for some channels"""
+    return cube.rollup(grain=grain, measures=['revenue'], filters={'channel': channels})
+
+def _by_channel(cube):
+    return cube.rollup(by=['channel'], measures=['revenue', 'conversions', 'roas'])
+
+def warm(data):
+    """Precompute the page's default-view aggregations (see cache_warmer.py)"""
+    campaigns = preprocess_campaign_data(data.filtered('campaigns'))
+    if campaigns.empty:
+        return
+    cube = get_campaign_cube(campaigns)
+    cube.total(['revenue', 'conversions', 'spend', 'roas'])
+    get_time_index(campaigns, cube)
+    if 'channel' in cube.dimensions:
+        _trend(cube, 'day', get_catalog(campaigns).options('channel'))
+        _by_channel(cube)
+    else:
+        _trend(cube, 'day', None)
+
+# =============================================================================
+# REVENUE TREND LINE CHART
+# =============================================================================
+def _trend_figure(trend_df, x_title):
+    import plotly.express as px
     
-    # =============================================================================
-    # REVENUE TREND LINE CHART
-    # =============================================================================
+    fig = px.line(
+        trend_df,
+        x='date',
+        y='revenue',
+        title="Revenue Trend",
+        labels={'revenue': 'Revenue (₹)', 'date': x_title},
+        markers=True,
+        line_shape='spline'
+    )
+    fig.update_traces(line=dict(width=2))
+    fig.update_layout(hovermode='x unified', height=400)
+    return fig
+
+@section_fragment("Revenue Trend Over Time")
+def _revenue_trend_section(sec, cube, campaigns):
     st.subheader("📈 Revenue Trend Over Time")
     
     col1, col2, col3 = st.columns(3)
@@ -72,11 +69,11 @@ def render(data):
         )
     
     with col2:
-        if 'channel' in campaigns.columns:
+        if 'channel' in cube.dimensions:
             channels = st.multiselect(
                 "Filter by Channel",
-                options=campaigns['channel'].unique().tolist(),
-                default=campaigns['channel'].unique().tolist(),
+                options=get_catalog(campaigns).options('channel'),
+                default=get_catalog(campaigns).options('channel'),
                 key="channels_trend"
             )
         else:
@@ -85,46 +82,66 @@ def render(data):
     with col3:
         st.info("💡 Hover over the chart for daily values")
     
-    # Filter by channel if selected
-    trend_data = campaigns.copy()
-    if channels:
-        trend_data = trend_data[trend_data['channel'].isin(channels)]
-    
-    # Aggregate data
-    if aggregation == "Daily":
-        trend_df = trend_data.groupby('date')['revenue'].sum().reset_index()
-        x_title = "Date"
-    elif aggregation == "Weekly":
-        trend_data['week_start'] = trend_data['date'] - pd.to_timedelta(trend_data['date'].dt.dayofweek, unit='d')
-        trend_df = trend_data.groupby('week_start')['revenue'].sum().reset_index()
-        trend_df.columns = ['date', 'revenue']
-        x_title = "Week Starting"
-    else:  # Monthly
-        trend_data['year_month'] = trend_data['date'].dt.to_period('M')
-        trend_df = trend_data.groupby('year_month')['revenue'].sum().reset_index()
-        trend_df['date'] = trend_df['year_month'].dt.to_timestamp()
-        trend_df = trend_df[['date', 'revenue']]
-        x_title = "Month"
+    # Roll the cube up to the selected grain, filtered by channel if selected
+    grain, x_title = {
+        "Daily": ('day', "Date"),
+        "Weekly": ('week', "Week Starting"),
+        "Monthly": ('month', "Month"),
+    }[aggregation]
+    trend_df = _trend(cube, grain, channels)
     
     # Create line chart
-    fig = px.line(
-        trend_df,
-        x='date',
-        y='revenue',
-        title="Revenue Trend",
-        labels={'revenue': 'Revenue (₹)', 'date': x_title},
-        markers=True,
-        line_shape='spline'
+    sec.mark('aggregation', rows=len(trend_df))
+    fig = cached_figure(
+        "Revenue Trend Over Time",
+        {'aggregation': aggregation, 'channels': channels},
+        cube.version,
+        _trend_figure, trend_df, x_title
     )
-    fig.update_traces(line=dict(width=2))
-    fig.update_layout(hovermode='x unified', height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    sec.mark('figure')
+    plotly_chart(fig, use_container_width=True)
+
+# =============================================================================
+# CHANNEL PERFORMANCE BAR CHART
+# =============================================================================
+def _channel_figure(channel_data, metric, y_label):
+    import plotly.graph_objects as go
     
-    st.markdown("---")
+    if metric == "ROAS":
+        # Channels without spend have no ROAS: keep them on the axis as "n/a"
+        text = [METRICS['roas'].format(v) if pd.notna(v) else "n/a" for v in channel_data.values]
+    else:
+        text = [f"{v:,.0f}" for v in channel_data.values]
+    values = channel_data.fillna(0).values
     
-    # =============================================================================
-    # CHANNEL PERFORMANCE BAR CHART
-    # =============================================================================
+    fig = go.Figure(data=[
+        go.Bar(
+            y=channel_data.index,
+            x=values,
+            orientation='h',
+            marker=dict(
+                color=values,
+                colorscale='Viridis',
+                showscale=True,
+                colorbar=dict(title=metric)
+            ),
+            text=text,
+            textposition='outside'
+        )
+    ])
+    
+    fig.update_layout(
+        title=f"Channel Performance by {metric}",
+        xaxis_title=y_label,
+        yaxis_title="Channel",
+        height=400,
+        showlegend=False,
+        hovermode='closest'
+    )
+    return fig
+
+@section_fragment("Channel Performance Comparison")
+def _channel_performance(sec, cube):
     st.subheader("💼 Channel Performance Comparison")
     
     col1, col2 = st.columns(2)
@@ -139,46 +156,101 @@ def render(data):
     with col2:
         st.info(f"📊 Comparing channels by {metric.lower()}")
     
-    if 'channel' in campaigns.columns:
+    if 'channel' in cube.dimensions:
         # Aggregate by channel
+        by_channel = _by_channel(cube).set_index('channel')
         if metric == "Revenue":
-            channel_data = campaigns.groupby('channel')['revenue'].sum().sort_values(ascending=True)
+            channel_data = by_channel['revenue'].sort_values(ascending=True)
             y_label = "Revenue (₹)"
         elif metric == "Conversions":
-            channel_data = campaigns.groupby('channel')['conversions'].sum().sort_values(ascending=True)
+            channel_data = by_channel['conversions'].sort_values(ascending=True)
             y_label = "Conversions"
         else:  # ROAS
-            channel_data = campaigns.groupby('channel')['roas'].mean().sort_values(ascending=True)
+            # Zero-spend channels (NaN ROAS) go to the bottom of the chart
+            channel_data = by_channel['roas'].sort_values(ascending=True, na_position='first')
             y_label = "ROAS"
+    
+        sec.mark('aggregation', rows=len(channel_data))
+        fig = cached_figure(
+            "Channel Performance Comparison",
+            {'metric': metric},
+            cube.version,
+            _channel_figure, channel_data, metric, y_label
+        )
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
+    else:
+        st.warning("⚠️ Channel data not available")
+
+def render(data):
+    """Render Executive Overview page"""
+    st.title("🏠 Executive Overview")
+    st.markdown("Key performance metrics and revenue trends at a glance")
+    
+    campaigns = preprocess_campaign_data(data.filtered('campaigns'))
+    if campaigns.empty:
+        st.warning("⚠️ No campaign data matches the global filters")
+        return
+    cube = get_campaign_cube(campaigns)
+    totals = cube.total(['revenue', 'conversions', 'spend', 'roas'])
+    
+    # Period-over-period comparisons: last 30 calendar days vs the 30 before
+    time_index = get_time_index(campaigns, cube)
+    recent = time_index.last_n_days(30)
+    prior = time_index.previous_period(*recent)
+    
+    # =============================================================================
+    # KPI CARDS
+    # =============================================================================
+    with section("Key Performance Indicators"):
+        st.subheader("📊 Key Performance Indicators")
+        
+        col1, col2, col3, col4 = st.columns(4)
         
-        fig = go.Figure(data=[
-            go.Bar(
-                y=channel_data.index,
-                x=channel_data.values,
-                orientation='h',
-                marker=dict(
-                    color=channel_data.values,
-                    colorscale='Viridis',
-                    showscale=True,
-                    colorbar=dict(title=metric)
-                ),
-                text=[f"{v:,.0f}" if metric != "ROAS" else f"{v:.2f}x" for v in channel_data.values],
-                textposition='outside'
+        with col1:
+            total_revenue = totals.get('revenue', 0)
+            revenue_change = percent_change(
+                time_index.range_total('revenue', *recent),
+                time_index.range_total('revenue', *prior)
+            )
+            st.metric(
+                label="Total Revenue",
+                value=f"₹{total_revenue:,.0f}",
+                delta=f"{revenue_change:+.1f}% (Last 30 days)" if revenue_change is not None else None
             )
-        ])
         
-        fig.update_layout(
-            title=f"Channel Performance by {metric}",
-            xaxis_title=y_label,
-            yaxis_title="Channel",
-            height=400,
-            showlegend=False,
-            hovermode='closest'
-        )
+        with col2:
+            total_conversions = totals.get('conversions', 0)
+            st.metric(
+                label="Total Conversions",
+                value=f"{total_conversions:,.0f}",
+                delta=f"{total_conversions / max(time_index.days, 1):,.0f} avg/day"
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("⚠️ Channel data not available")
+        with col3:
+            roas_change = (time_index.range_metric('roas', *recent)
+                           - time_index.range_metric('roas', *prior))
+            st.metric(
+                label=METRICS['roas'].label,
+                value=METRICS['roas'].format(totals['roas']),
+                delta=f"{roas_change:+.2f}x (Last 30 days)" if pd.notna(roas_change) else "Return on Ad Spend"
+            )
+        
+        with col4:
+            total_spend = totals.get('spend', 0)
+            st.metric(
+                label="Total Ad Spend",
+                value=f"₹{total_spend:,.0f}",
+                delta=f"ROI: ₹{(total_revenue - total_spend):,.0f}"
+            )
+    
+    st.markdown("---")
+    
+    _revenue_trend_section(cube, campaigns)
+    
+    st.markdown("---")
+    
+    _channel_performance(cube)
     
     st.markdown("---")
     
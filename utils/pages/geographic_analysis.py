@@ -6,19 +6,39 @@ State-wise and location-based performance analysis.
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+from charts import plotly_chart
+from figure_cache import cached_figure
+from fragments import section_fragment
+from section_metrics import section
+from versioning import version_of
 
-def render(data):
-    """Render Geographic Analysis page"""
-    st.title("🗺️ Geographic Analysis")
-    st.markdown("Analyze market performance across regions and states")
+def warm(data):
+    """Load the page's data (see cache_warmer.py)"""
+    data.filtered('geographic')
+
+# =============================================================================
+# SECTION 1: Top States by Revenue/Metrics
+# =============================================================================
+def _top_states_figure(top_states, metric, metric_col, state_col, limit):
+    import plotly.express as px
     
-    geographic = data['geographic'].copy()
+    fig = px.bar(
+        top_states,
+        x=metric_col,
+        y=state_col,
+        orientation='h',
+        title=f"Top {limit} States by {metric}",
+        labels={metric_col: metric, state_col: 'State'},
+        color=metric_col,
+        color_continuous_scale='Viridis',
+        height=450
+    )
     
-    # =============================================================================
-    # SECTION 1: Top States by Revenue/Metrics
-    # =============================================================================
+    fig.update_traces(text=top_states[metric_col], textposition='outside')
+    return fig
+
+@section_fragment("State Performance Overview")
+def _state_performance(sec, geographic):
     st.subheader("📊 State Performance Overview")
     
     col1, col2, col3 = st.columns(3)
@@ -48,125 +68,169 @@ def render(data):
     
     if metric_col and metric_col in geographic.columns:
         state_col = 'state' if 'state' in geographic.columns else 'region'
-        
+    
         top_states = geographic.nlargest(limit, metric_col)
-        
-        fig = px.bar(
-            top_states,
-            x=metric_col,
-            y=state_col,
-            orientation='h',
-            title=f"Top {limit} States by {metric}",
-            labels={metric_col: metric, state_col: 'State'},
-            color=metric_col,
-            color_continuous_scale='Viridis',
-            height=450
+    
+        sec.mark('aggregation', rows=len(top_states))
+        fig = cached_figure(
+            "State Performance Overview",
+            {'metric': metric, 'limit': limit},
+            version_of(geographic),
+            _top_states_figure, top_states, metric, metric_col, state_col, limit
         )
-        
-        fig.update_traces(text=top_states[metric_col], textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning(f"⚠️ {metric} data not available")
+
+def _distribution_figure(geo_dist, state_col):
+    import plotly.express as px
+    
+    fig = px.pie(
+        geo_dist,
+        values='revenue',
+        names=state_col,
+        title="Revenue Distribution by State",
+        height=450
+    )
+    return fig
+
+def _comparison_figure(top_10_states, state_col):
+    import plotly.express as px
+    
+    fig = px.scatter(
+        top_10_states,
+        x='customers',
+        y='revenue',
+        size='customers',
+        color=state_col,
+        hover_name=state_col,
+        title="Revenue vs. Customer Count by State (Top 10)",
+        labels={'revenue': 'Revenue (₹)', 'customers': 'Number of Customers'},
+        height=450
+    )
+    
+    fig.update_layout(hovermode='closest')
+    return fig
+
+def _satisfaction_figure(satisfaction_data, state_col):
+    import plotly.express as px
+    
+    fig = px.bar(
+        satisfaction_data,
+        x='satisfaction',
+        y=state_col,
+        orientation='h',
+        title="Customer Satisfaction by Top States",
+        labels={'satisfaction': 'Satisfaction Score', state_col: 'State'},
+        color='satisfaction',
+        color_continuous_scale='RdYlGn',
+        height=400
+    )
+    return fig
+
+def render(data):
+    """Render Geographic Analysis page"""
+    st.title("🗺️ Geographic Analysis")
+    st.markdown("Analyze market performance across regions and states")
+    
+    geographic = data.filtered('geographic')
+    
+    _state_performance(geographic)
     
     st.markdown("---")
     
     # =============================================================================
     # SECTION 2: Geographic Distribution
     # =============================================================================
-    st.subheader("📍 Geographic Distribution")
-    
-    if 'revenue' in geographic.columns:
-        state_col = 'state' if 'state' in geographic.columns else 'region'
+    with section("Geographic Distribution") as sec:
+        st.subheader("📍 Geographic Distribution")
         
-        # Show state-wise breakdown
-        geo_dist = geographic.groupby(state_col).agg({
-            'revenue': 'sum' if 'revenue' in geographic.columns else 'mean',
-            'customers': 'sum' if 'customers' in geographic.columns else 'mean'
-        }).reset_index().sort_values('revenue', ascending=False)
+        if 'revenue' in geographic.columns:
+            state_col = 'state' if 'state' in geographic.columns else 'region'
         
-        fig = px.pie(
-            geo_dist,
-            values='revenue',
-            names=state_col,
-            title="Revenue Distribution by State",
-            height=450
-        )
+            # Show state-wise breakdown
+            geo_dist = geographic.groupby(state_col).agg({
+                'revenue': 'sum' if 'revenue' in geographic.columns else 'mean',
+                'customers': 'sum' if 'customers' in geographic.columns else 'mean'
+            }).reset_index().sort_values('revenue', ascending=False)
         
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("⚠️ Geographic distribution data not available")
+            sec.mark('aggregation', rows=len(geo_dist))
+            fig = cached_figure(
+                "Geographic Distribution",
+                {},
+                version_of(geographic),
+                _distribution_figure, geo_dist, state_col
+            )
+            sec.mark('figure')
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("⚠️ Geographic distribution data not available")
     
     st.markdown("---")
     
     # =============================================================================
     # SECTION 3: Multi-Metric Comparison
     # =============================================================================
-    st.subheader("📊 Multi-Metric Geographic Comparison")
-    
-    if 'revenue' in geographic.columns and 'customers' in geographic.columns:
-        state_col = 'state' if 'state' in geographic.columns else 'region'
+    with section("Multi-Metric Geographic Comparison") as sec:
+        st.subheader("📊 Multi-Metric Geographic Comparison")
         
-        # Prepare data for scatter plot
-        top_10_states = geographic.nlargest(10, 'revenue')
+        if 'revenue' in geographic.columns and 'customers' in geographic.columns:
+            state_col = 'state' if 'state' in geographic.columns else 'region'
         
-        fig = px.scatter(
-            top_10_states,
-            x='customers',
-            y='revenue',
-            size='customers',
-            color=state_col,
-            hover_name=state_col,
-            title="Revenue vs. Customer Count by State (Top 10)",
-            labels={'revenue': 'Revenue (₹)', 'customers': 'Number of Customers'},
-            height=450
-        )
+            # Prepare data for scatter plot
+            top_10_states = geographic.nlargest(10, 'revenue')
         
-        fig.update_layout(hovermode='closest')
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("⚠️ Required geographic metrics not available")
+            sec.mark('aggregation', rows=len(top_10_states))
+            fig = cached_figure(
+                "Multi-Metric Geographic Comparison",
+                {},
+                version_of(geographic),
+                _comparison_figure, top_10_states, state_col
+            )
+            sec.mark('figure')
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("⚠️ Required geographic metrics not available")
     
     st.markdown("---")
     
     # =============================================================================
     # SECTION 4: Satisfaction & Growth Analysis
     # =============================================================================
-    st.subheader("😊 Satisfaction & Market Analysis")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        if 'satisfaction' in geographic.columns:
-            state_col = 'state' if 'state' in geographic.columns else 'region'
-            
-            satisfaction_data = geographic.nlargest(10, 'revenue').sort_values('satisfaction', ascending=True)
-            
-            fig = px.bar(
-                satisfaction_data,
-                x='satisfaction',
-                y=state_col,
-                orientation='h',
-                title="Customer Satisfaction by Top States",
-                labels={'satisfaction': 'Satisfaction Score', state_col: 'State'},
-                color='satisfaction',
-                color_continuous_scale='RdYlGn',
-                height=400
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.info("""
-        **🎯 Market Insights**
+    with section("Satisfaction & Market Analysis") as sec:
+        st.subheader("😊 Satisfaction & Market Analysis")
         
-        **Strong Performers:**
-        - Maharashtra & Karnataka
-        - High revenue + Good satisfaction
+        col1, col2 = st.columns(2)
         
-        **Growth Opportunities:**
-        - Eastern states
-        - Lower penetration but growth potential
-        """)
+        with col1:
+            if 'satisfaction' in geographic.columns:
+                state_col = 'state' if 'state' in geographic.columns else 'region'
+        
+                satisfaction_data = geographic.nlargest(10, 'revenue').sort_values('satisfaction', ascending=True)
+        
+                sec.mark('aggregation', rows=len(satisfaction_data))
+                fig = cached_figure(
+                    "Satisfaction & Market Analysis",
+                    {},
+                    version_of(geographic),
+                    _satisfaction_figure, satisfaction_data, state_col
+                )
+                sec.mark('figure')
+                plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            st.info("""
+            **🎯 Market Insights**
+        
+            **Strong Performers:**
+            - Maharashtra & Karnataka
+            - High revenue + Good satisfaction
+        
+            **Growth Opportunities:**
+            - Eastern states
+            - Lower penetration but growth potential
+            """)
     
     st.markdown("---")
     
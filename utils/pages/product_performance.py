@@ -6,72 +6,58 @@ Product sales and hierarchy analysis.
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+from charts import plotly_chart
+from dimension_catalog import get_catalog
+from metrics import compute_metric
+from query_cache import aggregate
+from figure_cache import cached_figure
+from fragments import section_fragment
+from section_metrics import section
+from versioning import version_of
 
-def render(data):
-    """Render Product Performance page"""
-    st.title("📦 Product Performance")
-    st.markdown("Analyze product sales, margins, and hierarchical relationships")
-    
-    products = data['products'].copy()
-    
-    # =============================================================================
-    # SECTION 1: TREEMAP - Product Sales Hierarchy
-    # =============================================================================
-    st.subheader("🌳 Product Hierarchy Treemap")
-    
-    st.info("💡 Click on categories to drill down. Size = Sales, Color = Profit Margin")
-    
-    # Check for hierarchy columns
-    category_col = 'category' if 'category' in products.columns else None
-    subcategory_col = 'subcategory' if 'subcategory' in products.columns else None
-    product_col = 'product' if 'product' in products.columns else None
-    sales_col = 'sales' if 'sales' in products.columns else None
-    margin_col = 'profit_margin' if 'profit_margin' in products.columns else 'margin'
-    
-    if category_col and sales_col:
-        # Prepare hierarchical data
-        if subcategory_col:
-            hierarchy_data = products.groupby([category_col, subcategory_col]).agg({
-                sales_col: 'sum',
-                margin_col: 'mean'
-            }).reset_index()
-            hierarchy_data['parent'] = hierarchy_data[category_col]
-            hierarchy_data['label'] = hierarchy_data[subcategory_col]
-            hierarchy_data['id'] = hierarchy_data[category_col] + '_' + hierarchy_data[subcategory_col]
-        else:
-            hierarchy_data = products.groupby(category_col).agg({
-                sales_col: 'sum',
-                margin_col: 'mean'
-            }).reset_index()
-            hierarchy_data['parent'] = ''
-            hierarchy_data['label'] = hierarchy_data[category_col]
-            hierarchy_data['id'] = hierarchy_data[category_col]
-        
-        # Create treemap
-        fig = px.treemap(
-            hierarchy_data,
-            ids='id',
-            labels='label',
-            parents='parent',
-            values=sales_col,
-            color=margin_col,
-            color_continuous_scale='RdYlGn',
-            title="Product Sales Hierarchy by Category and Margin",
-            height=500
-        )
-        
-        fig.update_traces(textposition='middle center')
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("⚠️ Required product hierarchy columns not found")
+def _sum_with_margin(products, keys, sales_col, margin_col, has_profit):
+    """Sum sales per group and attach the group's profit margin"""
+    if has_profit:
+        sums = aggregate(products, keys, [sales_col, 'profit'])
+        return sums.assign(**{margin_col: compute_metric(sums, 'profit_margin')})
+    sums = aggregate(products, keys, [sales_col])
+    return sums.assign(**{margin_col: aggregate(products, keys, [margin_col], agg='mean')[margin_col]})
+
+def warm(data):
+    """Precompute the page's default-view aggregations (see cache_warmer.py)"""
+    products = data.filtered('products')
+    if products.empty or not {'category', 'sales'} <= set(products.columns):
+        return
+    has_profit = 'profit' in products.columns
+    if 'subcategory' in products.columns:
+        _sum_with_margin(products, ['category', 'subcategory'], 'sales', 'profit_margin', has_profit)
+    aggregate(products, ['category'], ['sales'])
+    if 'quarter' in products.columns:
+        aggregate(products, ['quarter', 'category'], ['sales'])
+    get_catalog(products)
+
+# =============================================================================
+# SECTION 2: Category Performance Comparison
+# =============================================================================
+def _category_figure(cat_data, metric):
+    import plotly.express as px
     
-    st.markdown("---")
+    fig = px.bar(
+        x=cat_data.values,
+        y=cat_data.index,
+        orientation='h',
+        title=f"Category Performance by {metric}",
+        labels={'x': metric, 'y': 'Category'},
+        color=cat_data.values,
+        color_continuous_scale='Viridis',
+        height=400
+    )
     
-    # =============================================================================
-    # SECTION 2: Category Performance Comparison
-    # =============================================================================
+    fig.update_traces(text=cat_data.values, textposition='outside')
+    return fig
+
+@section_fragment("Category Performance Metrics")
+def _category_performance(sec, category_col, sales_col, products, margin_col, has_profit):
     st.subheader("📊 Category Performance Metrics")
     
     col1, col2 = st.columns(2)
@@ -96,88 +82,199 @@ def render(data):
         else:
             metric_col = margin_col
             agg_func = 'mean'
-        
-        cat_data = products.groupby(category_col)[metric_col].agg(agg_func).sort_values(ascending=False)
-        
-        fig = px.bar(
-            x=cat_data.values,
-            y=cat_data.index,
-            orientation='h',
-            title=f"Category Performance by {metric}",
-            labels={'x': metric, 'y': 'Category'},
-            color=cat_data.values,
-            color_continuous_scale='Viridis',
-            height=400
+    
+        if metric_col == margin_col and has_profit:
+            cat_data = _sum_with_margin(products, [category_col], sales_col, margin_col, True).set_index(category_col)[margin_col]
+        else:
+            cat_data = aggregate(products, [category_col], [metric_col], agg=agg_func).set_index(category_col)[metric_col]
+        cat_data = cat_data.sort_values(ascending=False)
+    
+        sec.mark('aggregation', rows=len(cat_data))
+        fig = cached_figure(
+            "Category Performance Metrics",
+            {'metric': metric},
+            version_of(products),
+            _category_figure, cat_data, metric
         )
-        
-        fig.update_traces(text=cat_data.values, textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Category data not available")
+
+# =============================================================================
+# SECTION 3: Regional Product Performance
+# =============================================================================
+def _regional_products_figure(top_products, region):
+    import plotly.express as px
     
-    st.markdown("---")
+    fig = px.bar(
+        x=top_products.values,
+        y=top_products.index,
+        orientation='h',
+        title=f"Top Categories by Sales - {region if region != 'All' else 'All Regions'}",
+        labels={'x': 'Sales (₹)', 'y': 'Category'},
+        color=top_products.values,
+        color_continuous_scale='Plasma',
+        height=400
+    )
     
-    # =============================================================================
-    # SECTION 3: Regional Product Performance
-    # =============================================================================
+    fig.update_traces(text=top_products.values, textposition='outside')
+    return fig
+
+@section_fragment("Regional Product Performance")
+def _regional_products(sec, products, category_col, sales_col):
     st.subheader("🗺️ Regional Product Performance")
     
     if 'region' in products.columns and category_col and sales_col:
         region = st.selectbox(
             "Select Region",
-            ["All"] + sorted(products['region'].unique().tolist()),
+            ["All"] + get_catalog(products).options('region'),
             key="region_product"
         )
-        
-        if region != "All":
-            regional_products = products[products['region'] == region]
-        else:
-            regional_products = products
-        
+    
         # Get top products by sales
-        top_products = regional_products.groupby(category_col)[sales_col].sum().nlargest(10)
-        
-        fig = px.bar(
-            x=top_products.values,
-            y=top_products.index,
-            orientation='h',
-            title=f"Top Categories by Sales - {region if region != 'All' else 'All Regions'}",
-            labels={'x': 'Sales (₹)', 'y': 'Category'},
-            color=top_products.values,
-            color_continuous_scale='Plasma',
-            height=400
+        top_products = aggregate(
+            products,
+            [category_col],
+            [sales_col],
+            filters={'region': region if region != "All" else None}
+        ).set_index(category_col)[sales_col].nlargest(10)
+    
+        sec.mark('aggregation', rows=len(top_products))
+        fig = cached_figure(
+            "Regional Product Performance",
+            {'region': region},
+            version_of(products),
+            _regional_products_figure, top_products, region
         )
-        
-        fig.update_traces(text=top_products.values, textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
+        sec.mark('figure')
+        plotly_chart(fig, use_container_width=True)
     else:
         st.warning("⚠️ Regional product data not available")
+
+def _treemap_figure(hierarchy_data, sales_col, margin_col):
+    import plotly.express as px
+    
+    fig = px.treemap(
+        hierarchy_data,
+        ids='id',
+        labels='label',
+        parents='parent',
+        values=sales_col,
+        color=margin_col,
+        color_continuous_scale='RdYlGn',
+        title="Product Sales Hierarchy by Category and Margin",
+        height=500
+    )
+    
+    fig.update_traces(textposition='middle center')
+    return fig
+
+def _quarterly_figure(quarterly_data, category_col, sales_col):
+    import plotly.express as px
+    
+    fig = px.line(
+        quarterly_data,
+        x='quarter',
+        y=sales_col,
+        color=category_col,
+        markers=True,
+        title="Quarterly Sales by Category",
+        labels={'quarter': 'Quarter', sales_col: 'Sales (₹)'},
+        height=450
+    )
+    
+    fig.update_layout(hovermode='x unified')
+    return fig
+
+def render(data):
+    """Render Product Performance page"""
+    st.title("📦 Product Performance")
+    st.markdown("Analyze product sales, margins, and hierarchical relationships")
+    
+    products = data.filtered('products')
+    if products.empty:
+        st.warning("⚠️ No product data matches the global filters")
+        return
+    
+    # =============================================================================
+    # SECTION 1: TREEMAP - Product Sales Hierarchy
+    # =============================================================================
+    with section("Product Hierarchy Treemap") as sec:
+        st.subheader("🌳 Product Hierarchy Treemap")
+        
+        st.info("💡 Click on categories to drill down. Size = Sales, Color = Profit Margin")
+        
+        # Check for hierarchy columns
+        category_col = 'category' if 'category' in products.columns else None
+        subcategory_col = 'subcategory' if 'subcategory' in products.columns else None
+        product_col = 'product' if 'product' in products.columns else None
+        sales_col = 'sales' if 'sales' in products.columns else None
+        margin_col = 'profit_margin' if 'profit_margin' in products.columns else 'margin'
+        # Margins roll up as Σprofit / Σsales (metrics.py) when profit is available,
+        # rather than averaging per-row margins
+        has_profit = 'profit' in products.columns and sales_col == 'sales'
+        
+        if category_col and sales_col:
+            # Prepare hierarchical data
+            if subcategory_col:
+                hierarchy_data = _sum_with_margin(products, [category_col, subcategory_col], sales_col, margin_col, has_profit)
+                hierarchy_data = hierarchy_data.assign(
+                    parent=hierarchy_data[category_col],
+                    label=hierarchy_data[subcategory_col],
+                    id=hierarchy_data[category_col].astype(str) + '_' + hierarchy_data[subcategory_col].astype(str)
+                )
+            else:
+                hierarchy_data = _sum_with_margin(products, [category_col], sales_col, margin_col, has_profit)
+                hierarchy_data = hierarchy_data.assign(
+                    parent='',
+                    label=hierarchy_data[category_col],
+                    id=hierarchy_data[category_col]
+                )
+        
+            # Create treemap
+            sec.mark('aggregation', rows=len(hierarchy_data))
+            fig = cached_figure(
+                "Product Hierarchy Treemap",
+                {},
+                version_of(products),
+                _treemap_figure, hierarchy_data, sales_col, margin_col
+            )
+            sec.mark('figure')
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("⚠️ Required product hierarchy columns not found")
+    
+    st.markdown("---")
+    
+    _category_performance(category_col, sales_col, products, margin_col, has_profit)
+    
+    st.markdown("---")
+    
+    _regional_products(products, category_col, sales_col)
     
     st.markdown("---")
     
     # =============================================================================
     # SECTION 4: Quarterly Trends
     # =============================================================================
-    st.subheader("📈 Quarterly Sales Trends")
-    
-    if 'quarter' in products.columns and category_col and sales_col:
-        quarterly_data = products.groupby(['quarter', category_col])[sales_col].sum().reset_index()
+    with section("Quarterly Sales Trends") as sec:
+        st.subheader("📈 Quarterly Sales Trends")
         
-        fig = px.line(
-            quarterly_data,
-            x='quarter',
-            y=sales_col,
-            color=category_col,
-            markers=True,
-            title="Quarterly Sales by Category",
-            labels={'quarter': 'Quarter', sales_col: 'Sales (₹)'},
-            height=450
-        )
+        if 'quarter' in products.columns and category_col and sales_col:
+            quarterly_data = aggregate(products, ['quarter', category_col], [sales_col])
         
-        fig.update_layout(hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("⚠️ Quarterly data not available")
+            sec.mark('aggregation', rows=len(quarterly_data))
+            fig = cached_figure(
+                "Quarterly Sales Trends",
+                {},
+                version_of(products),
+                _quarterly_figure, quarterly_data, category_col, sales_col
+            )
+            sec.mark('figure')
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("⚠️ Quarterly data not available")
     
     st.markdown("---")
     
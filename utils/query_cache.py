@@ -0,0 +1,191 @@
+"""
+Query Result Cache
+==================
+Process-wide LRU cache of aggregation results, shared by every session.
+
+Entries are keyed by a canonical form of the query - dataset version, group-by
+columns, measures, filters and options - so the same chart requested by
+another user, or again after a rerun, is answered with a dictionary lookup
+instead of a pandas aggregation. The cache is bounded by a memory budget
+(config.QUERY_CACHE_MAX_MB); least recently used results are evicted first.
+Concurrent misses on the same key are coalesced into one computation
+(single_flight.py), and results are also written to a shared backend
+(cache_backend.py) - a local-disk folder by default, or Redis so several
+replicas share one set of results.
+
+Cached results are shared between sessions and must be treated as read-only:
+derive new frames (`assign`, `set_index`, ...) rather than mutating them.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from bitmap_index import filter_rows
+from cache_backend import REDIS_AVAILABLE, MemoryBackend, RedisBackend
+from disk_cache import get_disk_cache
+from single_flight import flight_group
+from versioning import version_of
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Two-tier result cache: a process-local LRU in front of an optional
+    shared backend (disk or Redis, see cache_backend.py).
+
+    Attributes:
+        memory: MemoryBackend holding results in this process
+        backend: Shared CacheBackend consulted on memory misses, or None
+    """
+
+    def __init__(self, max_bytes, backend=None):
+        self.memory = MemoryBackend(max_bytes)
+        self.backend = backend
+        self._flight = flight_group('query')
+
+    def get(self, key):
+        """
+        Look up a key in memory, marking it most recently used.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        return self.memory.get(key)
+
+    def put(self, key, value):
+        """Store a result in memory, evicting least recently used entries to fit"""
+        self.memory.put(key, value)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached result for `key`, computing and storing it on a miss.
+
+        Threads missing the same key concurrently share one computation. On
+        a memory miss the shared backend (if any) is consulted before
+        computing, and newly computed results are written to it.
+        """
+        hit, value = self.memory.get(key)
+        if hit:
+            return value
+
+        def compute_and_store():
+            # Another thread may have stored the result since our lookup
+            found, result = self.memory.peek(key)
+            if found:
+                return result
+            if self.backend is not None:
+                found, result = self.backend.get(key)
+                if found:
+                    self.memory.put(key, result)
+                    return result
+            result = compute()
+            self.memory.put(key, result)
+            if self.backend is not None:
+                self.backend.put(key, result)
+            return result
+
+        return self._flight.do(key, compute_and_store)
+
+    def clear(self):
+        self.memory.clear()
+
+    def stats(self):
+        """Counters and current size, for monitoring"""
+        stats = self.memory.stats()
+        stats['shared'] = self.backend.stats() if self.backend is not None else None
+        return stats
+
+
+def _canonical(value):
+    """Hashable, order-independent form of a filter value"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        values = set(value)
+        try:
+            return tuple(sorted(values))
+        except TypeError:
+            return tuple(sorted(values, key=repr))
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def query_key(version, kind, by=(), measures=(), filters=None, **options):
+    """
+    Canonical cache key for an aggregation.
+
+    Filters that do not restrict anything (None values, empty lists) are
+    dropped and the rest are sorted, so equivalent queries share one entry
+    regardless of how the caller spelled them. Group-by and measure order is
+    kept because it determines the shape of the result.
+    """
+    canonical_filters = tuple(sorted(
+        (col, _canonical(value)) for col, value in (filters or {}).items()
+        if value is not None and not (isinstance(value, (list, tuple, set, frozenset)) and not value)
+    ))
+    canonical_options = tuple(sorted((name, _canonical(value)) for name, value in options.items()))
+    return (version, kind, tuple(by), tuple(measures), canonical_filters, canonical_options)
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache_backend():
+    """
+    The process-wide shared backend selected by config.CACHE_BACKEND.
+
+    Returns:
+        CacheBackend, or None for "memory" (results stay in this process)
+    """
+    name = config.CACHE_BACKEND
+    if name == "redis":
+        if REDIS_AVAILABLE:
+            return RedisBackend(config.REDIS_URL)
+        logger.warning("NOVAMART_CACHE_BACKEND=redis but the redis package is not installed; using the disk cache")
+        return get_disk_cache()
+    if name == "disk":
+        return get_disk_cache()
+    if name != "memory":
+        logger.warning("Unknown NOVAMART_CACHE_BACKEND %r; keeping results in memory only", name)
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_cache():
+    """The process-wide query cache, in front of the configured shared backend"""
+    return QueryCache(config.QUERY_CACHE_MAX_MB * 1024 * 1024, backend=get_cache_backend())
+
+
+def cached_query(key, compute):
+    """Answer a query from the shared cache, computing it on a miss"""
+    return get_query_cache().get_or_compute(key, compute)
+
+
+def aggregate(frame, by, measures, agg='sum', filters=None):
+    """
+    Cached group-by aggregation of a versioned frame.
+
+    Args:
+        frame: DataFrame registered with a version token (see versioning.py)
+        by: Columns to group by (empty for a single grand-total row)
+        measures: Columns to aggregate
+        agg: Aggregation applied to every measure ('sum', 'mean', ...)
+        filters: Optional dict of column -> value or list of values, applied
+            through the frame's bitmap index before aggregating
+
+    Returns:
+        pd.DataFrame: One row per group with the group keys as columns
+    """
+    by, measures = list(by), list(measures)
+
+    def compute():
+        rows = filter_rows(frame, filters) if filters else frame
+        if not by:
+            return rows[measures].agg(agg).to_frame().T
+        return rows.groupby(by, observed=True)[measures].agg(agg).reset_index()
+
+    return cached_query(query_key(version_of(frame), 'aggregate', by, measures, filters, agg=agg), compute)
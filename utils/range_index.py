@@ -0,0 +1,103 @@
+"""
+Sorted-Date Range Index
+=======================
+Binary-search range filtering over frames kept physically sorted by date.
+
+A date window is located with two `searchsorted` calls and returned as a
+positional slice of the original frame (a view - no rows are copied), so
+narrowing multi-year history to one quarter costs O(log n) rather than a
+boolean mask over every row. Additional dimension predicates are evaluated
+only over the rows inside the window.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from versioning import derive_version, version_of
+
+
+class DateRangeIndex:
+    """
+    Range filter for a frame sorted ascending by a date column.
+
+    Raises:
+        ValueError: If the frame is not sorted by the date column
+    """
+
+    def __init__(self, frame, date_col='date'):
+        dates = frame[date_col]
+        if not dates.is_monotonic_increasing and not dates.dropna().is_monotonic_increasing:
+            raise ValueError(f"Frame must be sorted by '{date_col}' to build a DateRangeIndex")
+        self.frame = frame
+        self.date_col = date_col
+        self._dates = dates.to_numpy()
+
+    def bounds(self, start=None, end=None):
+        """
+        Positional bounds [lo, hi) of rows with start <= date <= end.
+
+        Either bound may be None for an open-ended range.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(start)), 'left'))
+        hi = len(self._dates) if end is None else int(np.searchsorted(self._dates, np.datetime64(pd.Timestamp(end)), 'right'))
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None):
+        """Rows within an inclusive date range, as a zero-copy positional slice"""
+        lo, hi = self.bounds(start, end)
+        return self.frame.iloc[lo:hi]
+
+    def select(self, start=None, end=None, filters=None):
+        """
+        Rows within a date range that also match dimension predicates.
+
+        Args:
+            start, end: Inclusive date bounds (None = open ended)
+            filters: dict of column -> value or list of values; None values
+                and empty lists are ignored
+
+        Returns:
+            pd.DataFrame: The date window itself (zero-copy) when no predicate
+            applies, otherwise the matching rows of that window
+        """
+        window = self.slice(start, end)
+        mask = predicate_mask(window, filters)
+        return window if mask is None else window[mask]
+
+
+def predicate_mask(frame, filters):
+    """
+    Boolean mask for column -> value / list-of-values predicates.
+
+    Returns:
+        np.ndarray or None: None when no predicate applies
+    """
+    mask = None
+    for col, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if not value:
+                continue
+            condition = frame[col].isin(list(value)).to_numpy()
+        else:
+            condition = (frame[col] == value).to_numpy()
+        mask = condition if mask is None else mask & condition
+    return mask
+
+
+def year_bounds(year):
+    """Inclusive (start, end) timestamps of a calendar year"""
+    return pd.Timestamp(year=int(year), month=1, day=1), pd.Timestamp(year=int(year), month=12, day=31)
+
+
+@st.cache_resource(show_spinner=False, max_entries=config.DERIVED_CACHE_SIZE)
+def _build_index(version, _frame, date_col):
+    return DateRangeIndex(_frame, date_col)
+
+
+def get_date_index(frame, date_col='date'):
+    """Range index over a date-sorted frame, built once per dataset version"""
+    return _build_index(derive_version(version_of(frame), f"dates:{date_col}"), frame, date_col)
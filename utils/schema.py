@@ -0,0 +1,140 @@
+"""
+Dataset Schema Registry
+=======================
+Declarative dtypes for each dataset, applied by the loader at ingest time.
+
+Low-cardinality string columns become categoricals (so filters and group-bys
+run on integer codes), counts are downcast to the smallest integer type that
+fits, and ratio metrics are stored as float32. Currency measures that are
+summed into headline totals (spend, revenue, sales, profit) stay float64 so
+the KPI cards keep full precision.
+
+Datasets without an entry are small lookup tables and keep pandas' defaults.
+"""
+
+import pandas as pd
+
+from date_dimension import add_calendar_columns
+
+# Dates in the source extracts are in DD/MM/YYYY format
+DATE_FORMAT = '%d/%m/%Y'
+
+# Bump whenever a schema below changes so existing snapshots are rebuilt
+SCHEMA_VERSION = 3
+
+DATASET_SCHEMAS = {
+    'campaigns': {
+        'dates': {'date': DATE_FORMAT},
+        # Derive year/month/quarter/week/dayofweek/month_name from this column
+        # (replaces the source's string month/quarter columns with integers)
+        'calendar': 'date',
+        # Physical row order, so date windows are contiguous (see range_index.py)
+        'sort_by': ['date', 'channel', 'region'],
+        'category': [
+            'campaign_id', 'campaign_name', 'campaign_type', 'channel',
+            'region', 'day_of_week',
+        ],
+        'integer': ['impressions', 'clicks', 'conversions'],
+        'float32': ['ctr', 'conversion_rate', 'cpc', 'cpa', 'roas'],
+    },
+    'customers': {
+        'category': [
+            'gender', 'age_group', 'income_bracket', 'region', 'city_tier',
+            'customer_segment', 'acquisition_channel', 'nps_category',
+        ],
+        'integer': [
+            'age', 'income', 'tenure_months', 'lifetime_value', 'total_purchases',
+            'last_purchase_days', 'website_visits_monthly', 'app_sessions_monthly',
+            'support_tickets', 'is_churned',
+        ],
+        'float32': [
+            'avg_order_value', 'email_open_rate', 'satisfaction_score',
+            'churn_probability',
+        ],
+    },
+    'products': {
+        'category': [
+            'product_id', 'product_name', 'category', 'subcategory', 'region',
+            'quarter',
+        ],
+        'integer': ['year', 'units_sold', 'review_count'],
+        'float32': ['profit_margin', 'return_rate', 'avg_rating'],
+    },
+    'leads': {
+        'category': ['company_size', 'industry', 'lead_source'],
+        'integer': [
+            'website_visits', 'pages_viewed', 'time_on_site_seconds',
+            'email_opens', 'email_clicks', 'form_submissions',
+            'content_downloads', 'webinar_attendance', 'days_since_first_touch',
+            'actual_converted', 'predicted_class',
+        ],
+        'float32': ['predicted_probability'],
+    },
+}
+
+
+def get_schema(key):
+    """Return the schema for a dataset key (empty if it has none)"""
+    return DATASET_SCHEMAS.get(key, {})
+
+
+def read_dtypes(key):
+    """
+    dtype mapping to pass to pd.read_csv.
+
+    Categoricals and float32 columns are typed while parsing, which avoids
+    materialising an intermediate object/float64 column. Columns missing from
+    the file are ignored by pandas.
+    """
+    schema = get_schema(key)
+    dtypes = {col: 'category' for col in schema.get('category', [])}
+    dtypes.update({col: 'float32' for col in schema.get('float32', [])})
+    return dtypes
+
+
+def apply_schema(df, key):
+    """
+    Apply a dataset's schema to a freshly parsed DataFrame.
+
+    Handles what read_csv cannot do on its own: parsing dates with their known
+    format, downcasting integers to the smallest type that fits the data,
+    deriving calendar columns from a date and sorting rows into the schema's
+    physical order. Columns are converted in place; columns listed in the
+    schema but absent from the frame are skipped.
+
+    Returns:
+        pd.DataFrame: The typed frame - a new, re-indexed frame when the
+        schema declares `sort_by`, otherwise the input frame
+    """
+    schema = get_schema(key)
+
+    for col, fmt in schema.get('dates', {}).items():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format=fmt, errors='coerce')
+
+    calendar_col = schema.get('calendar')
+    if calendar_col and calendar_col in df.columns:
+        add_calendar_columns(df, calendar_col)
+
+    for col in schema.get('integer', []):
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    for col in schema.get('category', []):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    for col in schema.get('float32', []):
+        if col in df.columns and df[col].dtype != 'float32':
+            df[col] = df[col].astype('float32')
+
+    sort_by = [col for col in schema.get('sort_by', []) if col in df.columns]
+    if sort_by:
+        df = df.sort_values(sort_by, kind='stable', na_position='last', ignore_index=True)
+
+    return df
+
+
+def schema_signature(key):
+    """Stable string identifying the schema a dataset was built with"""
+    return f"v{SCHEMA_VERSION}:{sorted((k, repr(v)) for k, v in get_schema(key).items())}"
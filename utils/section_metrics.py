@@ -0,0 +1,244 @@
+"""
+Section Render Metrics
+======================
+Lightweight per-section instrumentation of page renders, to find which chart
+is slow under real data instead of guessing.
+
+Every page section runs inside `section(name)` (or a function decorated with
+`instrumented(name)`), and marks the end of its phases:
+
+    with section("Revenue Trend") as sec:
+        trend = ...                      # widgets + aggregation
+        sec.mark('aggregation', rows=len(trend))
+        fig = px.line(trend, ...)        # figure construction
+        sec.mark('figure')
+        plotly_chart(fig)                # serialisation + send, via charts.py
+
+For each section run this records aggregation time, figure-build time, chart
+time (serialising and sending the figure), the serialised figure size and
+the row count. Records are appended to a JSONL log and kept in memory for
+the sidebar debug panel (p50/p95 per section). Enabled with
+NOVAMART_SECTION_METRICS=1; when disabled the hooks only keep the page
+structure and cost a few attribute lookups.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_lock = threading.Lock()
+_history = deque(maxlen=config.SECTION_METRICS_HISTORY)
+
+
+def enabled():
+    return config.SECTION_METRICS
+
+
+class SectionRun:
+    """
+    Timings of one execution of a page section.
+
+    Attributes:
+        page, section: Where the section lives
+        aggregation, figure, chart: Seconds spent in each phase (None if
+            the phase was not reached)
+        total: Seconds from entering to leaving the section
+        rows: Row count reported with the aggregation, if any
+        payload_bytes: Serialised size of the figures the section displayed
+        charts: Number of figures displayed
+        error: Exception type name if the section raised
+    """
+
+    def __init__(self, page, section):
+        self.page = page
+        self.section = section
+        self.started = time.time()
+        self.aggregation = None
+        self.figure = None
+        self.chart = None
+        self.total = None
+        self.rows = None
+        self.payload_bytes = 0
+        self.charts = 0
+        self.error = None
+        self._lap = time.perf_counter()
+
+    def mark(self, phase, rows=None):
+        """
+        End a phase ('aggregation' or 'figure') of the section.
+
+        The phase is charged with the time since the previous mark (or the
+        start of the section); a repeated phase accumulates.
+        """
+        now = time.perf_counter()
+        elapsed, self._lap = now - self._lap, now
+        setattr(self, phase, (getattr(self, phase) or 0.0) + elapsed)
+        if rows is not None:
+            self.rows = (self.rows or 0) + int(rows)
+
+    def chart_sent(self, seconds, payload_bytes):
+        self.chart = (self.chart or 0.0) + seconds
+        self.payload_bytes += payload_bytes
+        self.charts += 1
+        self._lap = time.perf_counter()
+
+    def as_dict(self):
+        return {
+            'ts': self.started,
+            'page': self.page,
+            'section': self.section,
+            'aggregation_ms': _ms(self.aggregation),
+            'figure_ms': _ms(self.figure),
+            'chart_ms': _ms(self.chart),
+            'total_ms': _ms(self.total),
+            'rows': self.rows,
+            'payload_bytes': self.payload_bytes,
+            'charts': self.charts,
+            'error': self.error,
+        }
+
+
+class _NullRun:
+    """Stand-in used when metrics are disabled"""
+
+    def mark(self, phase, rows=None):
+        pass
+
+    def chart_sent(self, seconds, payload_bytes):
+        pass
+
+
+_NULL_RUN = _NullRun()
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+# =============================================================================
+# INSTRUMENTATION API
+# =============================================================================
+@contextmanager
+def page(name, new_run=True):
+    """
+    Attribute sections run inside the block to page `name`.
+
+    `new_run` starts a fresh `last_run()` list; fragment reruns (see
+    fragments.py) pass False and add to the page's current list.
+    """
+    previous = getattr(_local, 'page', None)
+    _local.page = name
+    if new_run or getattr(_local, 'runs', None) is None:
+        _local.runs = []
+    try:
+        yield
+    finally:
+        _local.page = previous
+
+
+@contextmanager
+def section(name):
+    """Time one page section; yields an object with `mark(phase, rows=None)`"""
+    if not enabled():
+        yield _NULL_RUN
+        return
+    run = SectionRun(getattr(_local, 'page', None), name)
+    previous = getattr(_local, 'section', None)
+    _local.section = run
+    start = time.perf_counter()
+    try:
+        yield run
+    except BaseException as e:
+        run.error = type(e).__name__
+        raise
+    finally:
+        run.total = time.perf_counter() - start
+        _local.section = previous
+        _record(run)
+
+
+def instrumented(name):
+    """Decorator form of `section`; the run is not passed to the function"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with section(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_page():
+    """The page being rendered on this thread, if any"""
+    return getattr(_local, 'page', None)
+
+
+def current_section():
+    """The section being rendered on this thread (a no-op object if none)"""
+    return getattr(_local, 'section', None) or _NULL_RUN
+
+
+def _record(run):
+    record = run.as_dict()
+    with _lock:
+        _history.append(record)
+    runs = getattr(_local, 'runs', None)
+    if runs is not None:
+        runs.append(record)
+    path = config.SECTION_METRICS_LOG
+    if path:
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with _lock, open(path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("Could not write section metrics to %s: %s", path, e)
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+def last_run():
+    """Records of the sections run by the current script run's page"""
+    return list(getattr(_local, 'runs', None) or [])
+
+
+def summary(page_name=None):
+    """
+    Per-section percentiles over the in-memory history.
+
+    Returns:
+        list of dict: one per (page, section), slowest p95 first, with run
+        count, p50/p95/max of total milliseconds, mean payload and rows
+    """
+    with _lock:
+        records = [r for r in _history if page_name is None or r['page'] == page_name]
+    groups = {}
+    for record in records:
+        groups.setdefault((record['page'], record['section']), []).append(record)
+    rows = []
+    for (page_label, name), group in groups.items():
+        totals = np.array([r['total_ms'] for r in group])
+        rows.append({
+            'page': page_label,
+            'section': name,
+            'runs': len(group),
+            'p50_ms': round(float(np.percentile(totals, 50)), 1),
+            'p95_ms': round(float(np.percentile(totals, 95)), 1),
+            'max_ms': round(float(totals.max()), 1),
+            'payload_kb': round(sum(r['payload_bytes'] for r in group) / len(group) / 1024, 1),
+            'rows': group[-1]['rows'],
+        })
+    return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
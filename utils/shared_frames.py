@@ -0,0 +1,159 @@
+"""
+Shared Dataset Frames
+=====================
+Publishes each typed dataset once per host as an uncompressed Arrow IPC file
+and memory-maps it into every server process.
+
+Numeric, date and categorical columns of a mapped frame are zero-copy views
+onto the mapped file (to_pandas with split_blocks, so blocks are never
+consolidated into fresh arrays), and text columns are Arrow-backed strings
+over the same buffers. The operating system keeps one physical copy of the
+file per host, so resident memory stays roughly flat as workers are added.
+The default location is /dev/shm, which keeps the files in RAM.
+
+Mapped frames are read-only: their arrays are not writeable, and in-place
+assignment raises instead of silently diverging between processes. Each
+file has a JSON sidecar carrying the dataset manifest, so a process that
+finds a published file needs neither the CSV nor the Parquet snapshot.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the file layout changes, so old files are republished
+SHARED_FORMAT_VERSION = 1
+
+
+def shared_frames_dir():
+    """Folder published frames live in (/dev/shm when the host has it)"""
+    if config.SHARED_FRAMES_DIR is not None:
+        return Path(config.SHARED_FRAMES_DIR)
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm / "novamart"
+    return Path(tempfile.gettempdir()) / "novamart-frames"
+
+
+def shared_frames_enabled():
+    return config.SHARED_FRAMES_ENABLED and ARROW_AVAILABLE
+
+
+def frame_name(scope, key, *parts):
+    """
+    File name stem of a published frame.
+
+    Args:
+        scope: Owner of the frame (e.g. the data folder); frames of other
+            scopes are never touched
+        key: Dataset key
+        parts: Anything the frame's contents depend on (file stamp, build
+            options, ...); a change publishes a new file
+    """
+    scope_digest = hashlib.blake2b(str(scope).encode(), digest_size=6).hexdigest()
+    content_digest = hashlib.blake2b(repr((SHARED_FORMAT_VERSION,) + parts).encode(), digest_size=10).hexdigest()
+    return f"{scope_digest}-{key}-{content_digest}"
+
+
+# =============================================================================
+# PUBLISH / MAP
+# =============================================================================
+def _string_mapper(arrow_type):
+    if pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def publish_frame(df, path, meta):
+    """
+    Write a frame as an uncompressed Arrow IPC file (atomically), plus its
+    JSON sidecar.
+
+    Text columns are stored as large_string, the layout pandas' Arrow-backed
+    string dtype uses, so mapping them needs no conversion.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=None)
+    string_fields = [i for i, field in enumerate(table.schema) if pa.types.is_string(field.type)]
+    for i in string_fields:
+        table = table.set_column(i, table.schema.field(i).with_type(pa.large_string()), table.column(i).cast(pa.large_string()))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    meta_tmp = tmp_path.with_suffix(".json")
+    meta_tmp.write_text(json.dumps(meta))
+    os.replace(tmp_path, path)
+    # The sidecar is written last: a frame only counts once it exists
+    os.replace(meta_tmp, path.with_suffix(".json"))
+
+
+def map_frame(path):
+    """
+    Memory-map a published frame.
+
+    Returns:
+        tuple: (read-only DataFrame backed by the mapped file, sidecar dict)
+    """
+    meta = json.loads(path.with_suffix(".json").read_text())
+    source = pa.memory_map(str(path), "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_string_mapper), meta
+
+
+def _remove_stale(path):
+    """Delete older versions of the same dataset (mapped copies stay valid)"""
+    scope_digest, key, _ = path.stem.split("-", 2)
+    for old in path.parent.glob(f"{scope_digest}-{key}-*.arrow"):
+        if old != path:
+            for stale in (old, old.with_suffix(".json")):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+
+def load_shared_frame(name, build):
+    """
+    Map a published frame, publishing it first if no process has yet.
+
+    Args:
+        name: File name stem from frame_name()
+        build: Callable returning (DataFrame, JSON-serialisable meta dict)
+
+    Returns:
+        tuple: (DataFrame, meta) - the frame is read-only when mapped, and
+        the built frame itself when publishing failed
+    """
+    path = shared_frames_dir() / f"{name}.arrow"
+    if path.with_suffix(".json").exists():
+        try:
+            return map_frame(path)
+        except Exception as e:  # removed meanwhile, or truncated by a crash
+            logger.warning("Republishing unreadable shared frame %s: %s", path.name, e)
+
+    df, meta = build()
+    try:
+        publish_frame(df, path, meta)
+        _remove_stale(path)
+        return map_frame(path)
+    except Exception as e:  # e.g. a full /dev/shm; this process keeps a private copy
+        logger.warning("Could not share dataset frame %s: %s", path.name, e)
+        return df, meta
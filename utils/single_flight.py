@@ -0,0 +1,118 @@
+"""
+Single-Flight Request Coalescing
+================================
+When several sessions miss the same cache entry at the same moment (e.g. the
+first wave of users after a data refresh), only one thread computes the value;
+the others wait for that in-flight computation and share its result (or its
+exception) instead of repeating the work on the server's threads.
+
+Each layer (loading, preprocessing, queries) uses its own named group so the
+number of avoided duplicate computations can be reported per layer.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight computation and the threads waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    Attributes:
+        name: Group name used in logs and metrics
+        calls: Total calls to `do`
+        executions: Calls that actually ran the function
+        coalesced: Calls that waited for another thread's result instead
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Run `fn()` for `key`, unless a call for the same key is in flight.
+
+        Returns:
+            The result of the (possibly shared) computation
+
+        Raises:
+            Whatever the shared computation raised
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._inflight.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._inflight[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            if call.waiters:
+                logger.info("%s: %d concurrent request(s) for %r shared one computation",
+                            self.name, call.waiters, key)
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._inflight),
+            }
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def flight_group(name):
+    """The process-wide SingleFlight group called `name` (created on first use)"""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+
+def flight_stats():
+    """dict of group name -> counters, for every group used so far"""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
@@ -0,0 +1,178 @@
+"""
+Columnar Snapshot Cache
+=======================
+Persists parsed datasets as compressed Parquet snapshots so that CSV parsing
+and date conversion are paid once per data change instead of once per process.
+
+Each snapshot has a small JSON manifest recording the size, modification time
+and SHA-256 hash of the source CSV. A snapshot is reused while those match;
+when only the size or mtime changed (e.g. the file was touched or copied) the
+hash decides whether the snapshot is still valid.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+import config
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the way frames are built changes, so old snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+# =============================================================================
+# FINGERPRINTS
+# =============================================================================
+def file_sha256(path):
+    """Compute the SHA-256 hex digest of a file, streaming it in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """
+    Describe the current state of a source file.
+
+    Returns:
+        dict: size in bytes, mtime in nanoseconds and SHA-256 hash
+    """
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+
+
+# =============================================================================
+# SNAPSHOT STORE
+# =============================================================================
+def snapshot_dir_for(data_path):
+    """Return the folder snapshots for a given data folder are stored in"""
+    if config.SNAPSHOT_DIR is not None:
+        return Path(config.SNAPSHOT_DIR)
+    return Path(data_path) / ".snapshots"
+
+
+def _paths(snapshot_dir, source_path):
+    stem = Path(source_path).stem
+    return snapshot_dir / f"{stem}.parquet", snapshot_dir / f"{stem}.json"
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(manifest_path, manifest):
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def _is_current(manifest, source_path, build_key):
+    """
+    Check a manifest against the source file.
+
+    Returns:
+        tuple: (is_current, fresh_stat) where fresh_stat is an updated
+        manifest when the content is unchanged but size/mtime moved on.
+    """
+    if manifest is None:
+        return False, None
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return False, None
+    if manifest.get("build_key") != build_key:
+        return False, None
+
+    stat = os.stat(source_path)
+    if stat.st_size == manifest.get("size") and stat.st_mtime_ns == manifest.get("mtime_ns"):
+        return True, None
+
+    # Size or mtime changed - only the content hash can tell if it matters
+    if stat.st_size != manifest.get("size"):
+        return False, None
+    sha256 = file_sha256(source_path)
+    if sha256 != manifest.get("sha256"):
+        return False, None
+    refreshed = dict(manifest, mtime_ns=stat.st_mtime_ns)
+    return True, refreshed
+
+
+def load_snapshot(source_path, build, snapshot_dir, build_key=""):
+    """
+    Load a dataset from its snapshot, (re)building it from the source if needed.
+
+    Args:
+        source_path: Path to the source CSV file
+        build: Callable taking the source path and returning a DataFrame
+        snapshot_dir: Folder snapshots are written to
+        build_key: Extra string folded into validity checks (e.g. read options)
+
+    Returns:
+        tuple: (DataFrame, manifest dict describing the source file)
+    """
+    source_path = Path(source_path)
+    if not (config.SNAPSHOTS_ENABLED and PARQUET_AVAILABLE):
+        return build(source_path), file_fingerprint(source_path)
+
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_path, manifest_path = _paths(snapshot_dir, source_path)
+    manifest = _read_manifest(manifest_path)
+
+    current, refreshed = _is_current(manifest, source_path, build_key)
+    if current and snapshot_path.exists():
+        try:
+            df = pd.read_parquet(snapshot_path)
+        except Exception as e:  # corrupt or partially written snapshot
+            logger.warning("Discarding unreadable snapshot %s: %s", snapshot_path, e)
+        else:
+            if refreshed is not None:
+                _try_write_manifest(manifest_path, refreshed)
+                manifest = refreshed
+            return df, manifest
+
+    df = build(source_path)
+    manifest = dict(
+        file_fingerprint(source_path),
+        source=source_path.name,
+        format_version=SNAPSHOT_FORMAT_VERSION,
+        build_key=build_key,
+    )
+    try:
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp_path, compression=config.SNAPSHOT_COMPRESSION)
+        os.replace(tmp_path, snapshot_path)
+        _write_manifest(manifest_path, manifest)
+    except Exception as e:  # read-only deployments still work, just without snapshots
+        logger.warning("Could not write snapshot for %s: %s", source_path.name, e)
+    return df, manifest
+
+
+def _try_write_manifest(manifest_path, manifest):
+    try:
+        _write_manifest(manifest_path, manifest)
+    except OSError as e:
+        logger.warning("Could not refresh snapshot manifest %s: %s", manifest_path, e)
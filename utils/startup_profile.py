@@ -0,0 +1,220 @@
+"""
+Startup Profiler
+================
+Records where a worker's cold start goes:
+
+- import time per module (cumulative and self, like `python -X importtime`)
+- load time per dataset (parse/snapshot/mapping, see data_loader.py)
+- time to the first chart of each page, both from the start of that page's
+  first render and, for the very first chart, from process start
+
+Enabled with NOVAMART_PROFILE_STARTUP=1. The report is written as JSON to
+config.STARTUP_REPORT_PATH at the end of every script run, and
+benchmarks/check_startup_budget.py fails when it exceeds a time budget.
+When disabled, every hook here is a no-op.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import config
+
+
+def _process_start():
+    """Wall-clock time the process started (Linux), else when this module loaded"""
+    try:
+        with open("/proc/self/stat") as handle:
+            # Field 22 (after the parenthesised command name) is the start time in clock ticks since boot
+            start_ticks = int(handle.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as handle:
+            uptime = float(handle.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+PROCESS_START = _process_start()
+
+
+# =============================================================================
+# IMPORT TIMING
+# =============================================================================
+class _TimedLoader:
+    """
+    Stands in for a module's loader while it executes, timing exec_module.
+
+    The real loader is put back on the module before its code runs, so
+    nothing inside the module ever sees the wrapper.
+    """
+
+    def __init__(self, loader, name, timer):
+        self.loader = loader
+        self.name = name
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.timer.enter()
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.leave(self.name, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer:
+    """
+    Meta path finder that times every module imported after `install()`.
+
+    Attributes:
+        modules: Module name -> {'cumulative': s, 'self': s}; cumulative
+            includes the modules it imported itself
+        top_level_seconds: Sum of the cumulative time of imports that were
+            not triggered by another timed import
+    """
+
+    def __init__(self):
+        self.modules = {}
+        self.top_level_seconds = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, name, self)
+        return spec
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def enter(self):
+        self._stack().append(0.0)  # time spent in nested imports
+
+    def leave(self, name, seconds):
+        stack = self._stack()
+        nested = stack.pop()
+        with self._lock:
+            self.modules[name] = {'cumulative': seconds, 'self': max(seconds - nested, 0.0)}
+            if not stack:
+                self.top_level_seconds += seconds
+        if stack:
+            stack[-1] += seconds
+
+
+# =============================================================================
+# RECORDER
+# =============================================================================
+_timer = None
+_datasets = {}
+_first_charts = {}
+_first_chart_at = None
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def enabled():
+    return config.PROFILE_STARTUP
+
+
+def install():
+    """Start timing imports (idempotent; call before the app's own imports)"""
+    global _timer
+    if not enabled() or _timer is not None:
+        return
+    _timer = ImportTimer()
+    sys.meta_path.insert(0, _timer)
+
+
+def record_dataset(key, seconds):
+    """Record how long loading a dataset took (the first load per key counts)"""
+    if enabled():
+        with _lock:
+            _datasets.setdefault(key, seconds)
+
+
+@contextmanager
+def page(name):
+    """Attribute charts rendered inside the block to page `name`"""
+    previous = getattr(_local, 'page', None)
+    _local.page, _local.page_start = name, time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.page = previous
+
+
+def chart_rendered():
+    """Called after every chart; the first one per page is recorded"""
+    global _first_chart_at
+    name = getattr(_local, 'page', None)
+    if not enabled() or name is None:
+        return
+    with _lock:
+        if _first_chart_at is None:
+            _first_chart_at = time.time() - PROCESS_START
+        if name not in _first_charts:
+            _first_charts[name] = time.perf_counter() - _local.page_start
+
+
+def report(top=40):
+    """
+    The profile so far.
+
+    Returns:
+        dict: process start, import totals and the `top` slowest modules by
+        cumulative time, per-dataset load seconds, and first-chart timings
+    """
+    modules = dict(_timer.modules) if _timer is not None else {}
+    slowest = sorted(modules.items(), key=lambda item: item[1]['cumulative'], reverse=True)[:top]
+    with _lock:
+        return {
+            'process_start': datetime.fromtimestamp(PROCESS_START, timezone.utc).isoformat(),
+            'imports': {
+                'total_seconds': _timer.top_level_seconds if _timer is not None else None,
+                'module_count': len(modules),
+                'modules': [dict(name=name, **times) for name, times in slowest],
+            },
+            'datasets': {
+                'total_seconds': sum(_datasets.values()),
+                'seconds': dict(_datasets),
+            },
+            'time_to_first_chart_seconds': _first_chart_at,
+            'page_first_chart_seconds': dict(_first_charts),
+        }
+
+
+def write_report(path=None):
+    """Write the report as JSON (atomically); no-op when profiling is off"""
+    if not enabled():
+        return None
+    path = Path(path or config.STARTUP_REPORT_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(report(), indent=2, ensure_ascii=False))
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,168 @@
+"""
+Prefix-Sum Time Index
+=====================
+Daily cumulative sums of the campaign measures - overall, per channel and
+per region - so the total of any date range (last N days, MTD, QTD, YTD, the
+same window a year earlier, ...) is answered in O(1) with two array lookups
+instead of a filter and re-sum over the campaign rows.
+
+The index covers every calendar day between the first and last campaign date
+(days without activity contribute zero), so "last 30 days" means 30 calendar
+days rather than the last 30 rows.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import config
+from metrics import METRICS, required_components
+from versioning import derive_version, version_of
+
+# Dimensions with their own per-value prefix sums
+INDEXED_DIMENSIONS = ['channel', 'region']
+
+
+class PrefixSumIndex:
+    """
+    O(1) date-range totals over a dense daily calendar.
+
+    Prefix arrays have a leading zero, so the inclusive range of day
+    positions [i, j] sums to prefix[j + 1] - prefix[i].
+    """
+
+    def __init__(self, start, days, totals, by_dimension, dimension_values):
+        self.start = pd.Timestamp(start)
+        self.days = days
+        self._totals = totals
+        self._by_dimension = by_dimension
+        self._dimension_values = dimension_values
+
+    @classmethod
+    def from_cube(cls, cube, dimensions=None):
+        """Build the index from a CampaignCube's base table"""
+        base = cube.base
+        dimensions = [d for d in (dimensions or INDEXED_DIMENSIONS) if d in cube.dimensions]
+        start = base['date'].min()
+        days = int((base['date'].max() - start).days) + 1 if len(base) else 0
+        positions = (base['date'] - start).dt.days.to_numpy()
+
+        totals, by_dimension, dimension_values = {}, {}, {}
+        for dim in dimensions:
+            codes, uniques = pd.factorize(base[dim])
+            dimension_values[dim] = {value: code for code, value in enumerate(uniques)}
+            by_dimension[dim] = {}
+            for measure in cube.measures:
+                daily = np.zeros((len(uniques), days), dtype='float64')
+                np.add.at(daily, (codes, positions), base[measure].to_numpy(dtype='float64'))
+                by_dimension[dim][measure] = _prefix(daily)
+        for measure in cube.measures:
+            daily = np.bincount(positions, weights=base[measure].to_numpy(dtype='float64'), minlength=days)
+            totals[measure] = _prefix(daily)
+
+        return cls(start, days, totals, by_dimension, dimension_values)
+
+    # -------------------------------------------------------------------------
+    # Calendar helpers
+    # -------------------------------------------------------------------------
+    @property
+    def end(self):
+        """Last day covered by the index"""
+        return self.start + pd.Timedelta(days=max(self.days - 1, 0))
+
+    def last_n_days(self, n, end=None):
+        """(start, end) of the n calendar days ending on `end` (default: last day)"""
+        end = pd.Timestamp(end) if end is not None else self.end
+        return end - pd.Timedelta(days=n - 1), end
+
+    def month_to_date(self, end=None):
+        end = pd.Timestamp(end) if end is not None else self.end
+        return end.replace(day=1), end
+
+    def quarter_to_date(self, end=None):
+        end = pd.Timestamp(end) if end is not None else self.end
+        return end.to_period('Q').start_time, end
+
+    def year_to_date(self, end=None):
+        end = pd.Timestamp(end) if end is not None else self.end
+        return end.replace(month=1, day=1), end
+
+    @staticmethod
+    def previous_period(start, end):
+        """The window of equal length immediately before [start, end]"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        length = end - start + pd.Timedelta(days=1)
+        return start - length, start - pd.Timedelta(days=1)
+
+    @staticmethod
+    def year_ago(start, end):
+        """The same window one year earlier"""
+        offset = pd.DateOffset(years=1)
+        return pd.Timestamp(start) - offset, pd.Timestamp(end) - offset
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def _bounds(self, start, end):
+        """Clip an inclusive date range to day positions (lo, hi exclusive)"""
+        lo = (pd.Timestamp(start) - self.start).days if start is not None else 0
+        hi = (pd.Timestamp(end) - self.start).days + 1 if end is not None else self.days
+        return min(max(lo, 0), self.days), min(max(hi, 0), self.days)
+
+    def range_total(self, measure, start=None, end=None, **dimension):
+        """
+        Total of an additive measure over an inclusive date range.
+
+        Args:
+            measure: Additive measure column (e.g. 'revenue')
+            start, end: Inclusive bounds (None = open ended); ranges outside
+                the index contribute zero
+            **dimension: At most one indexed dimension filter, e.g.
+                channel='Email' or region='West'
+
+        Returns:
+            float: The range total
+        """
+        lo, hi = self._bounds(start, end)
+        if hi <= lo:
+            return 0.0
+        if not dimension:
+            prefix = self._totals[measure]
+            return float(prefix[hi] - prefix[lo])
+        if len(dimension) > 1:
+            raise ValueError("range_total supports a single dimension filter")
+        (dim, value), = dimension.items()
+        code = self._dimension_values[dim].get(value)
+        if code is None:
+            return 0.0
+        prefix = self._by_dimension[dim][measure][code]
+        return float(prefix[hi] - prefix[lo])
+
+    def range_metric(self, key, start=None, end=None, **dimension):
+        """Evaluate a registered metric (additive or ratio) over a date range"""
+        sums = {col: self.range_total(col, start, end, **dimension)
+                for col in required_components([key])}
+        return METRICS[key].compute(sums) if key in METRICS else sums[key]
+
+
+def _prefix(daily):
+    """Cumulative sums along the last axis with a leading zero"""
+    pad = [(0, 0)] * (daily.ndim - 1) + [(1, 0)]
+    return np.pad(np.cumsum(daily, axis=-1), pad)
+
+
+@st.cache_resource(show_spinner=False, max_entries=config.DERIVED_CACHE_SIZE)
+def _build_index(version, _cube):
+    return PrefixSumIndex.from_cube(_cube)
+
+
+def get_time_index(campaigns, cube):
+    """Prefix-sum index for a campaign frame's cube, built once per version"""
+    return _build_index(derive_version(version_of(campaigns), "prefix-sums"), cube)
+
+
+def percent_change(current, previous):
+    """Relative change in percent, or None when there is no baseline"""
+    if not previous:
+        return None
+    return (current - previous) / previous * 100
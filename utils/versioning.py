@@ -0,0 +1,81 @@
+"""
+Dataset Version Tokens
+======================
+Every dataset gets an immutable version ID when it is loaded, derived from
+the source file's content hash and the schema version. Cached functions key
+on that short string instead of letting Streamlit hash the whole DataFrame,
+so a cache lookup costs O(1) whatever the size of the data.
+
+Versions are tracked by object identity rather than stored on the frame
+(`df.attrs` propagates to filtered copies, which would then collide with
+their parent). Frames that were never registered - e.g. a filtered slice -
+fall back to a content hash.
+"""
+
+import hashlib
+import threading
+import weakref
+
+import pandas as pd
+
+from schema import SCHEMA_VERSION
+
+_lock = threading.Lock()
+_versions = {}  # id(frame) -> (weakref to frame, version)
+
+
+def make_version(key, manifest):
+    """Build a version token from a dataset key and its snapshot manifest"""
+    return f"{key}@{manifest['sha256'][:16]}.s{SCHEMA_VERSION}"
+
+
+def register_version(df, version):
+    """
+    Attach an immutable version token to a DataFrame.
+
+    Returns:
+        pd.DataFrame: The same frame, for chaining
+    """
+    frame_id = id(df)
+
+    def _forget(_ref, frame_id=frame_id):
+        with _lock:
+            entry = _versions.get(frame_id)
+            if entry is not None and entry[0] is _ref:
+                del _versions[frame_id]
+
+    with _lock:
+        _versions[frame_id] = (weakref.ref(df, _forget), version)
+    return df
+
+
+def dataset_version(df):
+    """Return the registered version of a DataFrame, or None"""
+    with _lock:
+        entry = _versions.get(id(df))
+    if entry is None or entry[0]() is not df:
+        return None
+    return entry[1]
+
+
+def version_of(df):
+    """
+    Return a cache key for a DataFrame.
+
+    Registered frames answer in O(1); anything else is content-hashed, which
+    is what Streamlit would have done anyway.
+    """
+    version = dataset_version(df)
+    if version is not None:
+        return version
+    if df is None:
+        return "none"
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return f"hash:{digest.hexdigest()}"
+
+
+def derive_version(parent_version, step):
+    """Version token for a frame derived deterministically from another"""
+    return f"{parent_version}/{step}"